@@ -0,0 +1,95 @@
+"""
+Benchmark độ trễ event loop khi ký nhiều file đồng thời bằng AsyncSigner
+
+Một tác vụ "nhịp tim" ngủ 1 ms liên tục; độ trễ là thời gian thức dậy muộn hơn dự kiến.
+So sánh: gọi RSASigner trực tiếp trên event loop, AsyncSigner với thread pool và
+AsyncSigner với ProcessPoolExecutor.
+
+Chạy (sau khi pip install -e .): python benchmarks/bench_aio.py [--files 300] [--size-kb 256]
+"""
+
+import argparse
+import asyncio
+import statistics
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+from rsa_signature.aio import AsyncSigner
+from rsa_signature.key_manager import RSAKeyManager
+from rsa_signature.signer import RSASigner
+
+INTERVAL = 0.001
+
+
+async def heartbeat(lags: list, stop: asyncio.Event) -> None:
+    """Ghi độ trễ (ms) của mỗi lần thức dậy"""
+    while not stop.is_set():
+        expected = time.perf_counter() + INTERVAL
+        await asyncio.sleep(INTERVAL)
+        lags.append(max(0.0, time.perf_counter() - expected) * 1000)
+
+
+async def run_case(name: str, work) -> None:
+    lags: list = []
+    stop = asyncio.Event()
+    beat = asyncio.ensure_future(heartbeat(lags, stop))
+    await asyncio.sleep(0)  # cho nhịp tim bắt đầu trước khi chạy tải
+    started = time.perf_counter()
+    await work()
+    elapsed = time.perf_counter() - started
+    stop.set()
+    await beat
+    lags.sort()
+    p99 = lags[int(len(lags) * 0.99)] if lags else 0.0
+    print(f"{name:<28} {elapsed:7.2f} s   độ trễ loop: trung vị {statistics.median(lags or [0]):6.2f} ms"
+          f"  p99 {p99:7.2f} ms  max {max(lags or [0]):7.2f} ms")
+
+
+async def main_async(args) -> None:
+    temp_dir = Path(tempfile.mkdtemp())
+    key_manager = RSAKeyManager(args.key_size)
+    key_manager.generate_keypair()
+    private_key_path = str(temp_dir / "private.pem")
+    key_manager.save_private_key(private_key_path)
+    payload = b"x" * (args.size_kb * 1024)
+    paths = []
+    for index in range(args.files):
+        path = temp_dir / f"file{index}.bin"
+        path.write_bytes(payload)
+        paths.append(path)
+
+    print(f"{args.files} file x {args.size_kb} KiB, RSA {args.key_size} bit")
+
+    async def blocking():
+        signer = RSASigner()
+        for path in paths:
+            signer.sign_file(path, private_key_path)
+
+    async def threaded():
+        async with AsyncSigner() as signer:
+            async for _ in signer.sign_many(paths, private_key_path):
+                pass
+
+    async def processes():
+        with ProcessPoolExecutor() as pool:
+            async with AsyncSigner(sign_executor=pool) as signer:
+                async for _ in signer.sign_many(paths, private_key_path):
+                    pass
+
+    await run_case("RSASigner (chặn loop)", blocking)
+    await run_case("AsyncSigner thread pool", threaded)
+    await run_case("AsyncSigner process pool", processes)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--files", type=int, default=300)
+    parser.add_argument("--size-kb", type=int, default=256)
+    parser.add_argument("--key-size", type=int, default=3072)
+    asyncio.run(main_async(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,66 @@
+"""
+Benchmark thời gian tải khóa riêng theo định dạng và tham số KDF
+
+Chạy (sau khi pip install -e .): python benchmarks/bench_key_load.py [--iterations N] [--key-size 2048]
+"""
+
+import argparse
+import statistics
+import tempfile
+import time
+from pathlib import Path
+
+from rsa_signature.key_manager import RSAKeyManager
+
+PASSWORD = "benchmark-password"
+
+# (tên, encoding, có mật khẩu, kdf_rounds, kdf_algorithm)
+CASES = [
+    ("pem", "pem", False, None, "pbes2-aes256"),
+    ("der", "der", False, None, "pbes2-aes256"),
+    ("pem+password", "pem", True, None, "pbes2-aes256"),
+    ("der+password", "der", True, None, "pbes2-aes256"),
+    ("pkcs12 pbes2 1k rounds", "pkcs12", True, 1000, "pbes2-aes256"),
+    ("pkcs12 pbes2 50k rounds", "pkcs12", True, 50000, "pbes2-aes256"),
+    ("pkcs12 pbes2 500k rounds", "pkcs12", True, 500000, "pbes2-aes256"),
+    ("pkcs12 pbes1-3des 2k rounds", "pkcs12", True, 2048, "pbes1-3des"),
+]
+
+
+def measure(path: Path, password, iterations: int, skip_validation: bool) -> float:
+    """Trung vị thời gian tải (ms), không dùng cache"""
+    key_manager = RSAKeyManager(use_cache=False, skip_key_validation=skip_validation)
+    samples = []
+    for _ in range(iterations):
+        started = time.perf_counter()
+        key_manager.load_private_key(str(path), password)
+        samples.append((time.perf_counter() - started) * 1000)
+    return statistics.median(samples)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--iterations", type=int, default=20)
+    parser.add_argument("--key-size", type=int, default=2048)
+    args = parser.parse_args()
+
+    key_manager = RSAKeyManager(args.key_size)
+    key_manager.generate_keypair()
+
+    print(f"RSA {args.key_size} bit, {args.iterations} lần tải mỗi trường hợp (trung vị)")
+    print(f"{'định dạng':<30}{'kích thước':>12}{'tải (ms)':>12}{'bỏ kiểm tra (ms)':>18}")
+    with tempfile.TemporaryDirectory() as temp_dir:
+        for name, encoding, encrypted, kdf_rounds, kdf_algorithm in CASES:
+            password = PASSWORD if encrypted else None
+            path = Path(temp_dir) / name.replace(" ", "_")
+            key_manager.save_private_key(str(path), password, encoding=encoding,
+                                         kdf_rounds=kdf_rounds, kdf_algorithm=kdf_algorithm)
+            validated = measure(path, password, args.iterations, False)
+            # PKCS#12 không hỗ trợ bỏ qua bước kiểm tra khóa
+            skipped = (f"{measure(path, password, args.iterations, True):.2f}"
+                       if encoding != "pkcs12" else "-")
+            print(f"{name:<30}{path.stat().st_size:>12}{validated:>12.2f}{skipped:>18}")
+
+
+if __name__ == "__main__":
+    main()
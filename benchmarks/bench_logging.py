@@ -0,0 +1,119 @@
+"""
+Benchmark chi phí logging trên mỗi lần ký (RSASigner.sign_digest + sign_file)
+
+So sánh cùng một vòng ký với:
+  - không log (mức WARNING): đường cơ sở
+  - cấu hình cũ: FileHandler ghi đồng bộ, filter lowercase + quét từng từ khóa
+  - configure_logging: QueueHandler / QueueListener, một lần quét regex
+Chi phí logging = thời gian mỗi lần ký trừ đường cơ sở.
+
+Chạy (sau khi pip install -e .): python benchmarks/bench_logging.py [--iterations N] [--rounds N]
+"""
+
+import argparse
+import logging
+import statistics
+import tempfile
+import time
+from pathlib import Path
+from typing import Tuple
+
+from rsa_signature.key_manager import RSAKeyManager
+from rsa_signature.signer import RSASigner
+from rsa_signature.utils import (LOG_FORMAT, configure_logging, get_logger, hash_file,
+                                 shutdown_logging)
+
+
+class LegacySensitiveDataFilter(logging.Filter):
+    """Filter của setup_logging cũ"""
+    def filter(self, record):
+        sensitive_keywords = ['password', 'private_key', 'secret']
+        message = record.getMessage().lower()
+        return not any(keyword in message for keyword in sensitive_keywords)
+
+
+def legacy_logging(log_file: Path) -> None:
+    """Cấu hình như setup_logging cũ (không có console để không làm nhiễu kết quả)"""
+    handler = logging.FileHandler(log_file)
+    handler.setFormatter(logging.Formatter(LOG_FORMAT))
+    logger = get_logger()
+    logger.setLevel(logging.INFO)
+    logger.addHandler(handler)
+    logger.addFilter(LegacySensitiveDataFilter())
+
+
+def no_logging(log_file: Path) -> None:
+    get_logger().setLevel(logging.WARNING)
+
+
+def queued_logging(log_file: Path) -> None:
+    configure_logging(log_file=log_file, console=False)
+
+
+def reset_logging() -> None:
+    shutdown_logging()
+    logger = get_logger()
+    for handler in list(logger.handlers):
+        logger.removeHandler(handler)
+        handler.close()
+    for log_filter in list(logger.filters):
+        logger.removeFilter(log_filter)
+
+
+CASES = [("không log", no_logging), ("cấu hình cũ", legacy_logging),
+         ("configure_logging", queued_logging)]
+
+
+def measure(signer: RSASigner, file_path: Path, key_path: str,
+            iterations: int) -> Tuple[float, float]:
+    """
+    Trung vị thời gian một lần ký (µs): thời gian thực và CPU của riêng luồng đang ký
+    (CPU của luồng listener không tính vào luồng ký)
+    """
+    wall, cpu = [], []
+    for _ in range(iterations):
+        started, started_cpu = time.perf_counter(), time.thread_time()
+        signer.sign_file(file_path, key_path)
+        cpu.append((time.thread_time() - started_cpu) * 1e6)
+        wall.append((time.perf_counter() - started) * 1e6)
+    return statistics.median(wall), statistics.median(cpu)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--iterations", type=int, default=500)
+    parser.add_argument("--rounds", type=int, default=3)
+    args = parser.parse_args()
+
+    temp_dir = Path(tempfile.mkdtemp())
+    key_manager = RSAKeyManager()
+    key_manager.generate_keypair()
+    key_path = str(temp_dir / "private.pem")
+    key_manager.save_private_key(key_path)
+    file_path = temp_dir / "data.bin"
+    file_path.write_bytes(b"x" * 4096)
+    signer = RSASigner()
+    hash_file(file_path)
+
+    # Chạy xen kẽ các trường hợp qua nhiều vòng, lấy vòng tốt nhất để giảm nhiễu
+    results = {}
+    for _ in range(args.rounds):
+        for name, configure in CASES:
+            configure(temp_dir / "bench.log")
+            wall, cpu = measure(signer, file_path, key_path, args.iterations)
+            reset_logging()
+            best = results.get(name, (wall, cpu))
+            results[name] = (min(wall, best[0]), min(cpu, best[1]))
+
+    baseline = results["không log"]
+    print(f"{args.iterations} lần ký x {args.rounds} vòng, trung vị µs mỗi lần "
+          f"(chênh lệch so với không log)")
+    print(f"{'':<20} {'thời gian thực':>22} {'CPU luồng ký':>22}")
+    for name, _ in CASES:
+        wall, cpu = results[name]
+        print(f"{name:<20} {wall:10.1f} (+{wall - baseline[0]:7.1f})"
+              f" {cpu:10.1f} (+{cpu - baseline[1]:7.1f})")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,62 @@
+"""
+Benchmark lưu và đọc chữ ký: một file .sig mỗi chữ ký (safe_file_write) so với SignatureStore
+
+Chữ ký là dữ liệu ngẫu nhiên cùng kích thước chữ ký RSA, nên chỉ đo phần lưu trữ.
+SignatureStore ghi theo lô (mỗi lô một lần fsync).
+
+Chạy (sau khi pip install -e .): python benchmarks/bench_sigstore.py [--count 20000] [--batch 256]
+"""
+
+import argparse
+import os
+import tempfile
+import time
+from pathlib import Path
+
+from rsa_signature.sigstore import SignatureStore
+from rsa_signature.utils import safe_file_write
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--count", type=int, default=20000)
+    parser.add_argument("--batch", type=int, default=256)
+    parser.add_argument("--signature-size", type=int, default=256)
+    args = parser.parse_args()
+
+    temp_dir = Path(tempfile.mkdtemp())
+    signatures = [(temp_dir / "artifacts" / f"file{index}.bin", os.urandom(args.signature_size))
+                  for index in range(args.count)]
+
+    sig_dir = temp_dir / "sigs"
+    sig_dir.mkdir()
+    started = time.perf_counter()
+    for path, signature in signatures:
+        safe_file_write(sig_dir / (path.name + ".sig"), signature)
+    files_write = time.perf_counter() - started
+    started = time.perf_counter()
+    for path, _ in signatures:
+        (sig_dir / (path.name + ".sig")).read_bytes()
+    files_read = time.perf_counter() - started
+
+    started = time.perf_counter()
+    with SignatureStore(temp_dir / "signatures.pack") as store:
+        for index in range(0, len(signatures), args.batch):
+            store.put_many(signatures[index:index + args.batch])
+    store_write = time.perf_counter() - started
+    with SignatureStore(temp_dir / "signatures.pack") as store:
+        started = time.perf_counter()
+        for path, _ in signatures:
+            store.get(path)
+        store_read = time.perf_counter() - started
+        pack_bytes = store.stats()["pack_bytes"]
+
+    print(f"{args.count} chữ ký x {args.signature_size} byte, lô {args.batch}")
+    print(f"{'':<16} {'ghi (s)':>10} {'đọc (s)':>10} {'số file':>10}")
+    print(f"{'file .sig':<16} {files_write:10.2f} {files_read:10.2f} {args.count:10d}")
+    print(f"{'SignatureStore':<16} {store_write:10.2f} {store_read:10.2f} {2:10d}"
+          f"   (pack {pack_bytes / 1e6:.1f} MB)")
+
+
+if __name__ == "__main__":
+    main()
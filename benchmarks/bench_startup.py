@@ -0,0 +1,75 @@
+"""
+Benchmark thời gian khởi động CLI (python -X importtime) với ngưỡng hồi quy
+
+Đo thời gian import rsa_signature.cli (cộng dồn, theo -X importtime) và thời gian thực của
+`rsa-signature --help` / `--version`; thoát mã 1 nếu trung vị vượt ngưỡng hoặc CLI nạp
+module nặng (cryptography, flask) chỉ để in trợ giúp.
+
+Chạy (sau khi pip install -e .): python benchmarks/bench_startup.py [--runs N] [--max-import-ms 100]
+"""
+
+import argparse
+import re
+import statistics
+import subprocess
+import sys
+import time
+
+FORBIDDEN_MODULES = ('cryptography', 'flask')
+_IMPORTTIME_RE = re.compile(r'^import time:\s+\d+ \|\s+(\d+) \|(\s*)(\S+)$')
+
+
+def import_profile() -> dict:
+    """Thời gian import cộng dồn (µs) của từng module khi import rsa_signature.cli"""
+    result = subprocess.run([sys.executable, "-X", "importtime", "-c", "import rsa_signature.cli"],
+                            capture_output=True, text=True, check=True)
+    profile = {}
+    for line in result.stderr.splitlines():
+        match = _IMPORTTIME_RE.match(line)
+        if match:
+            profile[match.group(3)] = int(match.group(1))
+    return profile
+
+
+def wall_time(args) -> float:
+    """Thời gian thực (ms) của một lần chạy CLI"""
+    started = time.perf_counter()
+    subprocess.run([sys.executable, "-m", "rsa_signature.cli", *args],
+                   stdout=subprocess.DEVNULL, check=True)
+    return (time.perf_counter() - started) * 1000
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--runs", type=int, default=10)
+    parser.add_argument("--max-import-ms", type=float, default=100.0,
+                        help="Ngưỡng trung vị thời gian import rsa_signature.cli (ms)")
+    args = parser.parse_args()
+
+    profiles = [import_profile() for _ in range(args.runs)]
+    import_ms = statistics.median(p["rsa_signature.cli"] for p in profiles) / 1000
+    loaded = profiles[-1]
+    forbidden = sorted(m for m in loaded if m.split('.')[0] in FORBIDDEN_MODULES)
+
+    print(f"{args.runs} lần chạy, trung vị")
+    print(f"{'import rsa_signature.cli':<28} {import_ms:8.1f} ms (ngưỡng {args.max_import_ms:.0f} ms)")
+    for cli_args in (["--help"], ["--version"], ["sign", "--help"]):
+        median = statistics.median(wall_time(cli_args) for _ in range(args.runs))
+        print(f"{'rsa-signature ' + ' '.join(cli_args):<28} {median:8.1f} ms")
+
+    slowest = sorted(((us, name) for name, us in loaded.items() if name != "rsa_signature.cli"),
+                     reverse=True)[:5]
+    print("Module import chậm nhất: " + ", ".join(f"{name} {us / 1000:.1f} ms" for us, name in slowest))
+
+    failed = False
+    if forbidden:
+        print(f"LỖI: CLI nạp module nặng khi khởi động: {', '.join(forbidden[:5])}")
+        failed = True
+    if import_ms > args.max_import_ms:
+        print(f"LỖI: import rsa_signature.cli vượt ngưỡng ({import_ms:.1f} > {args.max_import_ms:.0f} ms)")
+        failed = True
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
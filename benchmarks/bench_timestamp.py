@@ -0,0 +1,77 @@
+"""
+Benchmark timestamp theo lô Merkle qua TSA cục bộ (Unix socket)
+
+So sánh số chữ ký được timestamp mỗi giây:
+  - một phép ký RSA cho mỗi chữ ký (cách làm không gom lô)
+  - TimestampBatcher trong tiến trình
+  - TimestampAuthority qua socket với nhiều client đồng thời
+
+Chạy (sau khi pip install -e .): python benchmarks/bench_timestamp.py [--count 50000] [--clients 4]
+"""
+
+import argparse
+import hashlib
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+from rsa_signature.key_manager import RSAKeyManager
+from rsa_signature.signer import sign_hash
+from rsa_signature.timestamp import TimestampBatcher
+from rsa_signature.tsa import TimestampAuthority, TimestampClient
+
+
+def report(name: str, count: int, seconds: float) -> None:
+    print(f"{name:<32} {count:8d} chữ ký {seconds:7.2f} s {count / seconds:12.0f} / s")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--count", type=int, default=50000)
+    parser.add_argument("--clients", type=int, default=4)
+    parser.add_argument("--window", type=float, default=0.01)
+    parser.add_argument("--key-size", type=int, default=3072)
+    args = parser.parse_args()
+
+    key_manager = RSAKeyManager(args.key_size)
+    private_key, public_key = key_manager.generate_keypair()
+    digests = [hashlib.sha256(b"signature %d" % index).digest() for index in range(args.count)]
+    print(f"RSA {args.key_size} bit, cửa sổ gom lô {args.window * 1000:.0f} ms")
+
+    sample = digests[:200]
+    started = time.perf_counter()
+    for digest in sample:
+        sign_hash(private_key, digest)
+    report("một phép ký mỗi chữ ký", len(sample), time.perf_counter() - started)
+
+    with TimestampBatcher(private_key, window=args.window) as batcher:
+        started = time.perf_counter()
+        tokens = batcher.timestamp_many(digests)
+        report("TimestampBatcher", len(tokens), time.perf_counter() - started)
+
+    socket_path = Path(tempfile.mkdtemp()) / "tsa.sock"
+    authority = TimestampAuthority(private_key, window=args.window)
+    thread = threading.Thread(target=authority.serve_forever, args=(socket_path,), daemon=True)
+    thread.start()
+    while not socket_path.exists():
+        time.sleep(0.01)
+
+    def client_work(part):
+        with TimestampClient(socket_path) as client:
+            return len(client.timestamp_many(part))
+
+    parts = [digests[index::args.clients] for index in range(args.clients)]
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=args.clients) as pool:
+        total = sum(pool.map(client_work, parts))
+    report(f"TSA qua socket, {args.clients} client", total, time.perf_counter() - started)
+    authority.shutdown()
+    thread.join()
+
+    assert tokens[-1].verify(public_key, digests[-1])
+
+
+if __name__ == "__main__":
+    main()
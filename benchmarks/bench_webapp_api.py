@@ -0,0 +1,82 @@
+"""
+Benchmark ký qua web app: form /sign-file (lưu upload vào uploads/ rồi đọc lại để hash)
+so với JSON API /api/v1/sign (hash dần body từ luồng WSGI, không ghi đĩa)
+
+Dùng Flask test client trong cùng tiến trình; I/O là số byte đọc/ghi qua syscall của
+tiến trình (rchar / wchar trong /proc/self/io, chỉ có trên Linux).
+
+Chạy (sau khi pip install -e .): python benchmarks/bench_webapp_api.py [--requests 50] [--size-kb 1024]
+"""
+
+import argparse
+import io
+import os
+import tempfile
+import time
+from pathlib import Path
+
+from rsa_signature import webapp
+from rsa_signature.key_manager import RSAKeyManager
+from rsa_signature.keystore import KeyStore
+
+
+def process_io():
+    """(byte đọc, byte ghi) của tiến trình, hoặc (0, 0) nếu không có /proc/self/io"""
+    try:
+        with open('/proc/self/io') as f:
+            values = dict(line.split(': ') for line in f.read().splitlines())
+        return int(values['rchar']), int(values['wchar'])
+    except OSError:
+        return 0, 0
+
+
+def run(name, count, payload_size, send) -> None:
+    read_before, written_before = process_io()
+    started = time.perf_counter()
+    for index in range(count):
+        response = send(index)
+        assert response.status_code == 200, response.data[:200]
+    elapsed = time.perf_counter() - started
+    read_after, written_after = process_io()
+    print(f"{name:<22} {elapsed / count * 1000:8.2f} ms/request"
+          f"   đọc {(read_after - read_before) / count / payload_size:5.2f}x"
+          f"   ghi {(written_after - written_before) / count / payload_size:5.2f}x kích thước file")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--requests", type=int, default=50)
+    parser.add_argument("--size-kb", type=int, default=1024)
+    args = parser.parse_args()
+
+    temp_dir = Path(tempfile.mkdtemp())
+    os.chdir(temp_dir)
+    key_manager = RSAKeyManager()
+    key_manager.generate_keypair()
+    private_key_path = temp_dir / "private.pem"
+    key_manager.save_private_key(str(private_key_path))
+    private_pem = private_key_path.read_bytes()
+    with KeyStore(temp_dir / "keys") as keystore:
+        key_id = keystore.add_keypair(key_manager)
+
+    webapp.app.config['KEYSTORE_PATH'] = str(temp_dir / "keys")
+    client = webapp.app.test_client()
+    payload = os.urandom(args.size_kb * 1024)
+    print(f"{args.requests} request x {args.size_kb} KiB")
+
+    def form(index):
+        return client.post('/sign-file', content_type='multipart/form-data', data={
+            'file': (io.BytesIO(payload), f"file{index}.bin"),
+            'private_key': (io.BytesIO(private_pem), "private.pem"),
+        })
+
+    def api(index):
+        return client.post('/api/v1/sign', data=payload, query_string={'key_id': key_id},
+                           content_type='application/octet-stream')
+
+    run("form /sign-file", args.requests, len(payload), form)
+    run("JSON /api/v1/sign", args.requests, len(payload), api)
+
+
+if __name__ == "__main__":
+    main()
@@ -3,5 +3,36 @@ RSA Digital Signature System
 Hệ thống chữ ký số RSA với Python
 """
 
+import importlib
+
 __version__ = "1.0.0"
-__author__ = "Ha Tuan Anh (RSA Signature System)"
\ No newline at end of file
+__author__ = "Ha Tuan Anh (RSA Signature System)"
+
+# Lớp công khai, import khi được dùng lần đầu (import package không nạp cryptography)
+_LAZY_EXPORTS = {
+    'RSAKeyManager': 'key_manager',
+    'RSASigner': 'signer',
+    'RSAVerifier': 'verifier',
+    'SigningContext': 'context',
+    'VerificationContext': 'context',
+    'SignatureEnvelope': 'envelope',
+    'TrustStore': 'truststore',
+    'SignatureStore': 'sigstore',
+    'AsyncSigner': 'aio',
+    'AsyncVerifier': 'aio',
+}
+
+__all__ = sorted(_LAZY_EXPORTS)
+
+
+def __getattr__(name):
+    module_name = _LAZY_EXPORTS.get(name)
+    if module_name is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(f".{module_name}", __name__), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted(set(globals()) | set(_LAZY_EXPORTS))
@@ -0,0 +1,404 @@
+"""
+Signing agent: tiến trình chạy nền giữ khóa riêng đã mở khóa và ký qua Unix socket
+(tương tự ssh-agent)
+
+Giao thức: mỗi thông điệp là một frame gồm độ dài 4 byte (big-endian) và nội dung.
+    Yêu cầu:  op (1 byte) | độ dài key ref (2 byte) | key ref (UTF-8) | payload
+    (op 1 ký digest chế độ v1, op 4 ký digest chế độ v2/Prehashed, op 2 ký file,
+    op 3 liệt kê khóa)
+    Phản hồi: status (1 byte, 0 = OK) | payload (chữ ký hoặc thông báo lỗi UTF-8)
+Key ref là fingerprint (hoặc tiền tố) hay đường dẫn file khóa riêng; rỗng nếu agent
+chỉ giữ một khóa.
+"""
+
+import os
+import socket
+import socketserver
+import stat
+import struct
+import tempfile
+import threading
+import time
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple, Union
+
+from cryptography.hazmat.primitives.asymmetric import rsa
+
+from .key_manager import RSAKeyManager, public_key_fingerprint
+from .signer import sign_hash
+from .utils import (get_logger, hash_file, SIGNATURE_MODE_LEGACY,
+                    SIGNATURE_MODE_PREHASHED, HASH_MODE_SHA256, HASH_MODE_TREE)
+
+logger = get_logger()
+
+AGENT_SOCKET_ENV = 'RSA_SIGNATURE_AGENT_SOCK'
+
+OP_SIGN_DIGEST = 1
+OP_SIGN_FILE = 2
+OP_LIST_KEYS = 3
+OP_SIGN_DIGEST_PREHASHED = 4
+OP_KEY_FINGERPRINT = 5
+# payload: độ dài (1 byte) | "<chế độ chữ ký>/<chế độ hash>" | digest
+OP_SIGN_DIGEST_SCHEME = 6
+
+STATUS_OK = 0
+STATUS_ERROR = 1
+
+MAX_FRAME_SIZE = 1024 * 1024
+_LENGTH = struct.Struct('>I')
+_KEY_REF_LENGTH = struct.Struct('>H')
+
+
+class AgentError(RuntimeError):
+    """Lỗi do agent trả về hoặc lỗi kết nối tới agent"""
+
+
+def send_frame(sock: socket.socket, payload: bytes) -> None:
+    """Gửi một frame có tiền tố độ dài"""
+    sock.sendall(_LENGTH.pack(len(payload)) + payload)
+
+
+def _recv_exact(sock: socket.socket, size: int) -> Optional[bytes]:
+    """Đọc đúng size byte, trả về None nếu kết nối đóng trước khi đọc được byte nào"""
+    chunks = []
+    remaining = size
+    while remaining:
+        chunk = sock.recv(remaining)
+        if not chunk:
+            if remaining == size:
+                return None
+            raise AgentError("Kết nối bị đóng giữa chừng")
+        chunks.append(chunk)
+        remaining -= len(chunk)
+    return b''.join(chunks)
+
+
+def recv_frame(sock: socket.socket) -> Optional[bytes]:
+    """Nhận một frame, trả về None khi kết nối đã đóng"""
+    header = _recv_exact(sock, _LENGTH.size)
+    if header is None:
+        return None
+    (length,) = _LENGTH.unpack(header)
+    if length > MAX_FRAME_SIZE:
+        raise AgentError(f"Frame quá lớn: {length} byte")
+    return _recv_exact(sock, length) or b''
+
+
+def remove_stale_socket(socket_path: str) -> None:
+    """
+    Xóa socket cũ không còn tiến trình nào lắng nghe
+
+    Raises:
+        FileExistsError: Đường dẫn tồn tại nhưng không phải socket, hoặc socket đang được dùng
+    """
+    try:
+        mode = os.lstat(socket_path).st_mode
+    except FileNotFoundError:
+        return
+    if not stat.S_ISSOCK(mode):
+        raise FileExistsError(f"Đường dẫn đã tồn tại và không phải socket: {socket_path}")
+    probe = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    try:
+        probe.connect(socket_path)
+    except ConnectionRefusedError:
+        try:
+            os.unlink(socket_path)
+        except FileNotFoundError:
+            pass
+        return
+    except FileNotFoundError:
+        return
+    finally:
+        probe.close()
+    raise FileExistsError(f"Socket đang được tiến trình khác sử dụng: {socket_path}")
+
+
+def create_unix_server(socket_path: str, handler_class
+                       ) -> Tuple[socketserver.ThreadingUnixStreamServer, Tuple[int, int]]:
+    """
+    Tạo server Unix socket chỉ chủ sở hữu kết nối được (quyền 0600)
+
+    Socket được bind trong một thư mục riêng 0700, đặt quyền rồi mới link vào socket_path,
+    nên không có lúc nào socket mở cho người khác và không cần đổi umask của tiến trình.
+
+    Returns:
+        Tuple (server, (st_dev, st_ino) của socket để chỉ xóa đúng socket của mình)
+    """
+    remove_stale_socket(socket_path)
+    private_dir = tempfile.mkdtemp(prefix='.rsa-signature-',
+                                   dir=os.path.dirname(os.path.abspath(socket_path)))
+    temp_path = os.path.join(private_dir, 's')
+    try:
+        server = socketserver.ThreadingUnixStreamServer(temp_path, handler_class)
+        try:
+            os.chmod(temp_path, 0o600)
+            # link thất bại nếu đường dẫn vừa bị tạo lại, thay vì ghi đè file của người khác
+            os.link(temp_path, socket_path)
+        except BaseException:
+            server.server_close()
+            raise
+        st = os.lstat(socket_path)
+    finally:
+        if os.path.lexists(temp_path):
+            os.unlink(temp_path)
+        os.rmdir(private_dir)
+    server.daemon_threads = True
+    return server, (st.st_dev, st.st_ino)
+
+
+def remove_socket(socket_path: str, identity: Tuple[int, int]) -> None:
+    """Xóa socket_path nếu vẫn là socket do server này tạo"""
+    try:
+        st = os.lstat(socket_path)
+    except FileNotFoundError:
+        return
+    if (st.st_dev, st.st_ino) == identity:
+        os.unlink(socket_path)
+
+
+class SigningAgent:
+    """Giữ các khóa riêng đã giải mã trong bộ nhớ và phục vụ yêu cầu ký"""
+
+    def __init__(self, idle_ttl: Optional[float] = 3600.0):
+        """
+        Khởi tạo Signing Agent
+
+        Args:
+            idle_ttl: Sau bao nhiêu giây không có yêu cầu thì xóa khóa và dừng agent
+                      (None để chạy không giới hạn)
+        """
+        self.idle_ttl = idle_ttl
+        self._keys: Dict[str, rsa.RSAPrivateKey] = {}
+        self._paths: Dict[str, str] = {}
+        self._lock = threading.Lock()
+        self._last_used = time.monotonic()
+        self._server: Optional[socketserver.BaseServer] = None
+
+    def add_key(self, private_key_path: Union[str, Path],
+                password: Optional[str] = None) -> str:
+        """
+        Mở khóa và nạp một khóa riêng vào agent
+
+        Args:
+            private_key_path: Đường dẫn khóa riêng
+            password: Mật khẩu khóa riêng (nếu có)
+
+        Returns:
+            Fingerprint của khóa
+        """
+        private_key = RSAKeyManager(use_cache=False).load_private_key(str(private_key_path), password)
+        fingerprint = public_key_fingerprint(private_key.public_key())
+        with self._lock:
+            self._keys[fingerprint] = private_key
+            self._paths[str(Path(private_key_path).resolve())] = fingerprint
+        logger.info("Agent đã nạp khóa %s", fingerprint[:16])
+        return fingerprint
+
+    def fingerprints(self) -> List[str]:
+        """Danh sách fingerprint các khóa đang giữ"""
+        with self._lock:
+            return sorted(self._keys)
+
+    def remove_all_keys(self) -> None:
+        """Xóa toàn bộ khóa khỏi bộ nhớ"""
+        with self._lock:
+            self._keys.clear()
+            self._paths.clear()
+
+    def _find_key(self, key_ref: str) -> rsa.RSAPrivateKey:
+        """Tìm khóa theo fingerprint, tiền tố fingerprint hoặc đường dẫn"""
+        with self._lock:
+            if not key_ref:
+                if len(self._keys) != 1:
+                    raise LookupError("Agent giữ nhiều khóa, cần chỉ định khóa")
+                return next(iter(self._keys.values()))
+
+            fingerprint = self._paths.get(key_ref)
+            if fingerprint is None:
+                matches = [fp for fp in self._keys if fp.startswith(key_ref.lower())]
+                if len(matches) != 1:
+                    raise LookupError(f"Agent không có khóa: {key_ref}")
+                fingerprint = matches[0]
+            return self._keys[fingerprint]
+
+    def handle_request(self, request: bytes) -> Tuple[int, bytes]:
+        """
+        Xử lý một yêu cầu đã nhận
+
+        Returns:
+            Tuple (status, payload)
+        """
+        self._last_used = time.monotonic()
+        try:
+            op = request[0]
+            (ref_length,) = _KEY_REF_LENGTH.unpack_from(request, 1)
+            offset = 1 + _KEY_REF_LENGTH.size
+            key_ref = request[offset:offset + ref_length].decode('utf-8')
+            payload = request[offset + ref_length:]
+
+            if op == OP_LIST_KEYS:
+                return STATUS_OK, '\n'.join(self.fingerprints()).encode('utf-8')
+            if op == OP_SIGN_DIGEST:
+                return STATUS_OK, sign_hash(self._find_key(key_ref), payload)
+            if op == OP_SIGN_DIGEST_PREHASHED:
+                return STATUS_OK, sign_hash(self._find_key(key_ref), payload,
+                                            SIGNATURE_MODE_PREHASHED)
+            if op == OP_SIGN_FILE:
+                private_key = self._find_key(key_ref)
+                return STATUS_OK, sign_hash(private_key, hash_file(payload.decode('utf-8')))
+            if op == OP_SIGN_DIGEST_SCHEME:
+                mode, hash_mode = payload[1:1 + payload[0]].decode('ascii').split('/', 1)
+                return STATUS_OK, sign_hash(self._find_key(key_ref), payload[1 + payload[0]:],
+                                            mode, hash_mode)
+            if op == OP_KEY_FINGERPRINT:
+                public_key = self._find_key(key_ref).public_key()
+                return STATUS_OK, public_key_fingerprint(public_key).encode('ascii')
+            raise ValueError(f"Thao tác không hỗ trợ: {op}")
+        except Exception as e:
+            logger.warning("Agent từ chối yêu cầu: %s", e)
+            return STATUS_ERROR, str(e).encode('utf-8')
+
+    def _watch_idle(self) -> None:
+        """Dừng agent khi không có yêu cầu trong idle_ttl giây"""
+        while self._server is not None:
+            time.sleep(min(self.idle_ttl, 1.0))
+            if time.monotonic() - self._last_used >= self.idle_ttl:
+                logger.info("Agent hết thời gian chờ, xóa khóa và dừng")
+                self.remove_all_keys()
+                self.shutdown()
+                return
+
+    def serve_forever(self, socket_path: Union[str, Path]) -> None:
+        """
+        Lắng nghe trên Unix socket cho đến khi shutdown() hoặc hết idle_ttl
+
+        Args:
+            socket_path: Đường dẫn Unix domain socket
+        """
+        agent = self
+        socket_path = str(socket_path)
+
+        class _Handler(socketserver.BaseRequestHandler):
+            def handle(self):
+                while True:
+                    try:
+                        request = recv_frame(self.request)
+                    except (AgentError, OSError):
+                        return
+                    if request is None:
+                        return
+                    status, payload = agent.handle_request(request)
+                    send_frame(self.request, bytes([status]) + payload)
+
+        server, identity = create_unix_server(socket_path, _Handler)
+        self._server = server
+        self._last_used = time.monotonic()
+
+        if self.idle_ttl is not None:
+            threading.Thread(target=self._watch_idle, daemon=True).start()
+
+        logger.info("Agent đang lắng nghe tại %s", socket_path)
+        try:
+            server.serve_forever()
+        finally:
+            server.server_close()
+            self._server = None
+            remove_socket(socket_path, identity)
+
+    def shutdown(self) -> None:
+        """Dừng vòng lặp phục vụ (gọi từ luồng khác)"""
+        server = self._server
+        if server is not None:
+            threading.Thread(target=server.shutdown, daemon=True).start()
+
+
+class AgentClient:
+    """Client kết nối tới signing agent"""
+
+    def __init__(self, socket_path: Optional[Union[str, Path]] = None, timeout: float = 30.0):
+        """
+        Khởi tạo Agent Client
+
+        Args:
+            socket_path: Đường dẫn socket (mặc định lấy từ biến môi trường
+                         RSA_SIGNATURE_AGENT_SOCK)
+            timeout: Thời gian chờ tối đa cho mỗi yêu cầu (giây)
+        """
+        socket_path = socket_path or os.environ.get(AGENT_SOCKET_ENV)
+        if not socket_path:
+            raise AgentError(f"Chưa đặt biến môi trường {AGENT_SOCKET_ENV}")
+        self.socket_path = str(socket_path)
+        self.timeout = timeout
+        self._sock: Optional[socket.socket] = None
+
+    @classmethod
+    def from_env(cls) -> Optional["AgentClient"]:
+        """Tạo client nếu biến môi trường agent được đặt, ngược lại trả về None"""
+        if os.environ.get(AGENT_SOCKET_ENV):
+            return cls()
+        return None
+
+    def _connect(self) -> socket.socket:
+        if self._sock is None:
+            sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+            sock.settimeout(self.timeout)
+            try:
+                sock.connect(self.socket_path)
+            except OSError as e:
+                sock.close()
+                raise AgentError(f"Không kết nối được agent tại {self.socket_path}: {str(e)}")
+            self._sock = sock
+        return self._sock
+
+    def _request(self, op: int, key_ref: str = '', payload: bytes = b'') -> bytes:
+        """Gửi một yêu cầu và trả về payload phản hồi"""
+        ref = key_ref.encode('utf-8')
+        sock = self._connect()
+        try:
+            send_frame(sock, bytes([op]) + _KEY_REF_LENGTH.pack(len(ref)) + ref + payload)
+            response = recv_frame(sock)
+        except OSError as e:
+            self.close()
+            raise AgentError(f"Lỗi giao tiếp với agent: {str(e)}")
+        if not response:
+            self.close()
+            raise AgentError("Agent đóng kết nối")
+        if response[0] != STATUS_OK:
+            raise AgentError(response[1:].decode('utf-8', 'replace'))
+        return response[1:]
+
+    def sign_digest(self, digest: bytes, key_ref: str = '',
+                    mode: str = SIGNATURE_MODE_LEGACY,
+                    hash_mode: str = HASH_MODE_SHA256) -> bytes:
+        """Ký digest đã tính sẵn (file không cần gửi tới agent)"""
+        # sha256 và sha256-tree-v1 cùng dùng PSS/SHA-256 nên đi qua thao tác cũ
+        if hash_mode not in (HASH_MODE_SHA256, HASH_MODE_TREE):
+            scheme = f"{mode}/{hash_mode}".encode('ascii')
+            return self._request(OP_SIGN_DIGEST_SCHEME, key_ref,
+                                 bytes([len(scheme)]) + scheme + digest)
+        op = OP_SIGN_DIGEST_PREHASHED if mode == SIGNATURE_MODE_PREHASHED else OP_SIGN_DIGEST
+        return self._request(op, key_ref, digest)
+
+    def sign_file(self, file_path: Union[str, Path], key_ref: str = '') -> bytes:
+        """Yêu cầu agent tự đọc và ký file"""
+        return self._request(OP_SIGN_FILE, key_ref, str(Path(file_path).resolve()).encode('utf-8'))
+
+    def key_fingerprint(self, key_ref: str = '') -> str:
+        """Fingerprint của khóa agent sẽ dùng cho key_ref (ghi vào envelope chữ ký)"""
+        return self._request(OP_KEY_FINGERPRINT, key_ref).decode('ascii')
+
+    def list_keys(self) -> List[str]:
+        """Danh sách fingerprint các khóa agent đang giữ"""
+        payload = self._request(OP_LIST_KEYS)
+        return payload.decode('utf-8').split('\n') if payload else []
+
+    def close(self) -> None:
+        if self._sock is not None:
+            self._sock.close()
+            self._sock = None
+
+    def __enter__(self) -> "AgentClient":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
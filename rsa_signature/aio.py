@@ -0,0 +1,435 @@
+"""
+API asyncio cho dịch vụ chạy trên event loop: AsyncSigner / AsyncVerifier
+
+Event loop không bao giờ đọc file hay tính RSA: đọc và hash file chạy trong thread pool
+có giới hạn, phép ký RSA chạy trong executor cấu hình được (thread pool hoặc
+ProcessPoolExecutor). Các hàm *_many là async generator, giới hạn số tác vụ đang chạy
+và hủy các tác vụ còn lại khi bên gọi dừng vòng lặp hoặc bị hủy.
+"""
+
+import asyncio
+import os
+import time
+from collections import OrderedDict
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from functools import partial
+from pathlib import Path
+from typing import (AsyncIterable, AsyncIterator, Awaitable, Callable, Dict, Iterable,
+                    Optional, Set, Tuple, TypeVar, Union)
+
+from cryptography.hazmat.primitives import serialization
+
+from .utils import get_logger, SIGNATURE_MODE_LEGACY, HASH_MODE_SHA256
+from .key_manager import RSAKeyManager
+from .digest_cache import DigestCache
+from .verify_cache import VerifyCache
+from .context import SigningContext, VerificationContext, VerificationResult, VerifyFailure
+from .envelope import ENVELOPE_FORMATS, SignatureEnvelope
+from .signer import RSASigner, SignResult, default_signature_format
+from .verifier import RSAVerifier, SignatureEncodingError, VerifyResult
+
+logger = get_logger()
+
+T = TypeVar('T')
+R = TypeVar('R')
+
+# Context ký trong tiến trình worker theo (key ID, mode, hash): LRU nhỏ, một tiến trình
+# có thể phục vụ nhiều khóa nhưng không giữ mãi mọi khóa từng ký
+PROCESS_CONTEXT_CACHE_SIZE = 8
+_process_contexts: "OrderedDict[Tuple[str, str, str], SigningContext]" = OrderedDict()
+
+
+def _sign_in_process(key_id: str, private_der: bytes, mode: str, hash_mode: str,
+                     digest: bytes) -> bytes:
+    """Ký digest trong tiến trình worker, nạp khóa một lần cho mỗi tiến trình"""
+    key = (key_id, mode, hash_mode)
+    context = _process_contexts.get(key)
+    if context is None:
+        context = SigningContext(serialization.load_der_private_key(private_der, password=None),
+                                 mode, hash_mode)
+        _process_contexts[key] = context
+        while len(_process_contexts) > PROCESS_CONTEXT_CACHE_SIZE:
+            _process_contexts.popitem(last=False)
+    else:
+        _process_contexts.move_to_end(key)
+    return context.sign_digest(digest)
+
+
+async def _iterate(items: Union[Iterable[T], AsyncIterable[T]]) -> AsyncIterator[T]:
+    """Duyệt iterable thường hoặc async iterable"""
+    if hasattr(items, '__aiter__'):
+        async for item in items:
+            yield item
+    else:
+        for item in items:
+            yield item
+
+
+async def _bounded(items: Union[Iterable[T], AsyncIterable[T]],
+                   process: Callable[[T], Awaitable[R]],
+                   concurrency: int) -> AsyncIterator[R]:
+    """
+    Chạy process cho từng phần tử, tối đa concurrency tác vụ cùng lúc,
+    trả kết quả theo thứ tự hoàn thành; tác vụ còn dở bị hủy khi generator đóng
+    """
+    pending: Set[asyncio.Task] = set()
+    source = _iterate(items)
+    try:
+        async for item in source:
+            pending.add(asyncio.ensure_future(process(item)))
+            if len(pending) >= concurrency:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    yield task.result()
+        while pending:
+            done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                yield task.result()
+    finally:
+        # Bên gọi break / aclose() / bị hủy: không để tác vụ chạy tiếp sau lô
+        for task in pending:
+            task.cancel()
+        if pending:
+            await asyncio.gather(*pending, return_exceptions=True)
+        await source.aclose()
+
+
+class _AsyncBase:
+    """Quản lý executor đọc/hash file và executor RSA dùng chung cho AsyncSigner / AsyncVerifier"""
+
+    def __init__(self, io_workers: Optional[int] = None,
+                 rsa_executor: Optional[Executor] = None):
+        self.io_workers = io_workers or os.cpu_count() or 1
+        self._io_executor = ThreadPoolExecutor(max_workers=self.io_workers,
+                                               thread_name_prefix='rsa-io')
+        self._owns_rsa_executor = rsa_executor is None
+        self._rsa_executor = rsa_executor or ThreadPoolExecutor(
+            max_workers=os.cpu_count() or 1, thread_name_prefix='rsa-op'
+        )
+
+    async def _run_io(self, func: Callable[..., R], *args) -> R:
+        """Chạy hàm blocking (đọc file, hash, tải khóa) trong thread pool I/O"""
+        return await asyncio.get_running_loop().run_in_executor(
+            self._io_executor, partial(func, *args)
+        )
+
+    async def _run_rsa(self, func: Callable[..., R], *args) -> R:
+        """Chạy phép toán RSA trong executor RSA"""
+        return await asyncio.get_running_loop().run_in_executor(
+            self._rsa_executor, partial(func, *args)
+        )
+
+    def close(self) -> None:
+        """Dừng các executor do đối tượng tự tạo (executor truyền vào do bên gọi quản lý)"""
+        self._io_executor.shutdown(wait=False)
+        if self._owns_rsa_executor:
+            self._rsa_executor.shutdown(wait=False)
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc_info) -> None:
+        self.close()
+
+
+class AsyncSigner(_AsyncBase):
+    """Ký file bằng RSA-PSS trên asyncio, không chặn event loop"""
+
+    # Số khóa riêng dạng DER (chưa mã hóa) giữ sẵn để gửi sang tiến trình worker
+    PRIVATE_DER_CACHE_SIZE = 4
+
+    def __init__(self, key_manager: Optional[RSAKeyManager] = None,
+                 digest_cache: Optional[DigestCache] = None,
+                 io_workers: Optional[int] = None,
+                 sign_executor: Optional[Executor] = None):
+        """
+        Khởi tạo Async Signer
+
+        Args:
+            key_manager: RSA Key Manager (tùy chọn)
+            digest_cache: Cache digest file để bỏ qua hash lại file không đổi (tùy chọn)
+            io_workers: Số luồng đọc/hash file (mặc định bằng số CPU)
+            sign_executor: Executor cho phép ký RSA; ProcessPoolExecutor để phép ký không
+                           tranh GIL với event loop (mặc định: thread pool riêng)
+        """
+        super().__init__(io_workers, sign_executor)
+        self.signer = RSASigner(key_manager, digest_cache)
+        self._use_processes = isinstance(self._rsa_executor, ProcessPoolExecutor)
+        self._private_ders: "OrderedDict[str, bytes]" = OrderedDict()
+
+    async def hash_file(self, file_path: Union[str, Path],
+                        hash_mode: str = HASH_MODE_SHA256) -> bytes:
+        """Digest của file, đọc và hash trong thread pool I/O"""
+        return await self._run_io(self.signer.hash_file, file_path, hash_mode)
+
+    async def signing_context(self, private_key_path: str,
+                              password: Optional[str] = None,
+                              mode: str = SIGNATURE_MODE_LEGACY,
+                              hash_mode: str = HASH_MODE_SHA256) -> SigningContext:
+        """Context ký cho một khóa (tải khóa và KDF chạy ngoài event loop)"""
+        return await self._run_io(self.signer.signing_context, private_key_path, password,
+                                  mode, hash_mode)
+
+    def _private_der(self, context: SigningContext) -> bytes:
+        """Khóa riêng dạng DER gửi sang tiến trình worker (LRU theo key ID)"""
+        der = self._private_ders.get(context.key_id)
+        if der is None:
+            der = context.private_key.private_bytes(
+                encoding=serialization.Encoding.DER,
+                format=serialization.PrivateFormat.PKCS8,
+                encryption_algorithm=serialization.NoEncryption()
+            )
+            self._private_ders[context.key_id] = der
+            while len(self._private_ders) > self.PRIVATE_DER_CACHE_SIZE:
+                self._private_ders.popitem(last=False)
+        else:
+            self._private_ders.move_to_end(context.key_id)
+        return der
+
+    def close(self) -> None:
+        """Dừng executor và bỏ các khóa riêng DER đang giữ"""
+        self._private_ders.clear()
+        super().close()
+
+    async def sign_digest(self, context: SigningContext, digest: bytes) -> bytes:
+        """
+        Ký digest trong executor RSA
+
+        Args:
+            context: Context ký (từ signing_context)
+            digest: Digest đã tính theo context.hash_mode
+
+        Returns:
+            Chữ ký dưới dạng bytes
+        """
+        if self._use_processes:
+            return await self._run_rsa(_sign_in_process, context.key_id,
+                                       self._private_der(context),
+                                       context.mode, context.hash_mode, digest)
+        return await self._run_rsa(context.sign_digest, digest)
+
+    async def sign_file(self, file_path: Union[str, Path],
+                        private_key_path: str,
+                        password: Optional[str] = None,
+                        mode: str = SIGNATURE_MODE_LEGACY,
+                        hash_mode: str = HASH_MODE_SHA256) -> bytes:
+        """
+        Ký file
+
+        Args:
+            file_path: Đường dẫn file cần ký
+            private_key_path: Đường dẫn khóa riêng
+            password: Mật khẩu khóa riêng (nếu có)
+            mode: Chế độ chữ ký ('v1' mặc định, 'v2' dùng Prehashed)
+            hash_mode: Chế độ hash file ('sha256' mặc định)
+
+        Returns:
+            Chữ ký dưới dạng bytes
+        """
+        try:
+            context = await self.signing_context(private_key_path, password, mode, hash_mode)
+            return await self.sign_digest(context, await self.hash_file(file_path, hash_mode))
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logger.error("Lỗi trong quá trình ký file: %s", e)
+            raise RuntimeError(f"Không thể ký file: {str(e)}")
+
+    async def sign_many(self, paths: Union[Iterable[Union[str, Path]],
+                                           AsyncIterable[Union[str, Path]]],
+                        private_key_path: str,
+                        password: Optional[str] = None,
+                        concurrency: Optional[int] = None,
+                        save: bool = False,
+                        format_type: Optional[str] = None,
+                        mode: str = SIGNATURE_MODE_LEGACY,
+                        hash_mode: str = HASH_MODE_SHA256) -> AsyncIterator[SignResult]:
+        """
+        Ký nhiều file: tải khóa một lần, trả kết quả theo thứ tự hoàn thành
+
+        Args:
+            paths: Danh sách, iterator hoặc async iterator đường dẫn file
+            private_key_path: Đường dẫn khóa riêng
+            password: Mật khẩu khóa riêng (nếu có)
+            concurrency: Số file xử lý đồng thời (mặc định gấp đôi io_workers)
+            save: Lưu chữ ký cạnh mỗi file (<file>.sig, <file>.rsig...)
+            format_type: Định dạng chữ ký khi lưu (mặc định theo default_signature_format)
+            mode: Chế độ chữ ký ('v1' mặc định, 'v2' dùng Prehashed)
+            hash_mode: Chế độ hash file ('sha256' mặc định)
+
+        Yields:
+            SignResult cho từng file; lỗi của một file không làm dừng cả lô
+        """
+        format_type = format_type or default_signature_format(hash_mode)
+        context = await self.signing_context(private_key_path, password, mode, hash_mode)
+
+        async def process(path: Union[str, Path]) -> SignResult:
+            started = time.perf_counter()
+            result = SignResult(path=str(path))
+            try:
+                file_hash = await self.hash_file(path, hash_mode)
+                result.signature = await self.sign_digest(context, file_hash)
+                if save:
+                    signature_path = self.signer.default_signature_path(path, format_type)
+                    signature = result.signature
+                    if format_type in ENVELOPE_FORMATS:
+                        signature = SignatureEnvelope.create(signature, context.public_key,
+                                                             mode, hash_mode)
+                    await self._run_io(self.signer.save_signature, signature,
+                                       signature_path, format_type)
+                    result.signature_path = str(signature_path)
+            except Exception as e:
+                result.error = str(e)
+                logger.error("Lỗi khi ký file %s: %s", path, e)
+            result.seconds = time.perf_counter() - started
+            return result
+
+        results = _bounded(paths, process, concurrency or self.io_workers * 2)
+        try:
+            async for result in results:
+                yield result
+        finally:
+            await results.aclose()
+
+
+class AsyncVerifier(_AsyncBase):
+    """
+    Xác minh chữ ký RSA-PSS trên asyncio, không chặn event loop
+
+    Phép xác minh RSA (số mũ công khai nhỏ) rẻ hơn nhiều so với chi phí gửi sang tiến trình
+    khác nên luôn chạy trong thread pool; executor truyền vào phải là thread pool.
+    """
+
+    def __init__(self, key_manager: Optional[RSAKeyManager] = None,
+                 digest_cache: Optional[DigestCache] = None,
+                 verify_cache: Optional[VerifyCache] = None,
+                 io_workers: Optional[int] = None,
+                 verify_executor: Optional[ThreadPoolExecutor] = None):
+        """
+        Khởi tạo Async Verifier
+
+        Args:
+            key_manager: RSA Key Manager (tùy chọn)
+            digest_cache: Cache digest file để bỏ qua hash lại file không đổi (tùy chọn)
+            verify_cache: Cache kết quả xác minh để bỏ qua kiểm tra RSA lặp lại (tùy chọn)
+            io_workers: Số luồng đọc/hash file (mặc định bằng số CPU)
+            verify_executor: Thread pool cho phép xác minh RSA (mặc định: thread pool riêng)
+        """
+        if isinstance(verify_executor, ProcessPoolExecutor):
+            raise ValueError("AsyncVerifier chỉ hỗ trợ thread pool cho phép xác minh")
+        super().__init__(io_workers, verify_executor)
+        self.verifier = RSAVerifier(key_manager, digest_cache, verify_cache)
+
+    async def verification_context(self, public_key_path: str,
+                                   mode: str = SIGNATURE_MODE_LEGACY,
+                                   hash_mode: str = HASH_MODE_SHA256) -> VerificationContext:
+        """Context xác minh cho một khóa (tải khóa ngoài event loop)"""
+        return await self._run_io(self.verifier.verification_context, public_key_path,
+                                  mode, hash_mode)
+
+    async def _check(self, context: VerificationContext, signature: bytes,
+                     file_path: Union[str, Path],
+                     envelope: Optional[SignatureEnvelope] = None) -> VerificationResult:
+        """Kiểm tra sơ bộ trên event loop, hash file trong thread pool I/O rồi xác minh"""
+        context, failed = self.verifier._prepare(context, signature, envelope)
+        if failed is not None:
+            return failed
+        file_hash = await self._run_io(self.verifier.hash_file, file_path, context.hash_mode)
+        return await self._run_rsa(self.verifier._verify_digest, context, signature, file_hash)
+
+    async def verify_file_detailed(self, file_path: Union[str, Path],
+                                   signature_path: Union[str, Path],
+                                   public_key_path: str,
+                                   mode: str = SIGNATURE_MODE_LEGACY,
+                                   hash_mode: str = HASH_MODE_SHA256) -> VerificationResult:
+        """
+        Xác minh file với chữ ký lưu trong file, trả về lý do khi thất bại
+
+        Args:
+            file_path: Đường dẫn file gốc
+            signature_path: Đường dẫn file chữ ký
+            public_key_path: Đường dẫn khóa công khai
+            mode: Chế độ chữ ký ('v1' mặc định, 'v2' dùng Prehashed)
+            hash_mode: Chế độ hash khi ký ('sha256' mặc định; envelope tự mang chế độ hash)
+
+        Returns:
+            VerificationResult (valid, reason)
+        """
+        try:
+            signature, envelope = await self._run_io(self.verifier.read_signature,
+                                                     signature_path)
+            context = await self.verification_context(public_key_path, mode, hash_mode)
+            return await self._check(context, signature, file_path, envelope)
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logger.error("Lỗi trong quá trình xác minh file: %s", e)
+            raise RuntimeError(f"Không thể xác minh file: {str(e)}")
+
+    async def verify_file(self, file_path: Union[str, Path],
+                          signature_path: Union[str, Path],
+                          public_key_path: str,
+                          mode: str = SIGNATURE_MODE_LEGACY,
+                          hash_mode: str = HASH_MODE_SHA256) -> bool:
+        """Xác minh file với chữ ký lưu trong file (xem verify_file_detailed)"""
+        result = await self.verify_file_detailed(file_path, signature_path, public_key_path,
+                                                 mode, hash_mode)
+        return result.valid
+
+    async def verify_many(self, items: Union[Iterable[Tuple[Union[str, Path], Union[str, Path], str]],
+                                             AsyncIterable[Tuple[Union[str, Path], Union[str, Path], str]]],
+                          concurrency: Optional[int] = None,
+                          mode: str = SIGNATURE_MODE_LEGACY,
+                          hash_mode: str = HASH_MODE_SHA256) -> AsyncIterator[VerifyResult]:
+        """
+        Xác minh nhiều bộ (file, chữ ký, khóa công khai): mỗi khóa chỉ tải một lần,
+        trả kết quả theo thứ tự hoàn thành
+
+        Args:
+            items: Danh sách, iterator hoặc async iterator các bộ (file, file chữ ký, khóa công khai)
+            concurrency: Số bộ xử lý đồng thời (mặc định gấp đôi io_workers)
+            mode: Chế độ chữ ký ('v1' mặc định, 'v2' dùng Prehashed)
+            hash_mode: Chế độ hash khi ký ('sha256' mặc định)
+
+        Yields:
+            VerifyResult cho từng bộ; lỗi của một bộ không làm dừng cả lô
+        """
+        # Mỗi đường dẫn khóa chỉ tải một lần kể cả khi nhiều tác vụ cùng chờ
+        contexts: Dict[str, asyncio.Future] = {}
+
+        async def process(item) -> VerifyResult:
+            started = time.perf_counter()
+            file_path, signature_path, public_key_path = item
+            result = VerifyResult(path=str(file_path), signature_path=str(signature_path),
+                                  public_key_path=str(public_key_path))
+            try:
+                loading = contexts.get(str(public_key_path))
+                if loading is None:
+                    loading = asyncio.ensure_future(
+                        self.verification_context(str(public_key_path), mode, hash_mode)
+                    )
+                    contexts[str(public_key_path)] = loading
+                # shield: hủy một tác vụ không hủy việc tải khóa mà tác vụ khác đang chờ
+                context = await asyncio.shield(loading)
+                try:
+                    signature, envelope = await self._run_io(self.verifier.read_signature,
+                                                             signature_path)
+                except SignatureEncodingError:
+                    result.reason = VerifyFailure.SIGNATURE_ENCODING
+                else:
+                    outcome = await self._check(context, signature, file_path, envelope)
+                    result.valid, result.reason = outcome.valid, outcome.reason
+            except Exception as e:
+                result.error = str(e)
+                logger.error("Lỗi khi xác minh file %s: %s", file_path, e)
+            result.seconds = time.perf_counter() - started
+            return result
+
+        results = _bounded(items, process, concurrency or self.io_workers * 2)
+        try:
+            async for result in results:
+                yield result
+        finally:
+            await results.aclose()
+            for loading in contexts.values():
+                loading.cancel()
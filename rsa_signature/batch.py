@@ -0,0 +1,143 @@
+"""
+Đọc danh sách xác minh hàng loạt và ghi báo cáo dạng JSON Lines / CSV (xử lý theo luồng)
+"""
+
+import csv
+import json
+from pathlib import Path
+from typing import Any, Callable, Iterator, Optional, TextIO, Tuple, Union
+
+from .constants import BATCH_FORMATS
+from .context import VerifyFailure
+from .verifier import VerifyResult
+
+REPORT_FIELDS = ('file', 'signature', 'public_key', 'status', 'reason', 'latency_ms', 'error')
+
+# Mã thoát của verify-batch
+EXIT_ALL_VALID = 0
+EXIT_INVALID = 1
+EXIT_ERROR = 2
+
+
+def detect_batch_format(path: Union[str, Path]) -> str:
+    """Đoán định dạng danh sách theo phần mở rộng (mặc định jsonl)"""
+    return 'csv' if str(path).lower().endswith('.csv') else 'jsonl'
+
+
+def _batch_item(row: Any, base: Path,
+                default_public_key: Optional[str]) -> Tuple[Path, Path, str]:
+    """Chuyển một dòng đã parse thành bộ (file, chữ ký, khóa công khai)"""
+    if not isinstance(row, dict):
+        raise ValueError("dòng không phải object")
+    file_path = row.get('file')
+    public_key = row.get('public_key') or default_public_key
+    signature = row.get('signature') or f"{file_path}.sig"
+    if not file_path or not public_key:
+        raise ValueError("thiếu file hoặc public_key")
+    if not all(isinstance(value, str) for value in (file_path, public_key, signature)):
+        raise ValueError("file, signature và public_key phải là chuỗi")
+    return base / file_path, base / signature, str(base / public_key)
+
+
+def invalid_item_result(line_number: int, row: Any, message: str) -> VerifyResult:
+    """Kết quả lỗi (reason invalid_item) cho một dòng danh sách không dùng được"""
+    file_path = row.get('file') if isinstance(row, dict) else None
+    return VerifyResult(path=file_path if isinstance(file_path, str) else '',
+                        signature_path='', public_key_path='',
+                        reason=VerifyFailure.INVALID_ITEM,
+                        error=f"Dòng {line_number}: {message}")
+
+
+def iter_batch_items(stream: TextIO,
+                     input_format: str = 'jsonl',
+                     base_dir: Optional[Union[str, Path]] = None,
+                     default_public_key: Optional[str] = None,
+                     on_invalid: Optional[Callable[[VerifyResult], None]] = None
+                     ) -> Iterator[Tuple[Path, Path, str]]:
+    """
+    Đọc dần các bộ (file, chữ ký, khóa công khai) từ danh sách
+
+    JSON Lines: mỗi dòng {"file": ..., "signature": ..., "public_key": ...}
+    CSV: dòng tiêu đề file,signature,public_key
+    Thiếu "signature" thì dùng <file>.sig; thiếu "public_key" thì dùng default_public_key.
+
+    Args:
+        stream: Stream văn bản của danh sách
+        input_format: 'jsonl' hoặc 'csv'
+        base_dir: Thư mục gốc cho đường dẫn tương đối (mặc định thư mục hiện tại)
+        default_public_key: Khóa công khai mặc định
+        on_invalid: Nhận VerifyResult lỗi (reason invalid_item) cho dòng sai định dạng rồi
+                    đọc tiếp; None để raise ValueError ở dòng sai đầu tiên
+
+    Yields:
+        Bộ (file, chữ ký, khóa công khai)
+    """
+    if input_format not in BATCH_FORMATS:
+        raise ValueError(f"Định dạng danh sách không hỗ trợ: {input_format}")
+    base = Path(base_dir) if base_dir is not None else Path()
+
+    if input_format == 'csv':
+        rows = enumerate(csv.DictReader(stream), 1)
+    else:
+        rows = ((line_number, line) for line_number, line in enumerate(stream, 1)
+                if line.strip())
+
+    for line_number, row in rows:
+        try:
+            if input_format != 'csv':
+                row = json.loads(row)
+            item = _batch_item(row, base, default_public_key)
+        except ValueError as e:
+            if on_invalid is None:
+                raise ValueError(f"Dòng {line_number}: {str(e)}")
+            on_invalid(invalid_item_result(line_number, row, str(e)))
+            continue
+        yield item
+
+
+class ReportWriter:
+    """Ghi từng kết quả ngay khi có (không giữ kết quả trong bộ nhớ) và đếm theo trạng thái"""
+
+    def __init__(self, stream: TextIO, output_format: str = 'jsonl'):
+        """
+        Khởi tạo Report Writer
+
+        Args:
+            stream: Stream văn bản để ghi báo cáo
+            output_format: 'jsonl' hoặc 'csv'
+        """
+        if output_format not in BATCH_FORMATS:
+            raise ValueError(f"Định dạng báo cáo không hỗ trợ: {output_format}")
+        self.stream = stream
+        self.output_format = output_format
+        self.counts = {'valid': 0, 'invalid': 0, 'error': 0}
+        self._csv = None
+        if output_format == 'csv':
+            self._csv = csv.DictWriter(stream, fieldnames=REPORT_FIELDS)
+            self._csv.writeheader()
+
+    def write(self, result: VerifyResult) -> None:
+        """Ghi một kết quả"""
+        self.counts[result.status] += 1
+        record = {
+            'file': result.path,
+            'signature': result.signature_path,
+            'public_key': result.public_key_path,
+            'status': result.status,
+            'reason': result.reason.value if result.reason else None,
+            'latency_ms': round(result.seconds * 1000, 3),
+            'error': result.error,
+        }
+        if self._csv is not None:
+            self._csv.writerow(record)
+        else:
+            self.stream.write(json.dumps(record, ensure_ascii=False) + '\n')
+
+    @property
+    def exit_code(self) -> int:
+        """0 nếu mọi chữ ký hợp lệ, 1 nếu có chữ ký không hợp lệ, 2 nếu có lỗi"""
+        if self.counts['error']:
+            return EXIT_ERROR
+        if self.counts['invalid']:
+            return EXIT_INVALID
+        return EXIT_ALL_VALID
@@ -2,32 +2,76 @@
 Command Line Interface cho hệ thống chữ ký số RSA
 """
 
+import os
 import click
 import getpass
 from pathlib import Path
 
-from .key_manager import RSAKeyManager
-from .signer import RSASigner
-from .verifier import RSAVerifier
-from .timestamp import TimestampService
-from .utils import setup_logging
-
-logger = setup_logging()
+# Chỉ import hằng số ở mức module: --help / --version không nạp cryptography, và mỗi
+# lệnh con import phần nặng (ký, xác minh, agent...) khi thực sự chạy
+from .constants import (BATCH_FORMATS, SIGNATURE_FORMATS, SIGNATURE_MODE_LEGACY,
+                        SIGNATURE_MODES, HASH_MODE_SHA256, HASH_MODE_TREE, HASH_MODES)
 
 @click.group()
 @click.version_option(version='1.0.0')
-def cli():
+@click.option('--log-level', type=click.Choice(['DEBUG', 'INFO', 'WARNING', 'ERROR'],
+                                               case_sensitive=False),
+              default='INFO', show_default=True, help='Mức log (stderr và rsa_signature.log)')
+def cli(log_level):
     """Hệ thống chữ ký số RSA - RSA Digital Signature System"""
-    pass
+    from .utils import configure_logging
+    configure_logging(log_level)
+
+def read_password_source(password_file, password_env):
+    """Đọc mật khẩu từ file (dòng đầu tiên) hoặc biến môi trường"""
+    if password_file:
+        with open(password_file, 'r', encoding='utf-8') as f:
+            return f.readline().rstrip('\r\n') or None
+    if password_env:
+        value = os.environ.get(password_env)
+        if value is None:
+            raise click.UsageError(f"Biến môi trường {password_env} chưa được đặt")
+        return value or None
+    return None
 
 @cli.command()
 @click.option('--key-size', default=2048, help='Kích thước khóa (2048 hoặc 3072)')
-@click.option('--private-key', required=True, help='Đường dẫn lưu khóa riêng')
-@click.option('--public-key', required=True, help='Đường dẫn lưu khóa công khai')
+@click.option('--private-key', help='Đường dẫn lưu khóa riêng')
+@click.option('--public-key', help='Đường dẫn lưu khóa công khai')
 @click.option('--password', is_flag=True, help='Sử dụng mật khẩu để bảo vệ khóa riêng')
-def genkey(key_size, private_key, public_key, password):
-    """Tạo cặp khóa RSA mới"""
+@click.option('--password-file', type=click.Path(exists=True, dir_okay=False),
+              help='Đọc mật khẩu khóa riêng từ dòng đầu tiên của file')
+@click.option('--password-env', help='Đọc mật khẩu khóa riêng từ biến môi trường')
+@click.option('--count', type=click.IntRange(min=1), help='Số cặp khóa cần tạo (chế độ hàng loạt)')
+@click.option('--jobs', type=click.IntRange(min=1), help='Số tiến trình tạo khóa song song')
+@click.option('--output-dir', help='Thư mục lưu khóa ở chế độ hàng loạt')
+@click.option('--prefix', default='key', show_default=True, help='Tiền tố tên file khóa')
+def genkey(key_size, private_key, public_key, password, password_file, password_env,
+           count, jobs, output_dir, prefix):
+    """Tạo cặp khóa RSA mới (hoặc hàng loạt với --count)"""
+    from .key_manager import RSAKeyManager
     try:
+        if count is not None:
+            if not output_dir:
+                raise click.UsageError("--count cần có --output-dir")
+            if password:
+                raise click.UsageError("Chế độ hàng loạt dùng --password-file hoặc --password-env")
+            
+            import json
+            from .provisioning import provision_keypairs
+            summary = provision_keypairs(
+                output_dir, count, key_size=key_size, jobs=jobs,
+                password=read_password_source(password_file, password_env),
+                prefix=prefix
+            )
+            click.echo(json.dumps(summary, indent=2))
+            if summary['failed']:
+                raise SystemExit(1)
+            return
+        
+        if not private_key or not public_key:
+            raise click.UsageError("Cần --private-key và --public-key (hoặc --count và --output-dir)")
+        
         click.echo(f"Đang tạo cặp khóa RSA {key_size} bit...")
         
         # Tạo key manager
@@ -37,7 +81,7 @@ def genkey(key_size, private_key, public_key, password):
         key_manager.generate_keypair()
         
         # Lấy mật khẩu nếu cần
-        key_password = None
+        key_password = read_password_source(password_file, password_env)
         if password:
             key_password = getpass.getpass("Nhập mật khẩu cho khóa riêng: ")
             confirm_password = getpass.getpass("Xác nhận mật khẩu: ")
@@ -53,78 +97,464 @@ def genkey(key_size, private_key, public_key, password):
         click.echo(f"  - Khóa riêng: {private_key}")
         click.echo(f"  - Khóa công khai: {public_key}")
         
+    except click.UsageError:
+        raise
     except Exception as e:
         click.echo(f"Lỗi: {str(e)}", err=True)
 
+def sign_with_agent(file_hash, private_key, mode, hash_mode=HASH_MODE_SHA256,
+                    with_fingerprint=False):
+    """
+    Ký digest qua signing agent khi biến môi trường RSA_SIGNATURE_AGENT_SOCK được đặt
+    
+    Returns:
+        Tuple (chữ ký, fingerprint khóa hoặc None), hoặc None nếu không có agent /
+        agent không giữ khóa này
+    """
+    from .agent import AgentClient, AgentError
+    client = AgentClient.from_env()
+    if client is None:
+        return None
+    
+    try:
+        with client:
+            key_ref = str(Path(private_key).resolve())
+            file_signature = client.sign_digest(file_hash, key_ref, mode, hash_mode)
+            fingerprint = client.key_fingerprint(key_ref) if with_fingerprint else None
+            return file_signature, fingerprint
+    except AgentError as e:
+        click.echo(f"Không dùng được agent ({str(e)}), ký trực tiếp", err=True)
+        return None
+
+def write_signature_stdout(file_signature, format_type):
+    """Ghi chữ ký ra stdout (binary, base64, envelope hoặc armored)"""
+    from .envelope import SignatureEnvelope
+    from .utils import encode_base64
+    if format_type == 'base64':
+        click.echo(encode_base64(file_signature))
+    elif format_type == 'armored':
+        click.echo(file_signature.to_armored(), nl=False)
+    else:
+        if isinstance(file_signature, SignatureEnvelope):
+            file_signature = file_signature.to_bytes()
+        stdout = click.open_file('-', 'wb')
+        stdout.write(file_signature)
+        stdout.flush()
+
 @cli.command()
 @click.argument('file_path')
 @click.option('--private-key', required=True, help='Đường dẫn khóa riêng')
-@click.option('--signature', help='Đường dẫn lưu chữ ký (tự động nếu không có)')
-@click.option('--format', 'format_type', default='binary', 
-              type=click.Choice(['binary', 'base64']), help='Định dạng chữ ký')
+@click.option('--signature', help='Đường dẫn lưu chữ ký (tự động nếu không có, "-" để ghi ra stdout)')
+@click.option('--format', 'format_type',
+              type=click.Choice(SIGNATURE_FORMATS),
+              help='Định dạng chữ ký (envelope/armored gộp chữ ký, key ID, thuật toán và timestamp '
+                   'vào một file; mặc định binary với sha256, envelope với thuật toán khác)')
 @click.option('--password', is_flag=True, help='Khóa riêng có mật khẩu')
 @click.option('--timestamp', is_flag=True, help='Tạo timestamp cho chữ ký')
-def sign(file_path, private_key, signature, format_type, password, timestamp):
-    """Ký file bằng RSA-PSS"""
+@click.option('--mode', default=SIGNATURE_MODE_LEGACY, show_default=True,
+              type=click.Choice(SIGNATURE_MODES),
+              help='Chế độ chữ ký (v2 ký trực tiếp digest bằng Prehashed)')
+@click.option('--hash', '--hash-mode', 'hash_mode', default=HASH_MODE_SHA256, show_default=True,
+              type=click.Choice(HASH_MODES),
+              help='Thuật toán hash file (sha512/blake2b nhanh hơn trên CPU 64-bit; '
+                   'sha256-tree-v1 hash song song file lớn); được ghi vào envelope')
+def sign(file_path, private_key, signature, format_type, password, timestamp, mode, hash_mode):
+    """Ký file bằng RSA-PSS (FILE_PATH là "-" để đọc từ stdin)"""
+    import time
+    from .constants import ENVELOPE_FORMATS
+    from .envelope import SignatureEnvelope
+    from .key_manager import public_key_fingerprint
+    from .signer import RSASigner, default_signature_format
+    from .timestamp import TimestampService, signature_digest
+    from .tsa import TSA_SOCKET_ENV, TimestampClient
+    from .utils import hash_file_mode, hash_stream
+    from_stdin = file_path == '-'
+    to_stdout = signature == '-' or (from_stdin and signature is None)
+    format_type = format_type or default_signature_format(hash_mode)
+    use_envelope = format_type in ENVELOPE_FORMATS
+    
+    def info(message):
+        # Khi chữ ký ghi ra stdout, thông báo chuyển sang stderr
+        click.echo(message, err=to_stdout)
+    
     try:
-        click.echo(f"Đang ký file: {file_path}")
-        
-        # Lấy mật khẩu nếu cần
-        key_password = None
-        if password:
-            key_password = getpass.getpass("Nhập mật khẩu khóa riêng: ")
+        info(f"Đang ký file: {'<stdin>' if from_stdin else file_path}")
         
         # Tạo signer
         signer = RSASigner()
         
-        # Ký và lưu file
-        signature_path = signer.sign_and_save(
-            file_path, private_key, signature, key_password, format_type
-        )
+        # Hash trước (stdin chỉ đọc được một lần), rồi ký qua signing agent nếu có
+        # (không cần nhập mật khẩu, không giải mã lại khóa)
+        if from_stdin:
+            if hash_mode == HASH_MODE_TREE:
+                raise click.UsageError("stdin không hỗ trợ --hash sha256-tree-v1")
+            file_hash = hash_stream(click.open_file('-', 'rb'), hash_mode=hash_mode)
+        else:
+            file_hash = hash_file_mode(file_path, hash_mode)
+        signed = sign_with_agent(file_hash, private_key, mode, hash_mode,
+                                 with_fingerprint=use_envelope)
+        
+        if signed is None:
+            # Lấy mật khẩu nếu cần
+            key_password = None
+            if password:
+                key_password = getpass.getpass("Nhập mật khẩu khóa riêng: ")
+            
+            context = signer.signing_context(private_key, key_password, mode, hash_mode)
+            signed = (context.sign_digest(file_hash),
+                      public_key_fingerprint(context.public_key) if use_envelope else None)
+        file_signature, fingerprint = signed
+        
+        if use_envelope:
+            # Timestamp nằm ngay trong envelope, không cần file .timestamp.json riêng
+            file_signature = SignatureEnvelope(
+                file_signature, fingerprint, mode, hash_mode,
+                int(time.time()) if timestamp else None
+            )
         
-        click.echo(f"✓ Đã ký file thành công:")
-        click.echo(f"  - File gốc: {file_path}")
-        click.echo(f"  - Chữ ký: {signature_path}")
+        if to_stdout:
+            write_signature_stdout(file_signature, format_type)
+            if timestamp and not use_envelope:
+                info("Bỏ qua --timestamp khi chữ ký ghi ra stdout")
+            return
         
-        # Tạo timestamp nếu cần
-        if timestamp:
+        # Lưu chữ ký
+        signature_path = signature or signer.default_signature_path(file_path, format_type)
+        signer.save_signature(file_signature, signature_path, format_type)
+        
+        info(f"✓ Đã ký file thành công:")
+        info(f"  - File gốc: {file_path}")
+        info(f"  - Chữ ký: {signature_path}")
+        
+        # Tạo timestamp nếu cần; khi có TSA cục bộ, lấy token Merkle lưu cạnh chữ ký
+        if timestamp and os.environ.get(TSA_SOCKET_ENV):
+            raw_signature = file_signature.signature if use_envelope else file_signature
+            with TimestampClient() as client:
+                token = client.timestamp(signature_digest(raw_signature))
+            token_path = f"{signature_path}.tst"
+            TimestampService.save_token(token, token_path)
+            info(f"  - Token timestamp: {token_path} ({token.isoformat()})")
+        elif timestamp and use_envelope:
+            info(f"  - Timestamp: {format_timestamp(file_signature.timestamp)}")
+        elif timestamp:
             timestamp_data = TimestampService.create_timestamp()
             timestamp_path = Path(signature_path).with_suffix('.timestamp.json')
             TimestampService.save_timestamp(timestamp_data, str(timestamp_path))
-            click.echo(f"  - Timestamp: {timestamp_path}")
+            info(f"  - Timestamp: {timestamp_path}")
         
     except Exception as e:
         click.echo(f"Lỗi: {str(e)}", err=True)
 
+def format_timestamp(unix_time):
+    """Thời điểm ký trong envelope dạng ISO 8601 (UTC)"""
+    from datetime import datetime, timezone
+    return datetime.fromtimestamp(unix_time, timezone.utc).isoformat()
+
 @cli.command()
 @click.argument('file_path')
 @click.argument('signature_path')
-@click.option('--public-key', required=True, help='Đường dẫn khóa công khai')
-@click.option('--timestamp', help='Đường dẫn file timestamp (tùy chọn)')
-def verify(file_path, signature_path, public_key, timestamp):
-    """Xác minh chữ ký file"""
+@click.option('--public-key', help='Đường dẫn khóa công khai')
+@click.option('--trust-store', type=click.Path(exists=True, file_okay=False),
+              help='Thư mục khóa công khai tin cậy (thay cho --public-key)')
+@click.option('--key-id', help='Key ID (hoặc tiền tố) của khóa đã ký khi dùng --trust-store')
+@click.option('--timestamp', help='Đường dẫn file timestamp (tùy chọn; .json hoặc token .tst của TSA)')
+@click.option('--tsa-public-key', help='Khóa công khai của TSA để kiểm tra token .tst')
+@click.option('--mode', default=SIGNATURE_MODE_LEGACY, show_default=True,
+              type=click.Choice(SIGNATURE_MODES), help='Chế độ chữ ký')
+@click.option('--hash', '--hash-mode', 'hash_mode', default=HASH_MODE_SHA256, show_default=True,
+              type=click.Choice(HASH_MODES), help='Thuật toán hash đã dùng khi ký (chữ ký .sig / .b64)')
+def verify(file_path, signature_path, public_key, trust_store, key_id, timestamp, tsa_public_key,
+           mode, hash_mode):
+    """
+    Xác minh chữ ký file (FILE_PATH là "-" để đọc từ stdin)
+    
+    Chữ ký dạng envelope tự mang key ID, chế độ chữ ký, chế độ hash và timestamp;
+    --mode / --hash chỉ dùng cho chữ ký .sig / .b64 cũ.
+    """
+    from .context import VerificationResult, VerifyFailure
+    from .timestamp import TimestampService
+    from .truststore import TrustStore
+    from .utils import hash_stream
+    from .verifier import RSAVerifier, SignatureEncodingError
     try:
-        click.echo(f"Đang xác minh chữ ký cho file: {file_path}")
+        if not public_key and not trust_store:
+            raise click.UsageError("Cần --public-key hoặc --trust-store")
+        
+        click.echo(f"Đang xác minh chữ ký cho file: {'<stdin>' if file_path == '-' else file_path}")
         
         # Tạo verifier
         verifier = RSAVerifier()
         
+        # Đọc chữ ký một lần; định dạng nhận biết theo nội dung
+        try:
+            file_signature, envelope = verifier.read_signature(signature_path)
+        except SignatureEncodingError:
+            file_signature, envelope = None, None
+        if envelope is not None:
+            mode, hash_mode = envelope.mode, envelope.hash_mode
+        if file_path == '-' and hash_mode == HASH_MODE_TREE:
+            raise click.UsageError("stdin không hỗ trợ --hash sha256-tree-v1")
+        
         # Xác minh chữ ký
-        is_valid = verifier.verify_file(file_path, signature_path, public_key)
+        if file_signature is None:
+            is_valid = VerificationResult(False, VerifyFailure.SIGNATURE_ENCODING)
+        elif trust_store:
+            store = TrustStore.from_directory(trust_store, mode=mode, hash_mode=hash_mode)
+            # Envelope tự mang key ID: trust store chỉ thử đúng khóa đó
+            signed = envelope or file_signature
+            if file_path == '-':
+                digest = hash_stream(click.open_file('-', 'rb'), hash_mode=hash_mode)
+                fingerprint = store.verify_digest_any(digest, signed, key_id)
+            else:
+                fingerprint = store.verify_any(file_path, signed, key_id)
+            is_valid = fingerprint is not None
+            if is_valid:
+                click.echo(f"  - Khóa ký: {fingerprint}")
+        elif file_path == '-':
+            is_valid = verifier.verify_stream(
+                click.open_file('-', 'rb'),
+                file_signature,
+                public_key,
+                mode,
+                hash_mode
+            )
+        else:
+            is_valid = verifier.verify_signature_detailed(file_path, file_signature,
+                                                          public_key, mode, envelope, hash_mode)
         
         if is_valid:
             click.echo("✓ Chữ ký hợp lệ - File chưa bị thay đổi")
             
             # Hiển thị thông tin timestamp nếu có
-            if timestamp and Path(timestamp).exists():
+            if envelope is not None and envelope.timestamp:
+                click.echo(f"  - Thời gian ký: {format_timestamp(envelope.timestamp)}")
+            elif timestamp and timestamp.endswith('.tst') and Path(timestamp).exists():
+                token = TimestampService.load_token(timestamp)
+                status = ''
+                if tsa_public_key:
+                    from .key_manager import RSAKeyManager
+                    tsa_key = RSAKeyManager().load_public_key(tsa_public_key)
+                    token_valid = TimestampService.verify_token(token, file_signature, tsa_key)
+                    status = ' (token hợp lệ)' if token_valid else ' (token KHÔNG hợp lệ)'
+                click.echo(f"  - Thời gian ký: {token.isoformat()}{status}")
+            elif timestamp and Path(timestamp).exists():
                 timestamp_data = TimestampService.load_timestamp(timestamp)
                 click.echo(f"  - Thời gian ký: {timestamp_data.get('timestamp', 'N/A')}")
             
         else:
             click.echo("✗ Chữ ký không hợp lệ - File có thể đã bị thay đổi", err=True)
+            reason = getattr(is_valid, 'reason', None)
+            if reason is not None:
+                click.echo(f"  - Lý do: {reason.value}", err=True)
+        
+    except Exception as e:
+        click.echo(f"Lỗi: {str(e)}", err=True)
+
+@cli.command()
+@click.option('--private-key', 'private_keys', multiple=True, required=True,
+              help='Khóa riêng cần nạp vào agent (có thể lặp lại)')
+@click.option('--password', is_flag=True, help='Khóa riêng có mật khẩu (hỏi một lần cho mỗi khóa)')
+@click.option('--socket', 'socket_path', help='Đường dẫn Unix socket (mặc định trong thư mục tạm)')
+@click.option('--idle-ttl', default=3600.0, show_default=True,
+              help='Xóa khóa và dừng agent sau số giây không hoạt động (0 = không giới hạn)')
+def agent(private_keys, password, socket_path, idle_ttl):
+    """Chạy signing agent giữ khóa đã mở khóa (tương tự ssh-agent)"""
+    import tempfile
+    from .agent import AGENT_SOCKET_ENV, SigningAgent
+    try:
+        signing_agent = SigningAgent(idle_ttl=idle_ttl or None)
+        for private_key in private_keys:
+            key_password = None
+            if password:
+                key_password = getpass.getpass(f"Nhập mật khẩu cho {private_key}: ")
+            fingerprint = signing_agent.add_key(private_key, key_password)
+            click.echo(f"✓ Đã nạp khóa {fingerprint[:16]} ({private_key})", err=True)
+        
+        if not socket_path:
+            socket_path = Path(tempfile.mkdtemp(prefix='rsa-signature-')) / 'agent.sock'
+        
+        # In lệnh export để shell dùng (tương tự ssh-agent)
+        click.echo(f"export {AGENT_SOCKET_ENV}={socket_path}")
+        signing_agent.serve_forever(socket_path)
+        
+    except Exception as e:
+        click.echo(f"Lỗi: {str(e)}", err=True)
+
+@cli.command()
+@click.option('--private-key', required=True, help='Khóa riêng của TSA (ký gốc Merkle mỗi lô)')
+@click.option('--password', is_flag=True, help='Khóa riêng có mật khẩu')
+@click.option('--socket', 'socket_path', help='Đường dẫn Unix socket (mặc định trong thư mục tạm)')
+@click.option('--window', default=0.01, show_default=True, type=click.FloatRange(min=0),
+              help='Thời gian gom digest vào một lô (giây)')
+@click.option('--max-batch', default=65536, show_default=True, type=click.IntRange(min=1),
+              help='Số digest tối đa mỗi lô')
+def tsa(private_key, password, socket_path, window, max_batch):
+    """Chạy timestamp authority cục bộ: timestamp chữ ký theo lô Merkle, một phép ký mỗi lô"""
+    import tempfile
+    from .tsa import TSA_SOCKET_ENV, TimestampAuthority
+    try:
+        key_password = getpass.getpass("Nhập mật khẩu khóa riêng: ") if password else None
+        authority = TimestampAuthority.from_key_file(private_key, key_password,
+                                                     window=window, max_batch=max_batch)
+        
+        if not socket_path:
+            socket_path = Path(tempfile.mkdtemp(prefix='rsa-signature-')) / 'tsa.sock'
+        
+        click.echo(f"export {TSA_SOCKET_ENV}={socket_path}")
+        authority.serve_forever(socket_path)
+        
+    except Exception as e:
+        click.echo(f"Lỗi: {str(e)}", err=True)
+
+@cli.command('verify-batch')
+@click.argument('list_path')
+@click.option('--public-key', help='Khóa công khai mặc định cho các dòng không ghi public_key')
+@click.option('--input-format', type=click.Choice(BATCH_FORMATS),
+              help='Định dạng danh sách (mặc định đoán theo phần mở rộng)')
+@click.option('--output', default='-', show_default=True, help='File báo cáo ("-" là stdout)')
+@click.option('--format', 'output_format', default='jsonl', show_default=True,
+              type=click.Choice(BATCH_FORMATS), help='Định dạng báo cáo')
+@click.option('--jobs', type=click.IntRange(min=1), help='Số luồng xác minh song song')
+@click.option('--mode', default=SIGNATURE_MODE_LEGACY, show_default=True,
+              type=click.Choice(SIGNATURE_MODES), help='Chế độ chữ ký')
+@click.option('--hash', '--hash-mode', 'hash_mode', default=HASH_MODE_SHA256, show_default=True,
+              type=click.Choice(HASH_MODES), help='Thuật toán hash đã dùng khi ký (chữ ký .sig / .b64)')
+@click.option('--digest-cache', type=click.Path(dir_okay=False),
+              help='File SQLite cache digest (bỏ qua hash lại file không đổi)')
+@click.option('--verify-cache', type=click.Path(dir_okay=False),
+              help='File SQLite cache kết quả xác minh hợp lệ (bỏ qua kiểm tra RSA lặp lại)')
+@click.option('--cache-ttl', default=86400.0, show_default=True, type=click.FloatRange(min=0),
+              help='Thời gian sống (giây) của kết quả trong --verify-cache')
+def verify_batch(list_path, public_key, input_format, output, output_format, jobs, mode,
+                 hash_mode, digest_cache, verify_cache, cache_ttl):
+    """Xác minh hàng loạt (file, chữ ký, khóa) từ danh sách JSON Lines/CSV (LIST_PATH "-" là stdin)
+    
+    Mã thoát: 0 mọi chữ ký hợp lệ, 1 có chữ ký không hợp lệ, 2 có lỗi.
+    """
+    from .batch import EXIT_ERROR, ReportWriter, detect_batch_format, iter_batch_items
+    from .digest_cache import DigestCache
+    from .verifier import RSAVerifier
+    from .verify_cache import VerifyCache
+    digests = DigestCache(digest_cache) if digest_cache else None
+    results = VerifyCache(verify_cache, ttl=cache_ttl) if verify_cache else None
+    try:
+        input_format = input_format or detect_batch_format(list_path)
+        # Đường dẫn tương đối trong danh sách tính từ thư mục chứa danh sách
+        base_dir = None if list_path == '-' else Path(list_path).resolve().parent
+        
+        with click.open_file(list_path, 'r', encoding='utf-8') as list_stream, \
+                click.open_file(output, 'w', encoding='utf-8') as report_stream:
+            writer = ReportWriter(report_stream, output_format)
+            # Dòng sai định dạng được ghi thành kết quả lỗi trong báo cáo, lô vẫn chạy tiếp
+            items = iter_batch_items(list_stream, input_format, base_dir, public_key,
+                                     on_invalid=writer.write)
+            verifier = RSAVerifier(digest_cache=digests, verify_cache=results)
+            for result in verifier.verify_many(items, jobs=jobs, mode=mode, hash_mode=hash_mode):
+                writer.write(result)
+        
+        counts = writer.counts
+        click.echo(f"Hợp lệ: {counts['valid']}, không hợp lệ: {counts['invalid']}, "
+                   f"lỗi: {counts['error']}", err=True)
+        if results is not None:
+            stats = results.stats()
+            click.echo(f"Cache xác minh: {stats['hits']} hit, {stats['misses']} miss", err=True)
+        exit_code = writer.exit_code
+        
+    except Exception as e:
+        click.echo(f"Lỗi: {str(e)}", err=True)
+        exit_code = EXIT_ERROR
+    finally:
+        for cache in (digests, results):
+            if cache is not None:
+                cache.close()
+    
+    raise SystemExit(exit_code)
+
+@cli.command('sign-tree')
+@click.argument('directory', type=click.Path(exists=True, file_okay=False))
+@click.option('--private-key', required=True, help='Đường dẫn khóa riêng')
+@click.option('--password', is_flag=True, help='Khóa riêng có mật khẩu')
+@click.option('--output', help='Đường dẫn lưu manifest (mặc định <thư mục>.manifest.json)')
+@click.option('--jobs', type=click.IntRange(min=1), help='Số luồng hash song song')
+@click.option('--digest-cache', is_flag=True,
+              help='Dùng cache digest (<thư mục>.digests.sqlite3), chỉ hash lại file đã thay đổi')
+@click.option('--strict', is_flag=True, help='Bỏ qua cache, hash lại mọi file (vẫn cập nhật cache)')
+def sign_tree(directory, private_key, password, output, jobs, digest_cache, strict):
+    """Ký cả thư mục bằng một chữ ký trên gốc cây Merkle"""
+    from .digest_cache import DigestCache
+    from .manifest import TreeSigner
+    try:
+        key_password = None
+        if password:
+            key_password = getpass.getpass("Nhập mật khẩu khóa riêng: ")
+        
+        output = output or str(TreeSigner.default_manifest_path(directory))
+        cache = DigestCache.for_directory(directory, strict) if digest_cache else None
+        tree_signer = TreeSigner(digest_cache=cache)
+        try:
+            manifest = tree_signer.sign_tree(directory, private_key, key_password,
+                                             jobs=jobs, exclude=[output])
+            if cache is not None:
+                cache.evict_missing()
+                stats = cache.stats()
+                click.echo(f"  - Digest cache: {stats['hits']} file không đổi, "
+                           f"{stats['misses']} file đã hash lại")
+        finally:
+            if cache is not None:
+                cache.close()
+        tree_signer.save_manifest(manifest, output)
+        
+        click.echo(f"✓ Đã ký {len(manifest['files'])} file")
+        click.echo(f"  - Gốc Merkle: {manifest['root']}")
+        click.echo(f"  - Manifest: {output}")
+        
+    except Exception as e:
+        click.echo(f"Lỗi: {str(e)}", err=True)
+
+@cli.command('verify-tree')
+@click.argument('directory', type=click.Path(exists=True, file_okay=False))
+@click.argument('manifest_path', type=click.Path(exists=True, dir_okay=False))
+@click.option('--public-key', required=True, help='Đường dẫn khóa công khai')
+@click.option('--file', 'relative_path',
+              help='Chỉ xác minh một file (đường dẫn tương đối) bằng bằng chứng Merkle')
+@click.option('--jobs', type=click.IntRange(min=1), help='Số luồng hash song song')
+@click.option('--digest-cache', is_flag=True,
+              help='Dùng cache digest (<thư mục>.digests.sqlite3) cho file không đổi')
+def verify_tree(directory, manifest_path, public_key, relative_path, jobs, digest_cache):
+    """Xác minh thư mục (hoặc một file) với manifest đã ký"""
+    from .digest_cache import DigestCache
+    from .manifest import TreeSigner
+    cache = DigestCache.for_directory(directory) if digest_cache else None
+    try:
+        tree_signer = TreeSigner(digest_cache=cache)
+        manifest = tree_signer.load_manifest(manifest_path)
+        
+        if relative_path:
+            is_valid = tree_signer.verify_file(Path(directory) / relative_path, relative_path,
+                                               manifest, public_key)
+            if is_valid:
+                click.echo(f"✓ File hợp lệ: {relative_path}")
+            else:
+                click.echo(f"✗ File không khớp manifest: {relative_path}", err=True)
+            return
+        
+        report = tree_signer.verify_tree(directory, manifest, public_key, jobs=jobs,
+                                         exclude=[manifest_path])
+        if report['valid']:
+            click.echo(f"✓ Thư mục hợp lệ - {len(manifest['files'])} file chưa bị thay đổi")
+        else:
+            click.echo("✗ Thư mục không khớp manifest", err=True)
+            if report.get('error'):
+                click.echo(f"  - {report['error']}", err=True)
+            for label in ('modified', 'missing', 'extra'):
+                for rel in report[label]:
+                    click.echo(f"  - {label}: {rel}", err=True)
         
     except Exception as e:
         click.echo(f"Lỗi: {str(e)}", err=True)
+    finally:
+        if cache is not None:
+            cache.close()
 
 if __name__ == '__main__':
     cli()
\ No newline at end of file
@@ -0,0 +1,36 @@
+"""
+Hằng số dùng chung (chế độ chữ ký, chế độ hash, định dạng file)
+
+Module không import gì để CLI dựng danh sách lựa chọn của tùy chọn mà không phải nạp
+cryptography; các module khác re-export từ đây nên đường import cũ vẫn dùng được.
+"""
+
+# Chế độ chữ ký (ghi kèm phiên bản để có thể mở rộng về sau)
+# v1: ký SHA-256(file) bằng RSA-PSS/SHA-256 (digest được hash thêm một lần) - mặc định
+# v2: ký trực tiếp SHA-256(file) bằng RSA-PSS với Prehashed (chỉ cần 32 byte digest)
+SIGNATURE_MODE_LEGACY = 'v1'
+SIGNATURE_MODE_PREHASHED = 'v2'
+SIGNATURE_MODES = (SIGNATURE_MODE_LEGACY, SIGNATURE_MODE_PREHASHED)
+DIGEST_SIZE = 32
+
+# Chế độ hash file (digest được ký); chế độ tree cho kết quả khác SHA-256 thường
+# sha256:         SHA-256 của toàn bộ nội dung - mặc định
+# sha256-tree-v1: SHA-256(tiền tố | chunk_size | file_size | SHA-256(chunk 0) | SHA-256(chunk 1) ...)
+#                 với các chunk cố định được hash song song trên nhiều lõi
+# sha512, sha3-256, sha3-512, blake2b: hash toàn bộ nội dung bằng thuật toán tương ứng
+#                 (SHA-512 / BLAKE2b nhanh hơn SHA-256 trên CPU 64-bit không có SHA-NI)
+HASH_MODE_SHA256 = 'sha256'
+HASH_MODE_TREE = 'sha256-tree-v1'
+HASH_MODE_SHA512 = 'sha512'
+HASH_MODE_SHA3_256 = 'sha3-256'
+HASH_MODE_SHA3_512 = 'sha3-512'
+HASH_MODE_BLAKE2B = 'blake2b'
+HASH_MODES = (HASH_MODE_SHA256, HASH_MODE_TREE, HASH_MODE_SHA512,
+              HASH_MODE_SHA3_256, HASH_MODE_SHA3_512, HASH_MODE_BLAKE2B)
+
+# Định dạng file chữ ký: 'binary' / 'base64' cũ và envelope (nhị phân / armored)
+ENVELOPE_FORMATS = ('envelope', 'armored')
+SIGNATURE_FORMATS = ('binary', 'base64') + ENVELOPE_FORMATS
+
+# Định dạng danh sách / báo cáo của verify-batch
+BATCH_FORMATS = ('jsonl', 'csv')
@@ -0,0 +1,280 @@
+"""
+Context ký / xác minh bất biến: gắn một khóa với cấu hình PSS dựng sẵn
+
+Các đối tượng không thay đổi sau khi tạo nên có thể dùng chung giữa nhiều luồng
+mà không cần khóa.
+"""
+
+from dataclasses import dataclass
+from enum import Enum
+from pathlib import Path
+from typing import Any, BinaryIO, Iterable, Optional, Union
+
+from cryptography.exceptions import InvalidSignature
+from cryptography.hazmat.primitives import hashes
+from cryptography.hazmat.primitives.asymmetric import padding, rsa
+from cryptography.hazmat.primitives.asymmetric.utils import Prehashed
+
+from .key_manager import RSAKeyManager, public_key_fingerprint
+from .utils import (get_logger, hash_file_mode, hash_bytes, hash_stream, digest_size,
+                    SIGNATURE_MODE_LEGACY, SIGNATURE_MODE_PREHASHED, HASH_MODES,
+                    HASH_MODE_SHA256, HASH_MODE_TREE, HASH_MODE_SHA512, HASH_MODE_SHA3_256,
+                    HASH_MODE_SHA3_512, HASH_MODE_BLAKE2B)
+
+logger = get_logger()
+
+# Thuật toán hash của RSA-PSS (và MGF1) theo chế độ hash file. OpenSSL không hỗ trợ
+# BLAKE2b cho chữ ký RSA nên digest BLAKE2b-512 được ký với PSS/SHA-512 (cùng độ dài 64 byte).
+_PSS_HASHES = {
+    HASH_MODE_SHA256: hashes.SHA256(),
+    HASH_MODE_TREE: hashes.SHA256(),
+    HASH_MODE_SHA512: hashes.SHA512(),
+    HASH_MODE_SHA3_256: hashes.SHA3_256(),
+    HASH_MODE_SHA3_512: hashes.SHA3_512(),
+    HASH_MODE_BLAKE2B: hashes.SHA512(),
+}
+
+# Cấu hình padding và thuật toán dựng một lần, dùng chung cho mọi phép ký/xác minh
+_PSS_PADDINGS = {
+    hash_mode: padding.PSS(mgf=padding.MGF1(algorithm), salt_length=padding.PSS.MAX_LENGTH)
+    for hash_mode, algorithm in _PSS_HASHES.items()
+}
+PSS_PADDING = _PSS_PADDINGS[HASH_MODE_SHA256]
+_SIGNATURE_ALGORITHMS = {
+    **{(SIGNATURE_MODE_LEGACY, hash_mode): algorithm
+       for hash_mode, algorithm in _PSS_HASHES.items()},
+    **{(SIGNATURE_MODE_PREHASHED, hash_mode): Prehashed(algorithm)
+       for hash_mode, algorithm in _PSS_HASHES.items()},
+}
+_DIGEST_SIZES = {hash_mode: digest_size(hash_mode) for hash_mode in HASH_MODES}
+
+
+def signature_algorithm(mode: str, hash_mode: str = HASH_MODE_SHA256):
+    """Thuật toán hash truyền cho sign/verify theo chế độ chữ ký và chế độ hash"""
+    try:
+        return _SIGNATURE_ALGORITHMS[mode, hash_mode]
+    except KeyError:
+        raise ValueError(f"Chế độ chữ ký không hỗ trợ: {mode}/{hash_mode}")
+
+
+def pss_padding(hash_mode: str = HASH_MODE_SHA256) -> padding.PSS:
+    """Padding RSA-PSS (MGF1 cùng thuật toán hash) theo chế độ hash"""
+    try:
+        return _PSS_PADDINGS[hash_mode]
+    except KeyError:
+        raise ValueError(f"Chế độ hash không hỗ trợ: {hash_mode}")
+
+
+def check_digest(digest: bytes, hash_mode: str = HASH_MODE_SHA256) -> None:
+    """Kiểm tra độ dài digest theo chế độ hash"""
+    size = _DIGEST_SIZES[hash_mode]
+    if len(digest) != size:
+        raise ValueError(f"Digest {hash_mode} phải dài {size} byte")
+
+
+class VerifyFailure(str, Enum):
+    """Lý do xác minh thất bại (các lỗi kiểm tra sơ bộ không cần đọc file)"""
+    SIGNATURE_ENCODING = 'signature_encoding'   # file chữ ký không giải mã được
+    SIGNATURE_LENGTH = 'signature_length'       # độ dài khác kích thước modulus
+    SIGNATURE_RANGE = 'signature_range'         # giá trị chữ ký >= modulus
+    SIGNATURE_MISMATCH = 'signature_mismatch'   # phép kiểm tra RSA-PSS thất bại
+    KEY_MISMATCH = 'key_mismatch'               # envelope ghi fingerprint của khóa khác
+    INVALID_ITEM = 'invalid_item'               # dòng danh sách xác minh hàng loạt sai định dạng
+
+
+@dataclass(frozen=True)
+class VerificationResult:
+    """Kết quả xác minh kèm lý do khi thất bại; dùng được như bool"""
+    valid: bool
+    reason: Optional[VerifyFailure] = None
+
+    def __bool__(self) -> bool:
+        return self.valid
+
+
+VALID_RESULT = VerificationResult(True)
+
+
+class _FrozenContext:
+    """Cơ sở cho context bất biến (__slots__, không cho gán lại thuộc tính)"""
+
+    __slots__ = ()
+
+    def _freeze(self, **values: Any) -> None:
+        for name, value in values.items():
+            object.__setattr__(self, name, value)
+
+    def __setattr__(self, name: str, value: Any) -> None:
+        raise AttributeError(f"{type(self).__name__} là bất biến")
+
+    def __delattr__(self, name: str) -> None:
+        raise AttributeError(f"{type(self).__name__} là bất biến")
+
+
+class SigningContext(_FrozenContext):
+    """Khóa riêng + chế độ chữ ký đã gắn sẵn, an toàn khi dùng chung giữa các luồng"""
+
+    __slots__ = ('private_key', 'mode', 'hash_mode', 'key_id', '_algorithm', '_padding')
+
+    def __init__(self, private_key: rsa.RSAPrivateKey,
+                 mode: str = SIGNATURE_MODE_LEGACY,
+                 hash_mode: str = HASH_MODE_SHA256):
+        """
+        Khởi tạo Signing Context
+
+        Args:
+            private_key: Khóa riêng RSA
+            mode: Chế độ chữ ký ('v1' mặc định, 'v2' dùng Prehashed)
+            hash_mode: Chế độ hash của digest được ký ('sha256' mặc định)
+        """
+        self._freeze(private_key=private_key, mode=mode, hash_mode=hash_mode,
+                     key_id=public_key_fingerprint(private_key.public_key()),
+                     _algorithm=signature_algorithm(mode, hash_mode),
+                     _padding=pss_padding(hash_mode))
+
+    @classmethod
+    def from_file(cls, private_key_path: Union[str, Path],
+                  password: Optional[str] = None,
+                  mode: str = SIGNATURE_MODE_LEGACY,
+                  key_manager: Optional[RSAKeyManager] = None,
+                  hash_mode: str = HASH_MODE_SHA256) -> "SigningContext":
+        """Tạo context từ file khóa riêng (qua key manager, dùng cache khóa nếu có)"""
+        key_manager = key_manager or RSAKeyManager()
+        return cls(key_manager.load_private_key(str(private_key_path), password), mode, hash_mode)
+
+    @property
+    def public_key(self) -> rsa.RSAPublicKey:
+        return self.private_key.public_key()
+
+    def verification_context(self) -> "VerificationContext":
+        """Context xác minh tương ứng (cùng khóa công khai, chế độ chữ ký và chế độ hash)"""
+        return VerificationContext(self.public_key, self.mode, self.hash_mode)
+
+    def sign_digest(self, digest: bytes) -> bytes:
+        """
+        Ký digest đã tính
+
+        Args:
+            digest: Digest theo chế độ hash của context (32 byte với SHA-256)
+
+        Returns:
+            Chữ ký
+        """
+        check_digest(digest, self.hash_mode)
+        return self.private_key.sign(bytes(digest), self._padding, self._algorithm)
+
+    def sign_file(self, file_path: Union[str, Path]) -> bytes:
+        """Hash và ký file"""
+        return self.sign_digest(hash_file_mode(file_path, self.hash_mode))
+
+    def sign_bytes(self, data: Union[bytes, bytearray, memoryview]) -> bytes:
+        """Ký dữ liệu trong bộ nhớ"""
+        return self.sign_digest(hash_bytes(data, self.hash_mode))
+
+    def sign_stream(self, stream: Union[BinaryIO, Iterable[bytes]]) -> bytes:
+        """Ký dữ liệu đọc dần từ stream"""
+        return self.sign_digest(hash_stream(stream, hash_mode=self.hash_mode))
+
+    def __repr__(self) -> str:
+        return (f"SigningContext(key_size={self.private_key.key_size}, mode={self.mode!r}, "
+                f"hash_mode={self.hash_mode!r})")
+
+
+class VerificationContext(_FrozenContext):
+    """Khóa công khai + chế độ chữ ký đã gắn sẵn, an toàn khi dùng chung giữa các luồng"""
+
+    __slots__ = ('public_key', 'mode', 'hash_mode', 'key_id', '_algorithm', '_padding',
+                 '_modulus', '_signature_size')
+
+    def __init__(self, public_key: rsa.RSAPublicKey,
+                 mode: str = SIGNATURE_MODE_LEGACY,
+                 hash_mode: str = HASH_MODE_SHA256):
+        """
+        Khởi tạo Verification Context
+
+        Args:
+            public_key: Khóa công khai RSA
+            mode: Chế độ chữ ký ('v1' mặc định, 'v2' dùng Prehashed)
+            hash_mode: Chế độ hash của digest đã ký ('sha256' mặc định)
+        """
+        modulus = public_key.public_numbers().n
+        self._freeze(public_key=public_key, mode=mode, hash_mode=hash_mode,
+                     key_id=public_key_fingerprint(public_key),
+                     _algorithm=signature_algorithm(mode, hash_mode),
+                     _padding=pss_padding(hash_mode),
+                     _modulus=modulus,
+                     _signature_size=(public_key.key_size + 7) // 8)
+
+    def with_mode(self, mode: str, hash_mode: Optional[str] = None) -> "VerificationContext":
+        """Context cùng khóa với chế độ chữ ký / chế độ hash khác (trả về chính nó nếu không đổi)"""
+        hash_mode = hash_mode or self.hash_mode
+        if mode == self.mode and hash_mode == self.hash_mode:
+            return self
+        return VerificationContext(self.public_key, mode, hash_mode)
+
+    @classmethod
+    def from_file(cls, public_key_path: Union[str, Path],
+                  mode: str = SIGNATURE_MODE_LEGACY,
+                  key_manager: Optional[RSAKeyManager] = None,
+                  hash_mode: str = HASH_MODE_SHA256) -> "VerificationContext":
+        """Tạo context từ file khóa công khai (qua key manager, dùng cache khóa nếu có)"""
+        key_manager = key_manager or RSAKeyManager()
+        return cls(key_manager.load_public_key(str(public_key_path)), mode, hash_mode)
+
+    def precheck(self, signature: bytes) -> Optional[VerifyFailure]:
+        """
+        Kiểm tra sơ bộ chữ ký (độ dài, miền giá trị) trước khi đọc dữ liệu
+
+        Returns:
+            Lý do thất bại, hoặc None nếu chữ ký có thể hợp lệ
+        """
+        if len(signature) != self._signature_size:
+            return VerifyFailure.SIGNATURE_LENGTH
+        if int.from_bytes(signature, 'big') >= self._modulus:
+            return VerifyFailure.SIGNATURE_RANGE
+        return None
+
+    def verify_digest_detailed(self, signature: bytes, digest: bytes) -> VerificationResult:
+        """
+        Xác minh chữ ký trên digest đã tính, trả về lý do nếu thất bại
+        """
+        check_digest(digest, self.hash_mode)
+        failure = self.precheck(signature)
+        if failure is not None:
+            logger.warning("Chữ ký không hợp lệ: %s", failure.value)
+            return VerificationResult(False, failure)
+        try:
+            self.public_key.verify(signature, bytes(digest), self._padding, self._algorithm)
+            logger.info("Chữ ký hợp lệ")
+            return VALID_RESULT
+        except InvalidSignature:
+            logger.warning("Chữ ký không hợp lệ")
+            return VerificationResult(False, VerifyFailure.SIGNATURE_MISMATCH)
+
+    def verify_digest(self, signature: bytes, digest: bytes) -> bool:
+        """
+        Xác minh chữ ký trên digest đã tính
+
+        Returns:
+            True nếu chữ ký hợp lệ, False nếu không
+        """
+        return self.verify_digest_detailed(signature, digest).valid
+
+    def verify_file(self, signature: bytes, file_path: Union[str, Path]) -> bool:
+        """Xác minh chữ ký của file (không đọc file nếu chữ ký sai định dạng)"""
+        return (self.precheck(signature) is None
+                and self.verify_digest(signature, hash_file_mode(file_path, self.hash_mode)))
+
+    def verify_bytes(self, signature: bytes, data: Union[bytes, bytearray, memoryview]) -> bool:
+        """Xác minh chữ ký của dữ liệu trong bộ nhớ"""
+        return (self.precheck(signature) is None
+                and self.verify_digest(signature, hash_bytes(data, self.hash_mode)))
+
+    def verify_stream(self, signature: bytes, stream: Union[BinaryIO, Iterable[bytes]]) -> bool:
+        """Xác minh chữ ký của dữ liệu đọc dần từ stream (không đọc stream nếu chữ ký sai định dạng)"""
+        return (self.precheck(signature) is None
+                and self.verify_digest(signature, hash_stream(stream, hash_mode=self.hash_mode)))
+
+    def __repr__(self) -> str:
+        return (f"VerificationContext(key_size={self.public_key.key_size}, mode={self.mode!r}, "
+                f"hash_mode={self.hash_mode!r})")
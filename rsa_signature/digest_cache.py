@@ -0,0 +1,195 @@
+"""
+Cache SHA-256 digest của file trên đĩa (SQLite), khóa theo (đường dẫn, inode, kích thước, mtime)
+
+Dùng khi ký lại / xác minh lại cây thư mục lớn: file không đổi không cần hash lại.
+"""
+
+import os
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Any, Dict, Optional, Union
+
+from .utils import get_logger, hash_file
+
+logger = get_logger()
+
+# Entry có mtime quá gần thời điểm hash bị coi là "racy" (file có thể đã đổi trong
+# cùng một tick mtime) và sẽ được hash lại
+RACY_WINDOW_NS = 2_000_000_000
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS digests (
+    path         TEXT PRIMARY KEY,
+    inode        INTEGER NOT NULL,
+    size         INTEGER NOT NULL,
+    mtime_ns     INTEGER NOT NULL,
+    digest       BLOB NOT NULL,
+    hashed_at_ns INTEGER NOT NULL
+)
+"""
+
+
+class DigestCache:
+    """Cache digest bền vững; strict=True bỏ qua cache khi đọc (luôn hash lại)"""
+
+    SUFFIX = '.digests.sqlite3'
+    COMMIT_EVERY = 256
+
+    def __init__(self, db_path: Union[str, Path], strict: bool = False):
+        """
+        Khởi tạo Digest Cache
+
+        Args:
+            db_path: Đường dẫn file SQLite của cache
+            strict: Không dùng digest đã cache (vẫn cập nhật cache sau khi hash)
+        """
+        self.db_path = Path(db_path)
+        self.strict = strict
+        self.hits = 0
+        self.misses = 0
+        self._pending = 0
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(str(self.db_path), check_same_thread=False)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        with self._db:
+            self._db.execute(_SCHEMA)
+
+    @classmethod
+    def for_directory(cls, directory: Union[str, Path], strict: bool = False) -> "DigestCache":
+        """Mở cache mặc định nằm cạnh thư mục: <thư mục>.digests.sqlite3"""
+        directory = Path(directory).resolve()
+        return cls(directory.with_name(directory.name + cls.SUFFIX), strict)
+
+    @staticmethod
+    def _cache_key(file_path: Union[str, Path]) -> str:
+        return os.path.abspath(file_path)
+
+    def get(self, file_path: Union[str, Path],
+            stat: Optional[os.stat_result] = None) -> Optional[bytes]:
+        """
+        Lấy digest đã cache nếu file chưa thay đổi
+
+        Args:
+            file_path: Đường dẫn file
+            stat: Kết quả os.stat của file (tùy chọn, tránh stat lại)
+
+        Returns:
+            Digest hoặc None nếu không có / đã cũ / đang ở chế độ strict
+        """
+        if self.strict:
+            return None
+        stat = stat or os.stat(file_path)
+        with self._lock:
+            row = self._db.execute(
+                "SELECT inode, size, mtime_ns, digest, hashed_at_ns FROM digests WHERE path = ?",
+                (self._cache_key(file_path),)
+            ).fetchone()
+        if row is None:
+            return None
+        inode, size, mtime_ns, digest, hashed_at_ns = row
+        if (inode, size, mtime_ns) != (stat.st_ino, stat.st_size, stat.st_mtime_ns):
+            return None
+        if mtime_ns >= hashed_at_ns - RACY_WINDOW_NS:
+            return None
+        return bytes(digest)
+
+    def put(self, file_path: Union[str, Path], digest: bytes,
+            stat: os.stat_result, hashed_at_ns: Optional[int] = None) -> None:
+        """Ghi digest của file (stat là kết quả os.stat trước khi hash)"""
+        with self._lock:
+            self._db.execute(
+                "INSERT OR REPLACE INTO digests VALUES (?, ?, ?, ?, ?, ?)",
+                (self._cache_key(file_path), stat.st_ino, stat.st_size,
+                 stat.st_mtime_ns, digest, hashed_at_ns or time.time_ns())
+            )
+            self._pending += 1
+            if self._pending >= self.COMMIT_EVERY:
+                self._db.commit()
+                self._pending = 0
+
+    def digest(self, file_path: Union[str, Path]) -> bytes:
+        """
+        SHA-256 digest của file, dùng cache nếu file chưa thay đổi
+
+        Args:
+            file_path: Đường dẫn file
+
+        Returns:
+            Digest SHA-256
+        """
+        before = os.stat(file_path)
+        cached = self.get(file_path, before)
+        # Cache được dùng chung giữa các luồng hash: bộ đếm cập nhật dưới lock
+        with self._lock:
+            if cached is not None:
+                self.hits += 1
+                return cached
+            self.misses += 1
+
+        hashed_at_ns = time.time_ns()
+        digest = hash_file(file_path)
+        after = os.stat(file_path)
+        # Chỉ cache khi file không đổi trong lúc hash
+        if (before.st_ino, before.st_size, before.st_mtime_ns) == \
+                (after.st_ino, after.st_size, after.st_mtime_ns):
+            self.put(file_path, digest, before, hashed_at_ns)
+        return digest
+
+    def evict_missing(self) -> int:
+        """
+        Xóa entry của các file không còn tồn tại
+
+        Returns:
+            Số entry đã xóa
+        """
+        with self._lock:
+            paths = [row[0] for row in self._db.execute("SELECT path FROM digests")]
+            missing = [(path,) for path in paths if not os.path.isfile(path)]
+            with self._db:
+                self._db.executemany("DELETE FROM digests WHERE path = ?", missing)
+            self._pending = 0
+        if missing:
+            logger.info("Đã xóa %s digest của file không còn tồn tại", len(missing))
+        return len(missing)
+
+    def invalidate(self, file_path: Optional[Union[str, Path]] = None) -> None:
+        """Xóa entry của một file, hoặc toàn bộ cache nếu không chỉ định"""
+        with self._lock, self._db:
+            if file_path is None:
+                self._db.execute("DELETE FROM digests")
+            else:
+                self._db.execute("DELETE FROM digests WHERE path = ?",
+                                 (self._cache_key(file_path),))
+            self._pending = 0
+
+    def flush(self) -> None:
+        """Ghi các entry đang chờ xuống đĩa"""
+        with self._lock:
+            self._db.commit()
+            self._pending = 0
+
+    def stats(self) -> Dict[str, Any]:
+        """Thống kê hit/miss và số entry"""
+        entries = len(self)
+        with self._lock:
+            return {'hits': self.hits, 'misses': self.misses, 'entries': entries,
+                    'strict': self.strict}
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._db.execute("SELECT COUNT(*) FROM digests").fetchone()[0]
+
+    def close(self) -> None:
+        """Ghi entry đang chờ và đóng cache"""
+        with self._lock:
+            self._db.commit()
+            self._db.close()
+
+    def __enter__(self) -> "DigestCache":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
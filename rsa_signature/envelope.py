@@ -0,0 +1,150 @@
+"""
+Envelope chữ ký nhị phân có phiên bản: gộp chữ ký, fingerprint khóa và timestamp vào một file
+
+Định dạng (big-endian):
+    magic 'RSIG' (4) | version (1) | hash (1) | mode (1) | fingerprint SHA-256 (32)
+    | timestamp unix giây (8, 0 nếu không có) | độ dài chữ ký (2) | chữ ký
+Dạng armored là base64 của envelope giữa hai dòng BEGIN/END (dùng được trong văn bản).
+"""
+
+import base64
+import binascii
+import re
+import struct
+import time
+from dataclasses import dataclass
+from typing import Optional, Union
+
+from cryptography.hazmat.primitives.asymmetric import rsa
+
+from .constants import ENVELOPE_FORMATS  # re-export (đường import cũ)
+from .key_manager import public_key_fingerprint
+from .utils import (SIGNATURE_MODE_LEGACY, SIGNATURE_MODE_PREHASHED,
+                    HASH_MODE_SHA256, HASH_MODE_TREE, HASH_MODE_SHA512, HASH_MODE_SHA3_256,
+                    HASH_MODE_SHA3_512, HASH_MODE_BLAKE2B)
+
+ENVELOPE_MAGIC = b'RSIG'
+ENVELOPE_VERSION = 1
+ARMOR_BEGIN = '-----BEGIN RSA SIGNATURE-----'
+ARMOR_END = '-----END RSA SIGNATURE-----'
+
+_HEADER = struct.Struct('>4sBBB32sqH')
+_HASH_IDS = {HASH_MODE_SHA256: 1, HASH_MODE_TREE: 2, HASH_MODE_SHA512: 3,
+             HASH_MODE_SHA3_256: 4, HASH_MODE_SHA3_512: 5, HASH_MODE_BLAKE2B: 6}
+_MODE_IDS = {SIGNATURE_MODE_LEGACY: 1, SIGNATURE_MODE_PREHASHED: 2}
+_HASH_NAMES = {value: name for name, value in _HASH_IDS.items()}
+_MODE_NAMES = {value: name for name, value in _MODE_IDS.items()}
+
+_BASE64_RE = re.compile(rb'[A-Za-z0-9+/=\s]+')
+
+
+class EnvelopeError(ValueError):
+    """Dữ liệu envelope sai định dạng"""
+
+
+@dataclass(frozen=True)
+class SignatureEnvelope:
+    """Chữ ký kèm siêu dữ liệu (fingerprint khóa, chế độ, timestamp)"""
+    signature: bytes
+    key_fingerprint: str
+    mode: str = SIGNATURE_MODE_LEGACY
+    hash_mode: str = HASH_MODE_SHA256
+    timestamp: Optional[int] = None
+
+    @classmethod
+    def create(cls, signature: bytes, public_key: rsa.RSAPublicKey,
+               mode: str = SIGNATURE_MODE_LEGACY,
+               hash_mode: str = HASH_MODE_SHA256,
+               timestamp: Union[bool, int, None] = False) -> "SignatureEnvelope":
+        """
+        Tạo envelope cho chữ ký vừa ký
+
+        Args:
+            signature: Chữ ký
+            public_key: Khóa công khai tương ứng khóa đã ký
+            mode: Chế độ chữ ký
+            hash_mode: Chế độ hash file
+            timestamp: True để ghi thời điểm hiện tại, hoặc unix time cụ thể
+        """
+        if timestamp is True:
+            timestamp = int(time.time())
+        return cls(signature=signature,
+                   key_fingerprint=public_key_fingerprint(public_key),
+                   mode=mode, hash_mode=hash_mode,
+                   timestamp=timestamp or None)
+
+    def to_bytes(self) -> bytes:
+        """Mã hóa envelope nhị phân"""
+        try:
+            header = _HEADER.pack(ENVELOPE_MAGIC, ENVELOPE_VERSION,
+                                  _HASH_IDS[self.hash_mode], _MODE_IDS[self.mode],
+                                  bytes.fromhex(self.key_fingerprint),
+                                  self.timestamp or 0, len(self.signature))
+        except (KeyError, ValueError, struct.error) as e:
+            raise EnvelopeError(f"Không thể tạo envelope: {str(e)}")
+        return header + self.signature
+
+    @classmethod
+    def from_bytes(cls, data: bytes) -> "SignatureEnvelope":
+        """
+        Giải mã envelope nhị phân (kiểm tra magic, phiên bản, mã thuật toán và độ dài)
+
+        Raises:
+            EnvelopeError: Dữ liệu không phải envelope hợp lệ
+        """
+        if len(data) < _HEADER.size:
+            raise EnvelopeError("Envelope quá ngắn")
+        (magic, version, hash_id, mode_id, fingerprint,
+         timestamp, length) = _HEADER.unpack_from(data)
+        if magic != ENVELOPE_MAGIC:
+            raise EnvelopeError("Sai magic của envelope")
+        if version != ENVELOPE_VERSION:
+            raise EnvelopeError(f"Phiên bản envelope không hỗ trợ: {version}")
+        if hash_id not in _HASH_NAMES or mode_id not in _MODE_NAMES:
+            raise EnvelopeError("Thuật toán trong envelope không hỗ trợ")
+        if len(data) != _HEADER.size + length:
+            raise EnvelopeError("Độ dài chữ ký trong envelope không khớp")
+        return cls(signature=bytes(data[_HEADER.size:]),
+                   key_fingerprint=fingerprint.hex(),
+                   mode=_MODE_NAMES[mode_id],
+                   hash_mode=_HASH_NAMES[hash_id],
+                   timestamp=timestamp or None)
+
+    def to_armored(self) -> str:
+        """Dạng ASCII armored (base64, 64 ký tự mỗi dòng)"""
+        encoded = base64.b64encode(self.to_bytes()).decode('ascii')
+        lines = [encoded[i:i + 64] for i in range(0, len(encoded), 64)]
+        return '\n'.join([ARMOR_BEGIN, *lines, ARMOR_END]) + '\n'
+
+    @classmethod
+    def from_armored(cls, text: str) -> "SignatureEnvelope":
+        """Giải mã dạng ASCII armored"""
+        text = text.strip()
+        if not (text.startswith(ARMOR_BEGIN) and text.endswith(ARMOR_END)):
+            raise EnvelopeError("Thiếu dòng BEGIN/END của envelope armored")
+        body = text[len(ARMOR_BEGIN):-len(ARMOR_END)]
+        try:
+            data = base64.b64decode(''.join(body.split()), validate=True)
+        except binascii.Error as e:
+            raise EnvelopeError(f"Base64 của envelope không hợp lệ: {str(e)}")
+        return cls.from_bytes(data)
+
+
+def is_envelope(data: bytes) -> bool:
+    """Nội dung có phải envelope (nhị phân hoặc armored) không"""
+    return data.startswith(ENVELOPE_MAGIC) or data.lstrip().startswith(ARMOR_BEGIN.encode('ascii'))
+
+
+def parse_envelope(data: bytes) -> SignatureEnvelope:
+    """Giải mã envelope nhị phân hoặc armored theo nội dung"""
+    if data.startswith(ENVELOPE_MAGIC):
+        return SignatureEnvelope.from_bytes(data)
+    try:
+        return SignatureEnvelope.from_armored(data.decode('ascii'))
+    except UnicodeDecodeError:
+        raise EnvelopeError("Envelope armored chứa ký tự không phải ASCII")
+
+
+def looks_like_base64(data: bytes) -> bool:
+    """Nội dung chỉ gồm ký tự base64 (chữ ký .b64 cũ); chữ ký nhị phân ngẫu nhiên gần như không thể"""
+    return bool(data) and _BASE64_RE.fullmatch(data) is not None
@@ -0,0 +1,151 @@
+"""
+Bộ nhớ đệm (cache) cho các đối tượng khóa RSA đã được giải mã
+"""
+
+import hmac
+import os
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, Callable, Dict, Optional, Tuple, Union
+
+# Salt ngẫu nhiên cho mỗi tiến trình, dùng để tạo dấu vân tay mật khẩu
+# (không bao giờ lưu mật khẩu dạng rõ trong khóa cache)
+_PASSWORD_SALT = os.urandom(32)
+
+CacheKey = Tuple[str, str, int, int, int, bytes]
+
+
+def password_fingerprint(password: Optional[str]) -> bytes:
+    """Tạo dấu vân tay HMAC của mật khẩu (rỗng nếu không có mật khẩu)"""
+    if not password:
+        return b''
+    return hmac.new(_PASSWORD_SALT, password.encode('utf-8'), hashlib.sha256).digest()
+
+
+class KeyCache:
+    """Cache LRU có TTL cho khóa RSA đã parse, tự vô hiệu khi file khóa thay đổi"""
+
+    def __init__(self, max_entries: int = 64, ttl: Optional[float] = 300.0):
+        """
+        Khởi tạo Key Cache
+
+        Args:
+            max_entries: Số khóa tối đa giữ trong cache
+            ttl: Thời gian sống của mỗi mục (giây), None nếu không giới hạn
+        """
+        if max_entries < 1:
+            raise ValueError("max_entries phải lớn hơn 0")
+
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self._entries: "OrderedDict[CacheKey, Tuple[float, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def make_key(kind: str, file_path: Union[str, Path],
+                 password: Optional[str] = None) -> CacheKey:
+        """
+        Tạo khóa cache từ trạng thái hiện tại của file
+
+        Args:
+            kind: Loại khóa ('private', 'private-unvalidated' hoặc 'public')
+            file_path: Đường dẫn file khóa
+            password: Mật khẩu khóa riêng (nếu có)
+
+        Returns:
+            Tuple (loại, đường dẫn tuyệt đối, inode, kích thước, mtime, vân tay mật khẩu)
+        """
+        resolved = Path(file_path).resolve()
+        stat = resolved.stat()
+        return (kind, str(resolved), stat.st_ino, stat.st_size,
+                stat.st_mtime_ns, password_fingerprint(password))
+
+    def get(self, key: CacheKey) -> Optional[Any]:
+        """Lấy khóa từ cache, trả về None nếu không có hoặc đã hết hạn"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                loaded_at, value = entry
+                if self.ttl is None or time.monotonic() - loaded_at < self.ttl:
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return value
+                del self._entries[key]
+            self.misses += 1
+            return None
+
+    def put(self, key: CacheKey, value: Any) -> None:
+        """Thêm khóa vào cache, loại bỏ mục ít dùng nhất khi đầy"""
+        with self._lock:
+            self._entries[key] = (time.monotonic(), value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def get_or_load(self, kind: str, file_path: Union[str, Path],
+                    loader: Callable[[], Any],
+                    password: Optional[str] = None) -> Any:
+        """
+        Lấy khóa từ cache hoặc gọi loader để tải và lưu vào cache
+
+        Args:
+            kind: Loại khóa ('private', 'private-unvalidated' hoặc 'public')
+            file_path: Đường dẫn file khóa
+            loader: Hàm tải khóa khi cache miss
+            password: Mật khẩu khóa riêng (nếu có)
+
+        Returns:
+            Đối tượng khóa
+        """
+        key = self.make_key(kind, file_path, password)
+        value = self.get(key)
+        if value is None:
+            value = loader()
+            self.put(key, value)
+        return value
+
+    def invalidate(self, file_path: Optional[Union[str, Path]] = None) -> int:
+        """
+        Xóa khóa khỏi cache
+
+        Args:
+            file_path: Chỉ xóa các mục của file này (None để xóa toàn bộ)
+
+        Returns:
+            Số mục đã xóa
+        """
+        with self._lock:
+            if file_path is None:
+                count = len(self._entries)
+                self._entries.clear()
+                return count
+
+            resolved = str(Path(file_path).resolve())
+            stale = [key for key in self._entries if key[1] == resolved]
+            for key in stale:
+                del self._entries[key]
+            return len(stale)
+
+    def stats(self) -> Dict[str, Any]:
+        """Thống kê cache: số mục, hit, miss"""
+        with self._lock:
+            return {
+                'entries': len(self._entries),
+                'max_entries': self.max_entries,
+                'ttl': self.ttl,
+                'hits': self.hits,
+                'misses': self.misses,
+            }
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._entries)
+
+
+# Cache dùng chung cho toàn tiến trình
+default_key_cache = KeyCache()
@@ -3,25 +3,85 @@ Quản lý khóa RSA: tạo, lưu trữ, tải khóa
 """
 
 import os
+import hashlib
 from pathlib import Path
 from typing import Tuple, Optional
 from cryptography.hazmat.primitives import serialization, hashes
+from cryptography.hazmat.primitives.serialization import pkcs12
 from cryptography.hazmat.primitives.asymmetric import rsa, padding
 from cryptography.exceptions import InvalidSignature
 
-from .utils import setup_logging, safe_file_write, safe_file_read, ensure_directory
+from .utils import get_logger, safe_file_write, safe_file_read, ensure_directory
+from .key_cache import KeyCache, default_key_cache
+from .key_pool import KeyPool
 
-logger = setup_logging()
+logger = get_logger()
+
+KEY_ENCODINGS = ('pem', 'der', 'pkcs12')
+
+# Thuật toán mã hóa khóa riêng trong PKCS#12 (dùng khi cần chỉnh tham số KDF)
+KDF_ALGORITHMS = {
+    'pbes2-aes256': pkcs12.PBES.PBESv2SHA256AndAES256CBC,
+    'pbes1-3des': pkcs12.PBES.PBESv1SHA1And3KeyTripleDESCBC,
+}
+
+def detect_key_encoding(data: bytes) -> str:
+    """
+    Nhận diện định dạng file khóa từ nội dung
+    
+    Args:
+        data: Nội dung file khóa
+        
+    Returns:
+        'pem', 'der' (PKCS#8 / SubjectPublicKeyInfo) hoặc 'pkcs12'
+    """
+    if data.lstrip()[:10] == b'-----BEGIN':
+        return 'pem'
+    
+    # DER: SEQUENCE { ... }. PKCS#12 bắt đầu bằng INTEGER version = 3
+    if len(data) > 4 and data[0] == 0x30:
+        length_byte = data[1]
+        offset = 2 + (length_byte & 0x7F if length_byte & 0x80 else 0)
+        if data[offset:offset + 3] == b'\x02\x01\x03':
+            return 'pkcs12'
+        return 'der'
+    
+    raise ValueError("Không nhận diện được định dạng file khóa")
+
+def public_key_fingerprint(public_key: rsa.RSAPublicKey) -> str:
+    """
+    Tính dấu vân tay (key ID) của khóa công khai
+    
+    Args:
+        public_key: Khóa công khai RSA
+        
+    Returns:
+        SHA-256 của SubjectPublicKeyInfo (DER) dạng hex
+    """
+    spki = public_key.public_bytes(
+        encoding=serialization.Encoding.DER,
+        format=serialization.PublicFormat.SubjectPublicKeyInfo
+    )
+    return hashlib.sha256(spki).hexdigest()
 
 class RSAKeyManager:
     """Quản lý khóa RSA"""
     
-    def __init__(self, key_size: int = 2048):
+    def __init__(self, key_size: int = 2048,
+                 key_cache: Optional[KeyCache] = None,
+                 use_cache: bool = True,
+                 key_pool: Optional[KeyPool] = None,
+                 skip_key_validation: bool = False):
         """
         Khởi tạo RSA Key Manager
         
         Args:
             key_size: Kích thước khóa (2048 hoặc 3072 bit)
+            key_cache: Cache khóa đã parse (mặc định dùng cache chung của tiến trình)
+            use_cache: False để luôn đọc và parse lại file khóa
+            key_pool: Pool khóa tạo sẵn (tùy chọn) dùng cho generate_keypair
+            skip_key_validation: Bỏ qua bước kiểm tra tính nhất quán của khóa riêng
+                                 khi tải (nhanh hơn nhiều, chỉ dùng với khóa tin cậy)
         """
         if key_size not in [2048, 3072]:
             raise ValueError("Kích thước khóa phải là 2048 hoặc 3072 bit")
@@ -29,6 +89,11 @@ class RSAKeyManager:
         self.key_size = key_size
         self.private_key = None
         self.public_key = None
+        if key_cache is None and use_cache:
+            key_cache = default_key_cache
+        self.key_cache = key_cache if use_cache else None
+        self.key_pool = key_pool
+        self.skip_key_validation = skip_key_validation
     
     def generate_keypair(self) -> Tuple[rsa.RSAPrivateKey, rsa.RSAPublicKey]:
         """
@@ -38,13 +103,19 @@ class RSAKeyManager:
             Tuple chứa private key và public key
         """
         try:
-            logger.info(f"Đang tạo cặp khóa RSA {self.key_size} bit...")
+            logger.info("Đang tạo cặp khóa RSA %s bit...", self.key_size)
             
-            # Tạo khóa riêng
-            private_key = rsa.generate_private_key(
-                public_exponent=65537,
-                key_size=self.key_size,
-            )
+            # Lấy khóa tạo sẵn từ pool nếu có
+            private_key = None
+            if self.key_pool is not None:
+                private_key = self.key_pool.take(self.key_size)
+            
+            # Tạo khóa riêng (khi không có pool hoặc pool rỗng)
+            if private_key is None:
+                private_key = rsa.generate_private_key(
+                    public_exponent=65537,
+                    key_size=self.key_size,
+                )
             
             # Lấy khóa công khai
             public_key = private_key.public_key()
@@ -56,68 +127,149 @@ class RSAKeyManager:
             return private_key, public_key
             
         except Exception as e:
-            logger.error(f"Lỗi khi tạo cặp khóa: {str(e)}")
+            logger.error("Lỗi khi tạo cặp khóa: %s", e)
             raise RuntimeError(f"Không thể tạo cặp khóa: {str(e)}")
     
-    def save_private_key(self, file_path: str, password: Optional[str] = None) -> None:
+    def save_private_key(self, file_path: str, password: Optional[str] = None,
+                         encoding: str = 'pem',
+                         kdf_rounds: Optional[int] = None,
+                         kdf_algorithm: str = 'pbes2-aes256') -> None:
         """
         Lưu khóa riêng ra file
         
         Args:
             file_path: Đường dẫn file để lưu khóa riêng
             password: Mật khẩu để mã hóa khóa riêng (tùy chọn)
+            encoding: 'pem' (PKCS#8 PEM), 'der' (PKCS#8 DER) hoặc
+                      'pkcs12' (DER, cho phép chỉnh tham số KDF)
+            kdf_rounds: Số vòng lặp KDF (chỉ dùng với 'pkcs12' có mật khẩu)
+            kdf_algorithm: Thuật toán mã hóa khóa trong PKCS#12 ('pbes2-aes256' hoặc 'pbes1-3des')
         """
         if not self.private_key:
             raise ValueError("Chưa có khóa riêng để lưu")
+        if encoding not in KEY_ENCODINGS:
+            raise ValueError(f"Định dạng khóa không hỗ trợ: {encoding}")
+        if kdf_rounds is not None and encoding != 'pkcs12':
+            raise ValueError("Tham số KDF chỉ hỗ trợ với định dạng 'pkcs12'")
+        if kdf_algorithm not in KDF_ALGORITHMS:
+            raise ValueError(f"Thuật toán KDF không hỗ trợ: {kdf_algorithm}")
         
         try:
-            # Chuẩn bị encryption algorithm
-            encryption_algorithm = serialization.NoEncryption()
-            if password:
-                encryption_algorithm = serialization.BestAvailableEncryption(
-                    password.encode('utf-8')
+            if encoding == 'pkcs12':
+                private_pem = self._serialize_pkcs12(password, kdf_rounds, kdf_algorithm)
+            else:
+                # Chuẩn bị encryption algorithm
+                encryption_algorithm = serialization.NoEncryption()
+                if password:
+                    encryption_algorithm = serialization.BestAvailableEncryption(
+                        password.encode('utf-8')
+                    )
+                
+                # Serialize khóa riêng
+                private_pem = self.private_key.private_bytes(
+                    encoding=(serialization.Encoding.DER if encoding == 'der'
+                              else serialization.Encoding.PEM),
+                    format=serialization.PrivateFormat.PKCS8,
+                    encryption_algorithm=encryption_algorithm
                 )
             
-            # Serialize khóa riêng
-            private_pem = self.private_key.private_bytes(
-                encoding=serialization.Encoding.PEM,
-                format=serialization.PrivateFormat.PKCS8,
-                encryption_algorithm=encryption_algorithm
-            )
-            
             # Lưu file
             safe_file_write(file_path, private_pem)
-            logger.info(f"Đã lưu khóa riêng vào {file_path}")
+            if self.key_cache is not None:
+                self.key_cache.invalidate(file_path)
+            logger.info("Đã lưu khóa riêng vào %s", file_path)
             
         except Exception as e:
-            logger.error(f"Lỗi khi lưu khóa riêng: {str(e)}")
+            logger.error("Lỗi khi lưu khóa riêng: %s", e)
             raise IOError(f"Không thể lưu khóa riêng: {str(e)}")
     
-    def save_public_key(self, file_path: str) -> None:
+    def _serialize_pkcs12(self, password: Optional[str], kdf_rounds: Optional[int],
+                          kdf_algorithm: str) -> bytes:
+        """Serialize khóa riêng thành PKCS#12 (DER) với tham số KDF tùy chỉnh"""
+        encryption_algorithm = serialization.NoEncryption()
+        if password:
+            builder = serialization.PrivateFormat.PKCS12.encryption_builder()
+            if kdf_rounds is not None:
+                builder = builder.kdf_rounds(kdf_rounds)
+            builder = builder.key_cert_algorithm(KDF_ALGORITHMS[kdf_algorithm])
+            if kdf_algorithm == 'pbes2-aes256':
+                builder = builder.hmac_hash(hashes.SHA256())
+            encryption_algorithm = builder.build(password.encode('utf-8'))
+        
+        return pkcs12.serialize_key_and_certificates(
+            None, self.private_key, None, None, encryption_algorithm
+        )
+    
+    def save_public_key(self, file_path: str, encoding: str = 'pem') -> None:
         """
         Lưu khóa công khai ra file
         
         Args:
             file_path: Đường dẫn file để lưu khóa công khai
+            encoding: 'pem' hoặc 'der'
         """
         if not self.public_key:
             raise ValueError("Chưa có khóa công khai để lưu")
+        if encoding not in ('pem', 'der'):
+            raise ValueError(f"Định dạng khóa công khai không hỗ trợ: {encoding}")
         
         try:
             # Serialize khóa công khai
             public_pem = self.public_key.public_bytes(
-                encoding=serialization.Encoding.PEM,
+                encoding=(serialization.Encoding.DER if encoding == 'der'
+                          else serialization.Encoding.PEM),
                 format=serialization.PublicFormat.SubjectPublicKeyInfo
             )
             
             # Lưu file
             safe_file_write(file_path, public_pem)
-            logger.info(f"Đã lưu khóa công khai vào {file_path}")
+            if self.key_cache is not None:
+                self.key_cache.invalidate(file_path)
+            logger.info("Đã lưu khóa công khai vào %s", file_path)
             
         except Exception as e:
-            logger.error(f"Lỗi khi lưu khóa công khai: {str(e)}")
+            logger.error("Lỗi khi lưu khóa công khai: %s", e)
             raise IOError(f"Không thể lưu khóa công khai: {str(e)}")
     
+    def _parse_private_key(self, file_path: str, password: Optional[str] = None) -> rsa.RSAPrivateKey:
+        """Đọc và parse khóa riêng từ file (không qua cache)"""
+        # Đọc file khóa
+        private_pem = safe_file_read(file_path)
+        
+        # Parse khóa riêng theo định dạng nhận diện từ nội dung
+        password_bytes = password.encode('utf-8') if password else None
+        encoding = detect_key_encoding(private_pem)
+        if encoding == 'pkcs12':
+            private_key, _, _ = pkcs12.load_key_and_certificates(private_pem, password_bytes)
+        else:
+            loader = (serialization.load_pem_private_key if encoding == 'pem'
+                      else serialization.load_der_private_key)
+            private_key = loader(
+                private_pem,
+                password=password_bytes,
+                unsafe_skip_rsa_key_validation=self.skip_key_validation
+            )
+        
+        if not isinstance(private_key, rsa.RSAPrivateKey):
+            raise ValueError("File không chứa khóa RSA hợp lệ")
+        return private_key
+    
+    @staticmethod
+    def read_public_key(file_path: str) -> rsa.RSAPublicKey:
+        """Đọc và parse khóa công khai từ file (không qua cache, không ghi log)"""
+        # Đọc file khóa
+        public_pem = safe_file_read(file_path)
+        
+        # Parse khóa công khai
+        if detect_key_encoding(public_pem) == 'pem':
+            public_key = serialization.load_pem_public_key(public_pem)
+        else:
+            public_key = serialization.load_der_public_key(public_pem)
+        
+        if not isinstance(public_key, rsa.RSAPublicKey):
+            raise ValueError("File không chứa khóa RSA công khai hợp lệ")
+        return public_key
+    
     def load_private_key(self, file_path: str, password: Optional[str] = None) -> rsa.RSAPrivateKey:
         """
         Tải khóa riêng từ file
@@ -130,31 +282,31 @@ class RSAKeyManager:
             RSA private key object
         """
         try:
-            # Đọc file khóa
-            private_pem = safe_file_read(file_path)
-            
-            # Parse khóa riêng
-            password_bytes = password.encode('utf-8') if password else None
-            private_key = serialization.load_pem_private_key(
-                private_pem,
-                password=password_bytes
-            )
-            
-            if not isinstance(private_key, rsa.RSAPrivateKey):
-                raise ValueError("File không chứa khóa RSA hợp lệ")
+            if self.key_cache is not None:
+                # Khóa parse không kiểm tra tính nhất quán nằm ở mục cache riêng, không
+                # được trả cho key manager yêu cầu kiểm tra
+                kind = 'private-unvalidated' if self.skip_key_validation else 'private'
+                private_key = self.key_cache.get_or_load(
+                    kind, file_path,
+                    lambda: self._parse_private_key(file_path, password),
+                    password
+                )
+            else:
+                private_key = self._parse_private_key(file_path, password)
             
             self.private_key = private_key
             self.public_key = private_key.public_key()
             
-            logger.info(f"Đã tải khóa riêng từ {file_path}")
+            logger.info("Đã tải khóa riêng từ %s", file_path)
             return private_key
             
         except ValueError as e:
-            if "Bad decrypt" in str(e) or "could not deserialize" in str(e):
+            if ("Bad decrypt" in str(e) or "could not deserialize" in str(e)
+                    or "Invalid password" in str(e)):
                 raise ValueError("Mật khẩu không đúng hoặc file khóa bị lỗi")
             raise e
         except Exception as e:
-            logger.error(f"Lỗi khi tải khóa riêng: {str(e)}")
+            logger.error("Lỗi khi tải khóa riêng: %s", e)
             raise IOError(f"Không thể tải khóa riêng: {str(e)}")
     
     def load_public_key(self, file_path: str) -> rsa.RSAPublicKey:
@@ -168,20 +320,19 @@ class RSAKeyManager:
             RSA public key object
         """
         try:
-            # Đọc file khóa
-            public_pem = safe_file_read(file_path)
-            
-            # Parse khóa công khai
-            public_key = serialization.load_pem_public_key(public_pem)
-            
-            if not isinstance(public_key, rsa.RSAPublicKey):
-                raise ValueError("File không chứa khóa RSA công khai hợp lệ")
+            if self.key_cache is not None:
+                public_key = self.key_cache.get_or_load(
+                    'public', file_path,
+                    lambda: self.read_public_key(file_path)
+                )
+            else:
+                public_key = self.read_public_key(file_path)
             
             self.public_key = public_key
             
-            logger.info(f"Đã tải khóa công khai từ {file_path}")
+            logger.info("Đã tải khóa công khai từ %s", file_path)
             return public_key
             
         except Exception as e:
-            logger.error(f"Lỗi khi tải khóa công khai: {str(e)}")
+            logger.error("Lỗi khi tải khóa công khai: %s", e)
             raise IOError(f"Không thể tải khóa công khai: {str(e)}")
\ No newline at end of file
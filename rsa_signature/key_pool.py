@@ -0,0 +1,204 @@
+"""
+Pool khóa RSA được tạo sẵn ở nền để giảm độ trễ khi tạo cặp khóa
+"""
+
+import threading
+import time
+from collections import deque
+from concurrent.futures import Executor, Future, ProcessPoolExecutor
+from typing import Any, Deque, Dict, Iterable, Optional
+
+from cryptography.hazmat.primitives import serialization
+from cryptography.hazmat.primitives.asymmetric import rsa
+
+from .utils import get_logger
+
+logger = get_logger()
+
+
+def _generate_private_key_der(key_size: int) -> bytes:
+    """Tạo khóa riêng trong tiến trình worker, trả về DER (có thể pickle)"""
+    private_key = rsa.generate_private_key(
+        public_exponent=65537,
+        key_size=key_size,
+    )
+    return private_key.private_bytes(
+        encoding=serialization.Encoding.DER,
+        format=serialization.PrivateFormat.PKCS8,
+        encryption_algorithm=serialization.NoEncryption()
+    )
+
+
+class KeyPool:
+    """Pool khóa RSA tạo sẵn, tự nạp lại ở nền theo ngưỡng thấp/cao"""
+
+    def __init__(self, key_sizes: Iterable[int] = (2048,),
+                 low_watermark: int = 2,
+                 high_watermark: int = 8,
+                 executor: Optional[Executor] = None,
+                 max_workers: Optional[int] = None):
+        """
+        Khởi tạo Key Pool
+
+        Args:
+            key_sizes: Các kích thước khóa cần giữ sẵn
+            low_watermark: Khi số khóa còn lại <= ngưỡng này thì bắt đầu nạp lại
+            high_watermark: Số khóa tối đa giữ trong pool cho mỗi kích thước
+            executor: Executor dùng để tạo khóa (mặc định ProcessPoolExecutor)
+            max_workers: Số tiến trình worker khi tự tạo ProcessPoolExecutor
+        """
+        if not 0 <= low_watermark < high_watermark:
+            raise ValueError("Cần 0 <= low_watermark < high_watermark")
+
+        self.low_watermark = low_watermark
+        self.high_watermark = high_watermark
+        self._owns_executor = executor is None
+        self._executor = executor or ProcessPoolExecutor(max_workers=max_workers)
+        self._lock = threading.Lock()
+        self._closed = False
+        self._futures = set()
+        self._keys: Dict[int, Deque[rsa.RSAPrivateKey]] = {}
+        self._stats: Dict[int, Dict[str, Any]] = {}
+        for key_size in key_sizes:
+            self._keys[key_size] = deque()
+            self._stats[key_size] = {
+                'pending': 0,
+                'taken': 0,
+                'misses': 0,
+                'generated': 0,
+                'last_refill_latency': None,
+                'total_refill_latency': 0.0,
+            }
+
+    def start(self) -> "KeyPool":
+        """Nạp pool lần đầu đến ngưỡng cao"""
+        for key_size in self._keys:
+            self._refill(key_size)
+        return self
+
+    def take(self, key_size: int) -> Optional[rsa.RSAPrivateKey]:
+        """
+        Lấy một khóa riêng đã tạo sẵn
+
+        Args:
+            key_size: Kích thước khóa cần lấy
+
+        Returns:
+            Khóa riêng, hoặc None nếu pool rỗng / không hỗ trợ kích thước này
+        """
+        if key_size not in self._keys:
+            return None
+
+        with self._lock:
+            keys = self._keys[key_size]
+            stats = self._stats[key_size]
+            if keys:
+                private_key = keys.popleft()
+                stats['taken'] += 1
+            else:
+                private_key = None
+                stats['misses'] += 1
+            needs_refill = len(keys) <= self.low_watermark
+
+        if needs_refill:
+            self._refill(key_size)
+        return private_key
+
+    def _refill(self, key_size: int) -> None:
+        """Gửi các job tạo khóa để đưa pool lên ngưỡng cao"""
+        with self._lock:
+            if self._closed:
+                return
+            stats = self._stats[key_size]
+            missing = self.high_watermark - len(self._keys[key_size]) - stats['pending']
+            if missing <= 0:
+                return
+            stats['pending'] += missing
+
+        logger.debug("Nạp lại pool khóa %s bit: %s khóa", key_size, missing)
+        for _ in range(missing):
+            submitted_at = time.perf_counter()
+            try:
+                future = self._executor.submit(_generate_private_key_der, key_size)
+            except RuntimeError:
+                # Executor đã bị tắt
+                with self._lock:
+                    stats['pending'] -= 1
+                continue
+            with self._lock:
+                self._futures.add(future)
+            future.add_done_callback(
+                lambda f, start=submitted_at: self._on_generated(key_size, start, f)
+            )
+
+    def _on_generated(self, key_size: int, submitted_at: float, future: Future) -> None:
+        """Callback khi worker tạo xong một khóa"""
+        latency = time.perf_counter() - submitted_at
+        private_key = None
+        if future.cancelled():
+            with self._lock:
+                self._futures.discard(future)
+                self._stats[key_size]['pending'] -= 1
+            return
+        try:
+            private_key = serialization.load_der_private_key(future.result(), password=None)
+        except Exception as e:
+            logger.error("Lỗi khi tạo khóa cho pool: %s", e)
+
+        with self._lock:
+            self._futures.discard(future)
+            stats = self._stats[key_size]
+            stats['pending'] -= 1
+            if private_key is not None and not self._closed:
+                self._keys[key_size].append(private_key)
+                stats['generated'] += 1
+                stats['last_refill_latency'] = latency
+                stats['total_refill_latency'] += latency
+
+    def depth(self, key_size: int) -> int:
+        """Số khóa đang sẵn sàng trong pool cho kích thước cho trước"""
+        with self._lock:
+            keys = self._keys.get(key_size)
+            return len(keys) if keys is not None else 0
+
+    def stats(self) -> Dict[int, Dict[str, Any]]:
+        """
+        Thống kê pool theo kích thước khóa
+
+        Returns:
+            Dictionary {key_size: {depth, pending, taken, misses, generated,
+            last_refill_latency, avg_refill_latency}}
+        """
+        with self._lock:
+            result = {}
+            for key_size, stats in self._stats.items():
+                generated = stats['generated']
+                result[key_size] = {
+                    'depth': len(self._keys[key_size]),
+                    'pending': stats['pending'],
+                    'taken': stats['taken'],
+                    'misses': stats['misses'],
+                    'generated': generated,
+                    'last_refill_latency': stats['last_refill_latency'],
+                    'avg_refill_latency': (stats['total_refill_latency'] / generated
+                                           if generated else None),
+                }
+            return result
+
+    def shutdown(self, wait: bool = True) -> None:
+        """Dừng nạp lại và giải phóng khóa trong pool"""
+        with self._lock:
+            self._closed = True
+            for keys in self._keys.values():
+                keys.clear()
+            futures = list(self._futures)
+        for future in futures:
+            future.cancel()
+        if self._owns_executor:
+            self._executor.shutdown(wait=wait)
+
+    def __enter__(self) -> "KeyPool":
+        return self.start()
+
+    def __exit__(self, *exc_info) -> None:
+        self.shutdown()
@@ -0,0 +1,222 @@
+"""
+Kho khóa trên đĩa, đánh chỉ mục theo fingerprint (key ID) bằng SQLite
+"""
+
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Any, Dict, Iterator, Optional, Union
+
+from cryptography.hazmat.primitives.asymmetric import rsa
+
+from .key_manager import RSAKeyManager, public_key_fingerprint
+from .utils import get_logger, ensure_directory
+from .verify_cache import VerifyCache
+
+logger = get_logger()
+
+KEY_STATUSES = ('active', 'retired', 'revoked')
+MIN_PREFIX_LENGTH = 4
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS keys (
+    key_id       TEXT PRIMARY KEY,
+    public_path  TEXT NOT NULL,
+    private_path TEXT,
+    key_size     INTEGER NOT NULL,
+    file_size    INTEGER NOT NULL,
+    created_at   REAL NOT NULL,
+    status       TEXT NOT NULL DEFAULT 'active'
+)
+"""
+
+
+class KeyStore:
+    """Kho khóa RSA: file khóa đặt theo fingerprint, chỉ mục trong index.sqlite3"""
+
+    INDEX_FILE = 'index.sqlite3'
+
+    def __init__(self, root: Union[str, Path],
+                 key_manager: Optional[RSAKeyManager] = None,
+                 verify_cache: Optional[VerifyCache] = None):
+        """
+        Khởi tạo Key Store
+
+        Args:
+            root: Thư mục gốc của kho khóa
+            key_manager: RSA Key Manager dùng để tải khóa (tùy chọn)
+            verify_cache: Cache kết quả xác minh cần xóa khi thu hồi khóa (tùy chọn)
+        """
+        self.root = ensure_directory(root)
+        self.key_manager = key_manager or RSAKeyManager()
+        self.verify_cache = verify_cache
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(str(self.root / self.INDEX_FILE),
+                                   check_same_thread=False)
+        self._db.row_factory = sqlite3.Row
+        with self._db:
+            self._db.execute(_SCHEMA)
+
+    def _key_paths(self, key_id: str):
+        """Đường dẫn tương đối (khóa riêng, khóa công khai) của key ID"""
+        directory = Path(key_id[:2])
+        return directory / f"{key_id}.pem", directory / f"{key_id}.pub.pem"
+
+    def add_keypair(self, key_manager: RSAKeyManager,
+                    password: Optional[str] = None) -> str:
+        """
+        Lưu cặp khóa của key manager vào kho
+
+        Args:
+            key_manager: Key manager đã có private_key (ví dụ sau generate_keypair)
+            password: Mật khẩu mã hóa khóa riêng (tùy chọn)
+
+        Returns:
+            Key ID (SHA-256 fingerprint của khóa công khai)
+        """
+        if not key_manager.private_key:
+            raise ValueError("Chưa có khóa riêng để lưu")
+
+        key_id = public_key_fingerprint(key_manager.public_key)
+        private_rel, public_rel = self._key_paths(key_id)
+        key_manager.save_private_key(str(self.root / private_rel), password)
+        key_manager.save_public_key(str(self.root / public_rel))
+        self._index(key_id, key_manager.public_key, public_rel, private_rel)
+        return key_id
+
+    def add_public_key(self, public_key: rsa.RSAPublicKey) -> str:
+        """
+        Lưu khóa công khai vào kho
+
+        Args:
+            public_key: Khóa công khai RSA
+
+        Returns:
+            Key ID
+        """
+        key_id = public_key_fingerprint(public_key)
+        _, public_rel = self._key_paths(key_id)
+        key_manager = RSAKeyManager(key_cache=self.key_manager.key_cache)
+        key_manager.public_key = public_key
+        key_manager.save_public_key(str(self.root / public_rel))
+        self._index(key_id, public_key, public_rel, None)
+        return key_id
+
+    def import_public_key(self, file_path: Union[str, Path]) -> str:
+        """Nhập khóa công khai từ file PEM, trả về key ID"""
+        return self.add_public_key(self.key_manager.load_public_key(str(file_path)))
+
+    def _index(self, key_id: str, public_key: rsa.RSAPublicKey,
+               public_rel: Path, private_rel: Optional[Path]) -> None:
+        """Ghi (hoặc cập nhật) một dòng chỉ mục"""
+        file_size = (self.root / public_rel).stat().st_size
+        with self._lock, self._db:
+            self._db.execute(
+                "INSERT INTO keys (key_id, public_path, private_path, key_size, file_size, created_at) "
+                "VALUES (?, ?, ?, ?, ?, ?) "
+                "ON CONFLICT(key_id) DO UPDATE SET "
+                "private_path = COALESCE(excluded.private_path, keys.private_path)",
+                (key_id, str(public_rel), str(private_rel) if private_rel else None,
+                 public_key.key_size, file_size, time.time())
+            )
+        logger.info("Đã thêm khóa %s vào kho", key_id[:16])
+
+    def resolve(self, key_id: str) -> Dict[str, Any]:
+        """
+        Tìm khóa theo key ID đầy đủ hoặc tiền tố
+
+        Args:
+            key_id: Key ID hoặc tiền tố (tối thiểu 4 ký tự hex)
+
+        Returns:
+            Dictionary thông tin khóa (key_id, public_path, private_path, key_size,
+            file_size, created_at, status) với đường dẫn tuyệt đối
+        """
+        key_id = key_id.lower()
+        if len(key_id) < MIN_PREFIX_LENGTH:
+            raise ValueError(f"Tiền tố key ID phải có ít nhất {MIN_PREFIX_LENGTH} ký tự")
+
+        # Truy vấn theo khoảng trên khóa chính (key ID là hex nên 'g' là cận trên):
+        # dùng chỉ mục B-tree, không quét bảng hay parse file PEM
+        with self._lock:
+            rows = self._db.execute(
+                "SELECT * FROM keys WHERE key_id >= ? AND key_id < ? LIMIT 2",
+                (key_id, key_id + 'g')
+            ).fetchall()
+
+        if not rows:
+            raise KeyError(f"Không tìm thấy khóa: {key_id}")
+        if len(rows) > 1:
+            raise ValueError(f"Tiền tố key ID không duy nhất: {key_id}")
+        return self._record(rows[0])
+
+    def _record(self, row: sqlite3.Row) -> Dict[str, Any]:
+        """Chuyển một dòng chỉ mục thành dictionary với đường dẫn tuyệt đối"""
+        record = dict(row)
+        record['public_path'] = str(self.root / record['public_path'])
+        if record['private_path']:
+            record['private_path'] = str(self.root / record['private_path'])
+        return record
+
+    def load_public_key(self, key_id: str) -> rsa.RSAPublicKey:
+        """Tải khóa công khai theo key ID hoặc tiền tố"""
+        return self.key_manager.load_public_key(self.resolve(key_id)['public_path'])
+
+    def load_private_key(self, key_id: str,
+                         password: Optional[str] = None) -> rsa.RSAPrivateKey:
+        """Tải khóa riêng theo key ID hoặc tiền tố (khóa phải còn 'active')"""
+        record = self.resolve(key_id)
+        if not record['private_path']:
+            raise KeyError(f"Kho không có khóa riêng cho {record['key_id']}")
+        if record['status'] != 'active':
+            raise ValueError(f"Khóa {record['key_id']} đang ở trạng thái {record['status']}")
+        return self.key_manager.load_private_key(record['private_path'], password)
+
+    def set_status(self, key_id: str, status: str) -> None:
+        """Đổi trạng thái khóa ('active', 'retired', 'revoked')"""
+        if status not in KEY_STATUSES:
+            raise ValueError(f"Trạng thái không hợp lệ: {status}")
+        full_id = self.resolve(key_id)['key_id']
+        with self._lock, self._db:
+            self._db.execute("UPDATE keys SET status = ? WHERE key_id = ?", (status, full_id))
+        # Kết quả xác minh đã cache của khóa bị thu hồi không còn đáng tin
+        if status == 'revoked' and self.verify_cache is not None:
+            self.verify_cache.revoke_key(full_id)
+
+    def revoke(self, key_id: str) -> None:
+        """Thu hồi khóa (và xóa kết quả xác minh của khóa trong verify cache nếu có)"""
+        self.set_status(key_id, 'revoked')
+
+    def keys(self, status: Optional[str] = None) -> Iterator[Dict[str, Any]]:
+        """Liệt kê khóa trong kho (lọc theo trạng thái nếu có)"""
+        with self._lock:
+            if status:
+                rows = self._db.execute(
+                    "SELECT * FROM keys WHERE status = ? ORDER BY key_id", (status,)
+                ).fetchall()
+            else:
+                rows = self._db.execute("SELECT * FROM keys ORDER BY key_id").fetchall()
+        for row in rows:
+            yield self._record(row)
+
+    def __contains__(self, key_id: str) -> bool:
+        try:
+            self.resolve(key_id)
+            return True
+        except (KeyError, ValueError):
+            return False
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._db.execute("SELECT COUNT(*) FROM keys").fetchone()[0]
+
+    def close(self) -> None:
+        """Đóng chỉ mục"""
+        self._db.close()
+
+    def __enter__(self) -> "KeyStore":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
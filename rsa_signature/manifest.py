@@ -0,0 +1,268 @@
+"""
+Ký cả thư mục bằng một phép ký RSA: manifest chứa cây Merkle của (đường dẫn, SHA-256)
+"""
+
+import json
+import os
+import struct
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Sequence, Tuple, Union
+
+from .key_manager import RSAKeyManager, public_key_fingerprint
+from .digest_cache import DigestCache
+from .merkle import MerkleTree, decode_proof, encode_proof, leaf_hash, verify_proof
+from .signer import sign_hash
+from .verifier import verify_hash
+from .utils import (get_logger, hash_file, safe_file_read, safe_file_write,
+                    encode_base64, decode_base64, SIGNATURE_MODE_PREHASHED)
+
+logger = get_logger()
+
+MANIFEST_FORMAT = 'rsa-signature-manifest'
+MANIFEST_VERSION = 1
+
+
+def file_leaf(relative_path: str, digest: bytes) -> bytes:
+    """Hash lá của một file: độ dài đường dẫn (2 byte) | đường dẫn UTF-8 | SHA-256"""
+    encoded = relative_path.encode('utf-8')
+    return leaf_hash(struct.pack('>H', len(encoded)) + encoded + digest)
+
+
+def list_tree_files(directory: Union[str, Path],
+                    exclude: Sequence[Union[str, Path]] = ()) -> List[str]:
+    """
+    Liệt kê file thường trong thư mục (đường dẫn tương đối dạng POSIX, đã sắp xếp)
+
+    Args:
+        directory: Thư mục gốc
+        exclude: Các file cần bỏ qua (ví dụ chính file manifest)
+    """
+    root = Path(directory)
+    excluded = {Path(path).resolve() for path in exclude}
+    files = []
+    for dirpath, dirnames, filenames in os.walk(root):
+        dirnames.sort()
+        for filename in filenames:
+            path = Path(dirpath) / filename
+            if path.is_symlink() or not path.is_file() or path.resolve() in excluded:
+                continue
+            files.append(path.relative_to(root).as_posix())
+    files.sort()
+    return files
+
+
+class TreeSigner:
+    """Ký và xác minh thư mục bằng manifest Merkle"""
+
+    def __init__(self, key_manager: Optional[RSAKeyManager] = None,
+                 digest_cache: Optional[DigestCache] = None):
+        """
+        Khởi tạo Tree Signer
+
+        Args:
+            key_manager: RSA Key Manager (tùy chọn)
+            digest_cache: Cache digest để chỉ hash lại file đã thay đổi (tùy chọn)
+        """
+        self.key_manager = key_manager or RSAKeyManager()
+        self.digest_cache = digest_cache
+
+    def hash_file(self, file_path: Union[str, Path]) -> bytes:
+        """SHA-256 digest của file (qua digest cache nếu có)"""
+        if self.digest_cache is not None:
+            return self.digest_cache.digest(file_path)
+        return hash_file(file_path)
+
+    @staticmethod
+    def default_manifest_path(directory: Union[str, Path]) -> Path:
+        """Đường dẫn manifest mặc định: <thư mục>.manifest.json (nằm ngoài cây)"""
+        directory = Path(directory).resolve()
+        return directory.with_name(directory.name + '.manifest.json')
+
+    def hash_tree(self, directory: Union[str, Path],
+                  files: Optional[Sequence[str]] = None,
+                  jobs: Optional[int] = None) -> List[Tuple[str, bytes]]:
+        """
+        Hash song song các file trong thư mục
+
+        Returns:
+            Danh sách (đường dẫn tương đối, SHA-256) theo thứ tự đường dẫn
+        """
+        root = Path(directory)
+        if files is None:
+            files = list_tree_files(root)
+        with ThreadPoolExecutor(max_workers=jobs or os.cpu_count() or 1) as pool:
+            entries = list(zip(files, pool.map(lambda rel: self.hash_file(root / rel), files)))
+        if self.digest_cache is not None:
+            self.digest_cache.flush()
+        return entries
+
+    def sign_tree(self, directory: Union[str, Path],
+                  private_key_path: str,
+                  password: Optional[str] = None,
+                  jobs: Optional[int] = None,
+                  exclude: Sequence[Union[str, Path]] = ()) -> Dict[str, Any]:
+        """
+        Ký thư mục: hash mọi file, dựng cây Merkle và chỉ ký gốc cây
+
+        Args:
+            directory: Thư mục cần ký
+            private_key_path: Đường dẫn khóa riêng
+            password: Mật khẩu khóa riêng (nếu có)
+            jobs: Số luồng hash song song
+            exclude: Các file cần bỏ qua
+
+        Returns:
+            Manifest (dictionary có thể ghi ra JSON)
+        """
+        try:
+            logger.info("Đang ký thư mục: %s", directory)
+            private_key = self.key_manager.load_private_key(private_key_path, password)
+
+            entries = self.hash_tree(directory, list_tree_files(directory, exclude), jobs)
+            tree = MerkleTree([file_leaf(rel, digest) for rel, digest in entries])
+
+            # Gốc cây là SHA-256 nên ký trực tiếp bằng chế độ v2 (Prehashed)
+            signature = sign_hash(private_key, tree.root, SIGNATURE_MODE_PREHASHED)
+            logger.info("Đã ký %s file bằng một chữ ký", len(entries))
+
+            return {
+                'format': MANIFEST_FORMAT,
+                'version': MANIFEST_VERSION,
+                'hash': 'sha256',
+                'mode': SIGNATURE_MODE_PREHASHED,
+                'key_fingerprint': public_key_fingerprint(private_key.public_key()),
+                'root': tree.root.hex(),
+                'signature': encode_base64(signature),
+                'files': [[rel, digest.hex()] for rel, digest in entries],
+            }
+        except Exception as e:
+            logger.error("Lỗi khi ký thư mục: %s", e)
+            raise RuntimeError(f"Không thể ký thư mục: {str(e)}")
+
+    @staticmethod
+    def save_manifest(manifest: Dict[str, Any], output_path: Union[str, Path]) -> None:
+        """Lưu manifest dạng JSON gọn"""
+        data = json.dumps(manifest, separators=(',', ':'), ensure_ascii=False) + '\n'
+        safe_file_write(output_path, data.encode('utf-8'))
+
+    @staticmethod
+    def load_manifest(manifest_path: Union[str, Path]) -> Dict[str, Any]:
+        """Tải và kiểm tra định dạng manifest"""
+        manifest = json.loads(safe_file_read(manifest_path).decode('utf-8'))
+        if manifest.get('format') != MANIFEST_FORMAT:
+            raise ValueError("File không phải manifest chữ ký")
+        if manifest.get('version') != MANIFEST_VERSION:
+            raise ValueError(f"Phiên bản manifest không hỗ trợ: {manifest.get('version')}")
+        return manifest
+
+    def _manifest_tree(self, manifest: Dict[str, Any]) -> MerkleTree:
+        """Dựng lại cây Merkle từ danh sách file trong manifest (không đọc file)"""
+        return MerkleTree([file_leaf(rel, bytes.fromhex(digest))
+                           for rel, digest in manifest['files']])
+
+    def verify_manifest(self, manifest: Dict[str, Any], public_key_path: str) -> bool:
+        """
+        Xác minh chữ ký của manifest (gốc cây khớp danh sách file và chữ ký hợp lệ)
+
+        Returns:
+            True nếu manifest toàn vẹn và được ký bởi khóa công khai
+        """
+        public_key = self.key_manager.load_public_key(public_key_path)
+        root = bytes.fromhex(manifest['root'])
+        if self._manifest_tree(manifest).root != root:
+            logger.warning("Gốc cây không khớp danh sách file trong manifest")
+            return False
+        return verify_hash(public_key, decode_base64(manifest['signature']), root,
+                           manifest['mode'])
+
+    def verify_tree(self, directory: Union[str, Path],
+                    manifest: Dict[str, Any],
+                    public_key_path: str,
+                    jobs: Optional[int] = None,
+                    exclude: Sequence[Union[str, Path]] = ()) -> Dict[str, Any]:
+        """
+        Xác minh toàn bộ thư mục với manifest
+
+        Returns:
+            Dictionary {valid, modified, missing, extra}
+        """
+        try:
+            if not self.verify_manifest(manifest, public_key_path):
+                return {'valid': False, 'modified': [], 'missing': [], 'extra': [],
+                        'error': 'Chữ ký manifest không hợp lệ'}
+
+            expected = {rel: digest for rel, digest in manifest['files']}
+            present = list_tree_files(directory, exclude)
+            missing = sorted(set(expected) - set(present))
+            extra = sorted(set(present) - set(expected))
+            to_hash = [rel for rel in present if rel in expected]
+            modified = [rel for rel, digest in self.hash_tree(directory, to_hash, jobs)
+                        if digest.hex() != expected[rel]]
+
+            return {
+                'valid': not (modified or missing or extra),
+                'modified': modified,
+                'missing': missing,
+                'extra': extra,
+            }
+        except Exception as e:
+            logger.error("Lỗi khi xác minh thư mục: %s", e)
+            raise RuntimeError(f"Không thể xác minh thư mục: {str(e)}")
+
+    def inclusion_proof(self, manifest: Dict[str, Any], relative_path: str) -> Dict[str, Any]:
+        """
+        Tạo bằng chứng thành viên cho một file trong manifest
+
+        Returns:
+            Dictionary {path, digest, root, proof} có thể gửi kèm file
+        """
+        paths = [rel for rel, _ in manifest['files']]
+        try:
+            index = paths.index(relative_path)
+        except ValueError:
+            raise KeyError(f"File không có trong manifest: {relative_path}")
+        return {
+            'path': relative_path,
+            'digest': manifest['files'][index][1],
+            'root': manifest['root'],
+            'proof': encode_proof(self._manifest_tree(manifest).proof(index)),
+        }
+
+    def verify_file(self, file_path: Union[str, Path],
+                    relative_path: str,
+                    manifest: Dict[str, Any],
+                    public_key_path: str,
+                    proof: Optional[Dict[str, Any]] = None) -> bool:
+        """
+        Xác minh một file bằng bằng chứng thành viên (chỉ hash file này)
+
+        Args:
+            file_path: Đường dẫn file trên đĩa
+            relative_path: Đường dẫn tương đối của file trong manifest
+            manifest: Manifest đã ký (chỉ cần root, signature, mode nếu có proof)
+            public_key_path: Đường dẫn khóa công khai
+            proof: Bằng chứng từ inclusion_proof (tự tạo từ manifest nếu không có)
+
+        Returns:
+            True nếu file khớp với gốc cây đã ký
+        """
+        try:
+            public_key = self.key_manager.load_public_key(public_key_path)
+            root = bytes.fromhex(manifest['root'])
+            if not verify_hash(public_key, decode_base64(manifest['signature']), root,
+                               manifest['mode']):
+                return False
+
+            if proof is None:
+                proof = self.inclusion_proof(manifest, relative_path)
+            if proof['path'] != relative_path or bytes.fromhex(proof['root']) != root:
+                return False
+
+            leaf = file_leaf(relative_path, self.hash_file(file_path))
+            return verify_proof(leaf, decode_proof(proof['proof']), root)
+        except KeyError:
+            return False
+        except Exception as e:
+            logger.error("Lỗi khi xác minh file theo manifest: %s", e)
+            raise RuntimeError(f"Không thể xác minh file: {str(e)}")
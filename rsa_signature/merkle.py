@@ -0,0 +1,109 @@
+"""
+Cây Merkle (SHA-256) với bằng chứng thành viên (inclusion proof)
+"""
+
+import hashlib
+from typing import List, Sequence, Tuple
+
+# Tiền tố phân biệt lá và nút trong (chống tấn công second-preimage, như RFC 6962)
+LEAF_PREFIX = b'\x00'
+NODE_PREFIX = b'\x01'
+
+# Mỗi bước của proof: (nút anh em nằm bên trái?, hash nút anh em)
+ProofStep = Tuple[bool, bytes]
+
+
+def leaf_hash(data: bytes) -> bytes:
+    """Hash của một lá"""
+    return hashlib.sha256(LEAF_PREFIX + data).digest()
+
+
+def node_hash(left: bytes, right: bytes) -> bytes:
+    """Hash của một nút trong"""
+    return hashlib.sha256(NODE_PREFIX + left + right).digest()
+
+
+class MerkleTree:
+    """Cây Merkle xây từ danh sách hash lá; nút lẻ ở mỗi tầng được đưa thẳng lên tầng trên"""
+
+    def __init__(self, leaves: Sequence[bytes]):
+        """
+        Khởi tạo cây Merkle
+
+        Args:
+            leaves: Danh sách hash lá (đã qua leaf_hash) theo thứ tự cố định
+        """
+        self.levels: List[List[bytes]] = [list(leaves)]
+        level = self.levels[0]
+        while len(level) > 1:
+            parents = [node_hash(level[i], level[i + 1])
+                       for i in range(0, len(level) - 1, 2)]
+            if len(level) % 2:
+                parents.append(level[-1])
+            self.levels.append(parents)
+            level = parents
+
+    def __len__(self) -> int:
+        return len(self.levels[0])
+
+    @property
+    def root(self) -> bytes:
+        """Hash gốc (SHA-256 của chuỗi rỗng nếu cây rỗng)"""
+        if not self.levels[0]:
+            return hashlib.sha256(b'').digest()
+        return self.levels[-1][0]
+
+    def proof(self, index: int) -> List[ProofStep]:
+        """
+        Bằng chứng thành viên cho lá thứ index
+
+        Returns:
+            Danh sách (nút anh em bên trái?, hash nút anh em) từ lá lên gốc
+        """
+        if not 0 <= index < len(self):
+            raise IndexError(f"Chỉ số lá ngoài phạm vi: {index}")
+
+        steps: List[ProofStep] = []
+        for level in self.levels[:-1]:
+            sibling = index ^ 1
+            if sibling < len(level):
+                steps.append((sibling < index, level[sibling]))
+            index //= 2
+        return steps
+
+
+def verify_proof(leaf: bytes, proof: Sequence[ProofStep], root: bytes) -> bool:
+    """
+    Kiểm tra bằng chứng thành viên
+
+    Args:
+        leaf: Hash lá (đã qua leaf_hash)
+        proof: Bằng chứng từ MerkleTree.proof
+        root: Hash gốc đã được ký
+
+    Returns:
+        True nếu lá thuộc cây có gốc root
+    """
+    current = leaf
+    for sibling_is_left, sibling in proof:
+        if sibling_is_left:
+            current = node_hash(sibling, current)
+        else:
+            current = node_hash(current, sibling)
+    return current == root
+
+
+def encode_proof(proof: Sequence[ProofStep]) -> List[str]:
+    """Mã hóa proof thành danh sách chuỗi 'L:<hex>' / 'R:<hex>' (dùng cho JSON)"""
+    return [('L:' if is_left else 'R:') + sibling.hex() for is_left, sibling in proof]
+
+
+def decode_proof(encoded: Sequence[str]) -> List[ProofStep]:
+    """Giải mã proof từ encode_proof"""
+    steps = []
+    for item in encoded:
+        side, _, value = item.partition(':')
+        if side not in ('L', 'R'):
+            raise ValueError(f"Bước proof không hợp lệ: {item}")
+        steps.append((side == 'L', bytes.fromhex(value)))
+    return steps
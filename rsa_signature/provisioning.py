@@ -0,0 +1,118 @@
+"""
+Tạo hàng loạt cặp khóa RSA song song trên nhiều tiến trình
+"""
+
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple, Union
+
+from .key_manager import RSAKeyManager, public_key_fingerprint
+from .utils import get_logger, ensure_directory
+
+logger = get_logger()
+
+
+def keypair_paths(output_dir: Union[str, Path], index: int,
+                  prefix: str = 'key') -> Tuple[Path, Path]:
+    """
+    Tên file theo quy ước cho cặp khóa thứ index
+
+    Returns:
+        Tuple (đường dẫn khóa riêng, đường dẫn khóa công khai),
+        ví dụ key-00001.pem và key-00001.pub.pem
+    """
+    name = f"{prefix}-{index:05d}"
+    output_dir = Path(output_dir)
+    return output_dir / f"{name}.pem", output_dir / f"{name}.pub.pem"
+
+
+def _provision_keypair(output_dir: str, index: int, key_size: int,
+                       password: Optional[str], prefix: str) -> Dict[str, Any]:
+    """Tạo và lưu một cặp khóa (chạy trong tiến trình worker); không ghi đè khóa đã có"""
+    started = time.perf_counter()
+    private_key_path, public_key_path = keypair_paths(output_dir, index, prefix)
+    for path in (private_key_path, public_key_path):
+        if os.path.lexists(path):
+            raise FileExistsError(f"File khóa đã tồn tại: {path}")
+
+    key_manager = RSAKeyManager(key_size, use_cache=False)
+    _, public_key = key_manager.generate_keypair()
+    key_manager.save_private_key(str(private_key_path), password)
+    key_manager.save_public_key(str(public_key_path))
+
+    return {
+        'index': index,
+        'private_key': str(private_key_path),
+        'public_key': str(public_key_path),
+        'fingerprint': public_key_fingerprint(public_key),
+        'seconds': round(time.perf_counter() - started, 6),
+    }
+
+
+def provision_keypairs(output_dir: Union[str, Path], count: int,
+                       key_size: int = 2048,
+                       jobs: Optional[int] = None,
+                       password: Optional[str] = None,
+                       prefix: str = 'key',
+                       start_index: int = 1) -> Dict[str, Any]:
+    """
+    Tạo count cặp khóa trên jobs tiến trình worker
+
+    Args:
+        output_dir: Thư mục lưu khóa
+        count: Số cặp khóa cần tạo
+        key_size: Kích thước khóa (2048 hoặc 3072 bit)
+        jobs: Số tiến trình worker (mặc định bằng số CPU)
+        password: Mật khẩu mã hóa các khóa riêng (tùy chọn)
+        prefix: Tiền tố tên file khóa
+        start_index: Chỉ số của cặp khóa đầu tiên
+
+    Returns:
+        Tóm tắt gồm thời gian chạy, danh sách khóa đã tạo (đường dẫn, fingerprint, thời gian)
+        và danh sách lỗi ({'index', 'error'}, ví dụ file khóa đã tồn tại) kèm số lỗi 'failed'
+    """
+    if count < 1:
+        raise ValueError("Số lượng khóa phải lớn hơn 0")
+    if key_size not in [2048, 3072]:
+        raise ValueError("Kích thước khóa phải là 2048 hoặc 3072 bit")
+
+    jobs = jobs or os.cpu_count() or 1
+    ensure_directory(output_dir)
+    logger.info("Đang tạo %s cặp khóa RSA %s bit với %s tiến trình...", count, key_size, jobs)
+
+    started = time.perf_counter()
+    keys: List[Dict[str, Any]] = []
+    errors: List[Dict[str, Any]] = []
+    with ProcessPoolExecutor(max_workers=jobs) as executor:
+        futures = {
+            executor.submit(_provision_keypair, str(output_dir), index,
+                            key_size, password, prefix): index
+            for index in range(start_index, start_index + count)
+        }
+        # Lỗi của một cặp khóa không dừng cả lượt: tóm tắt vẫn liệt kê các khóa đã ghi
+        for future in as_completed(futures):
+            try:
+                keys.append(future.result())
+            except Exception as e:
+                logger.error("Lỗi khi tạo cặp khóa %s: %s", futures[future], e)
+                errors.append({'index': futures[future], 'error': str(e)})
+
+    keys.sort(key=lambda item: item['index'])
+    errors.sort(key=lambda item: item['index'])
+    elapsed = time.perf_counter() - started
+    logger.info("Đã tạo %s cặp khóa trong %.2fs (%s lỗi)", len(keys), elapsed, len(errors))
+
+    return {
+        'count': count,
+        'created': len(keys),
+        'failed': len(errors),
+        'key_size': key_size,
+        'jobs': jobs,
+        'encrypted': bool(password),
+        'elapsed': round(elapsed, 6),
+        'keys_per_second': round(len(keys) / elapsed, 3) if elapsed else None,
+        'keys': keys,
+        'errors': errors,
+    }
@@ -2,34 +2,127 @@
 Chức năng ký file bằng RSA-PSS
 """
 
+import os
+import time
 import hashlib
+from concurrent.futures import (FIRST_COMPLETED, ProcessPoolExecutor,
+                                ThreadPoolExecutor, wait)
+from dataclasses import dataclass
 from pathlib import Path
-from typing import Union, Optional
-from cryptography.hazmat.primitives import hashes
+from typing import BinaryIO, Iterable, Iterator, Tuple, Union, Optional
+from cryptography.hazmat.primitives import hashes, serialization
 from cryptography.hazmat.primitives.asymmetric import rsa, padding
 from cryptography.exceptions import InvalidSignature
 
-from .utils import setup_logging, hash_file, safe_file_write, encode_base64
+from .utils import (get_logger, hash_file_mode, safe_file_write, encode_base64,
+                    SIGNATURE_MODE_LEGACY, HASH_MODE_SHA256)
 from .key_manager import RSAKeyManager
+from .digest_cache import DigestCache
+from .context import SigningContext
+from .constants import ENVELOPE_FORMATS, SIGNATURE_FORMATS
+from .envelope import SignatureEnvelope
+from .sigstore import SignatureStore
 
-logger = setup_logging()
+logger = get_logger()
+
+# Số chữ ký ghi vào SignatureStore mỗi lượt (một lần fsync cho mỗi lượt)
+STORE_BATCH_SIZE = 256
+
+def default_signature_format(hash_mode: str = HASH_MODE_SHA256) -> str:
+    """
+    Định dạng chữ ký mặc định: 'binary' với SHA-256, 'envelope' với chế độ hash khác
+    (envelope ghi lại chế độ hash để bên xác minh tự chọn đúng thuật toán)
+    """
+    return 'binary' if hash_mode == HASH_MODE_SHA256 else 'envelope'
+
+def sign_hash(private_key: rsa.RSAPrivateKey, file_hash: bytes,
+              mode: str = SIGNATURE_MODE_LEGACY,
+              hash_mode: str = HASH_MODE_SHA256) -> bytes:
+    """
+    Ký giá trị hash của file bằng RSA-PSS
+    
+    Args:
+        private_key: Khóa riêng RSA
+        file_hash: Digest của file (SHA-256 mặc định)
+        mode: Chế độ chữ ký ('v1' mặc định, 'v2' dùng Prehashed)
+        hash_mode: Chế độ hash đã tạo digest ('sha256' mặc định)
+        
+    Returns:
+        Chữ ký dưới dạng bytes
+    """
+    return SigningContext(private_key, mode, hash_mode).sign_digest(file_hash)
+
+@dataclass
+class SignResult:
+    """Kết quả ký một file trong sign_many"""
+    path: str
+    signature: Optional[bytes] = None
+    signature_path: Optional[str] = None
+    error: Optional[str] = None
+    seconds: float = 0.0
+    
+    @property
+    def ok(self) -> bool:
+        return self.error is None
+
+# Context ký của tiến trình worker (nạp một lần qua initializer)
+_worker_context = None
+
+def _init_sign_worker(private_der: bytes, mode: str, hash_mode: str) -> None:
+    """Nạp khóa riêng vào tiến trình worker"""
+    global _worker_context
+    _worker_context = SigningContext(
+        serialization.load_der_private_key(private_der, password=None), mode, hash_mode
+    )
+
+def _sign_in_worker(file_hash: bytes) -> bytes:
+    """Ký hash trong tiến trình worker"""
+    return _worker_context.sign_digest(file_hash)
 
 class RSASigner:
     """Ký file bằng RSA-PSS"""
     
-    def __init__(self, key_manager: Optional[RSAKeyManager] = None):
+    def __init__(self, key_manager: Optional[RSAKeyManager] = None,
+                 digest_cache: Optional[DigestCache] = None):
         """
         Khởi tạo RSA Signer
         
         Args:
             key_manager: RSA Key Manager (tùy chọn)
+            digest_cache: Cache digest file để bỏ qua hash lại file không đổi (tùy chọn)
         """
         self.key_manager = key_manager or RSAKeyManager()
+        self.digest_cache = digest_cache
+    
+    def hash_file(self, file_path: Union[str, Path],
+                  hash_mode: str = HASH_MODE_SHA256) -> bytes:
+        """Digest của file theo chế độ hash (SHA-256 qua digest cache nếu có)"""
+        if self.digest_cache is not None and hash_mode == HASH_MODE_SHA256:
+            return self.digest_cache.digest(file_path)
+        return hash_file_mode(file_path, hash_mode)
+    
+    def signing_context(self, private_key_path: str,
+                        password: Optional[str] = None,
+                        mode: str = SIGNATURE_MODE_LEGACY,
+                        hash_mode: str = HASH_MODE_SHA256) -> SigningContext:
+        """
+        Context ký bất biến cho một khóa (có thể dùng chung giữa các luồng)
+        
+        Args:
+            private_key_path: Đường dẫn khóa riêng
+            password: Mật khẩu khóa riêng (nếu có)
+            mode: Chế độ chữ ký ('v1' mặc định, 'v2' dùng Prehashed)
+            hash_mode: Chế độ hash ('sha256' mặc định, xem HASH_MODES)
+        """
+        return SigningContext.from_file(private_key_path, password, mode, self.key_manager,
+                                        hash_mode)
     
     def sign_file(self, file_path: Union[str, Path], 
                   private_key_path: str, 
                   password: Optional[str] = None,
-                  output_format: str = 'binary') -> bytes:
+                  output_format: str = 'binary',
+                  mode: str = SIGNATURE_MODE_LEGACY,
+                  hash_mode: str = HASH_MODE_SHA256) -> bytes:
         """
         Ký file bằng RSA-PSS
         
@@ -38,69 +131,169 @@ class RSASigner:
             private_key_path: Đường dẫn khóa riêng
             password: Mật khẩu khóa riêng (nếu có)
             output_format: Định dạng output ('binary' hoặc 'base64')
+            mode: Chế độ chữ ký ('v1' mặc định, 'v2' dùng Prehashed)
+            hash_mode: Chế độ hash file ('sha256' mặc định)
             
         Returns:
             Chữ ký dưới dạng bytes
         """
         try:
-            logger.info(f"Đang ký file: {file_path}")
+            logger.info("Đang ký file: %s", file_path)
             
             # Tải khóa riêng
-            private_key = self.key_manager.load_private_key(private_key_path, password)
+            context = self.signing_context(private_key_path, password, mode, hash_mode)
             
-            # Hash file bằng SHA-256
-            file_hash = hash_file(file_path)
-            logger.info("Đã hash file bằng SHA-256")
+            # Hash file (SHA-256 mặc định)
+            file_hash = self.hash_file(file_path, hash_mode)
+            logger.info("Đã hash file bằng %s", hash_mode)
             
             # Ký hash bằng RSA-PSS
-            signature = private_key.sign(
-                file_hash,
-                padding.PSS(
-                    mgf=padding.MGF1(hashes.SHA256()),
-                    salt_length=padding.PSS.MAX_LENGTH
-                ),
-                hashes.SHA256()
-            )
+            signature = context.sign_digest(file_hash)
             
             logger.info("Đã ký file thành công")
             return signature
             
         except Exception as e:
-            logger.error(f"Lỗi khi ký file: {str(e)}")
+            logger.error("Lỗi khi ký file: %s", e)
             raise RuntimeError(f"Không thể ký file: {str(e)}")
     
-    def save_signature(self, signature: bytes, 
+    def sign_bytes(self, data: Union[bytes, bytearray, memoryview],
+                   private_key_path: str,
+                   password: Optional[str] = None,
+                   mode: str = SIGNATURE_MODE_LEGACY,
+                   hash_mode: str = HASH_MODE_SHA256) -> bytes:
+        """
+        Ký dữ liệu trong bộ nhớ (không cần ghi ra file)
+        
+        Args:
+            data: Dữ liệu cần ký (bytes, bytearray hoặc memoryview, không bị sao chép)
+            private_key_path: Đường dẫn khóa riêng
+            password: Mật khẩu khóa riêng (nếu có)
+            mode: Chế độ chữ ký ('v1' mặc định, 'v2' dùng Prehashed)
+            hash_mode: Chế độ hash ('sha256' mặc định)
+            
+        Returns:
+            Chữ ký dưới dạng bytes
+        """
+        try:
+            context = self.signing_context(private_key_path, password, mode, hash_mode)
+            return context.sign_bytes(data)
+        except Exception as e:
+            logger.error("Lỗi khi ký dữ liệu: %s", e)
+            raise RuntimeError(f"Không thể ký dữ liệu: {str(e)}")
+    
+    def sign_stream(self, stream: Union[BinaryIO, Iterable[bytes]],
+                    private_key_path: str,
+                    password: Optional[str] = None,
+                    mode: str = SIGNATURE_MODE_LEGACY,
+                    hash_mode: str = HASH_MODE_SHA256) -> bytes:
+        """
+        Ký dữ liệu đọc dần từ stream (pipe, socket, file đã mở...)
+        
+        Args:
+            stream: File-like object nhị phân hoặc iterator các chunk bytes
+            private_key_path: Đường dẫn khóa riêng
+            password: Mật khẩu khóa riêng (nếu có)
+            mode: Chế độ chữ ký ('v1' mặc định, 'v2' dùng Prehashed)
+            hash_mode: Chế độ hash ('sha256' mặc định, không hỗ trợ chế độ tree)
+            
+        Returns:
+            Chữ ký dưới dạng bytes
+        """
+        try:
+            # Tải khóa trước để lỗi khóa không làm tiêu thụ stream
+            context = self.signing_context(private_key_path, password, mode, hash_mode)
+            return context.sign_stream(stream)
+        except Exception as e:
+            logger.error("Lỗi khi ký stream: %s", e)
+            raise RuntimeError(f"Không thể ký stream: {str(e)}")
+    
+    def sign_digest(self, digest: bytes,
+                    private_key_path: str,
+                    password: Optional[str] = None,
+                    mode: str = SIGNATURE_MODE_LEGACY,
+                    hash_mode: str = HASH_MODE_SHA256) -> bytes:
+        """
+        Ký digest đã được tính ở phía client (không cần thấy dữ liệu gốc)
+        
+        Args:
+            digest: Digest của dữ liệu (SHA-256 32 byte mặc định)
+            private_key_path: Đường dẫn khóa riêng
+            password: Mật khẩu khóa riêng (nếu có)
+            mode: Chế độ chữ ký ('v1' tương thích sign_file mặc định,
+                  'v2' ký trực tiếp digest bằng Prehashed)
+            hash_mode: Chế độ hash đã tạo digest ('sha256' mặc định)
+            
+        Returns:
+            Chữ ký dưới dạng bytes
+        """
+        try:
+            context = self.signing_context(private_key_path, password, mode, hash_mode)
+            return context.sign_digest(digest)
+        except Exception as e:
+            logger.error("Lỗi khi ký digest: %s", e)
+            raise RuntimeError(f"Không thể ký digest: {str(e)}")
+    
+    @staticmethod
+    def encode_signature(signature: Union[bytes, SignatureEnvelope],
+                         format_type: str = 'binary') -> bytes:
+        """
+        Nội dung file chữ ký theo định dạng (dùng cho file và SignatureStore)
+        
+        Args:
+            signature: Chữ ký (hoặc SignatureEnvelope)
+            format_type: 'binary', 'base64', 'envelope' hoặc 'armored'
+        """
+        if format_type in ENVELOPE_FORMATS:
+            if not isinstance(signature, SignatureEnvelope):
+                raise ValueError("Định dạng envelope cần SignatureEnvelope")
+            if format_type == 'armored':
+                return signature.to_armored().encode('ascii')
+            return signature.to_bytes()
+        
+        if isinstance(signature, SignatureEnvelope):
+            signature = signature.signature
+        if format_type == 'base64':
+            return encode_base64(signature).encode('ascii')
+        return bytes(signature)
+    
+    def save_signature(self, signature: Union[bytes, SignatureEnvelope], 
                       output_path: Union[str, Path],
                       format_type: str = 'binary') -> None:
         """
         Lưu chữ ký ra file
         
         Args:
-            signature: Chữ ký
+            signature: Chữ ký (hoặc SignatureEnvelope)
             output_path: Đường dẫn file output
-            format_type: Định dạng ('binary' cho .sig, 'base64' cho .b64)
+            format_type: Định dạng ('binary' cho .sig, 'base64' cho .b64,
+                         'envelope' cho .rsig, 'armored' cho .rsig.asc)
         """
         try:
-            if format_type == 'base64':
-                # Lưu dưới dạng base64
-                signature_b64 = encode_base64(signature)
-                safe_file_write(output_path, signature_b64, 'w')
-
-            else:
-                # Lưu dưới dạng binary
-                safe_file_write(output_path, signature)
+            safe_file_write(output_path, self.encode_signature(signature, format_type))
             
-            logger.info(f"Đã lưu chữ ký vào {output_path}")
+            logger.info("Đã lưu chữ ký vào %s", output_path)
             
         except Exception as e:
-            logger.error(f"Lỗi khi lưu chữ ký: {str(e)}")
+            logger.error("Lỗi khi lưu chữ ký: %s", e)
             raise IOError(f"Không thể lưu chữ ký: {str(e)}")
     
+    @staticmethod
+    def default_signature_path(file_path: Union[str, Path],
+                               format_type: str = 'binary') -> Path:
+        """Tên file chữ ký mặc định: <file>.sig, <file>.b64, <file>.rsig hoặc <file>.rsig.asc"""
+        file_path = Path(file_path)
+        suffix = {'base64': '.b64', 'envelope': '.rsig', 'armored': '.rsig.asc'}.get(format_type, '.sig')
+        return file_path.with_suffix(file_path.suffix + suffix)
+    
     def sign_and_save(self, file_path: Union[str, Path],
                      private_key_path: str,
                      signature_path: Optional[Union[str, Path]] = None,
                      password: Optional[str] = None,
-                     format_type: str = 'binary') -> str:
+                     format_type: Optional[str] = None,
+                     mode: str = SIGNATURE_MODE_LEGACY,
+                     timestamp: bool = False,
+                     hash_mode: str = HASH_MODE_SHA256) -> str:
         """
         Ký file và lưu chữ ký
         
@@ -109,22 +302,31 @@ class RSASigner:
             private_key_path: Đường dẫn khóa riêng
             signature_path: Đường dẫn lưu chữ ký (tự động nếu None)
             password: Mật khẩu khóa riêng
-            format_type: Định dạng chữ ký ('binary' hoặc 'base64')
+            format_type: Định dạng chữ ký ('binary', 'base64', 'envelope' hoặc 'armored';
+                         mặc định theo default_signature_format)
+            mode: Chế độ chữ ký ('v1' mặc định, 'v2' dùng Prehashed)
+            timestamp: Ghi thời điểm ký vào envelope (chỉ với định dạng envelope)
+            hash_mode: Chế độ hash file ('sha256' mặc định)
             
         Returns:
             Đường dẫn file chữ ký đã lưu
         """
+        format_type = format_type or default_signature_format(hash_mode)
         try:
             # Ký file
-            signature = self.sign_file(file_path, private_key_path, password)
+            if format_type in ENVELOPE_FORMATS:
+                context = self.signing_context(private_key_path, password, mode, hash_mode)
+                signature = SignatureEnvelope.create(
+                    context.sign_digest(self.hash_file(file_path, hash_mode)),
+                    context.public_key, mode, hash_mode, timestamp
+                )
+            else:
+                signature = self.sign_file(file_path, private_key_path, password,
+                                           mode=mode, hash_mode=hash_mode)
             
             # Tự động tạo tên file chữ ký nếu không có
             if signature_path is None:
-                file_path = Path(file_path)
-                if format_type == 'base64':
-                    signature_path = file_path.with_suffix(file_path.suffix + '.b64')
-                else:
-                    signature_path = file_path.with_suffix(file_path.suffix + '.sig')
+                signature_path = self.default_signature_path(file_path, format_type)
             
             # Lưu chữ ký
             self.save_signature(signature, signature_path, format_type)
@@ -132,5 +334,124 @@ class RSASigner:
             return str(signature_path)
             
         except Exception as e:
-            logger.error(f"Lỗi trong quá trình ký và lưu: {str(e)}")
-            raise RuntimeError(f"Không thể ký và lưu file: {str(e)}")
\ No newline at end of file
+            logger.error("Lỗi trong quá trình ký và lưu: %s", e)
+            raise RuntimeError(f"Không thể ký và lưu file: {str(e)}")
+    
+    def sign_many(self, paths: Iterable[Union[str, Path]],
+                  private_key_path: str,
+                  password: Optional[str] = None,
+                  jobs: Optional[int] = None,
+                  sign_processes: int = 0,
+                  save: bool = False,
+                  format_type: Optional[str] = None,
+                  mode: str = SIGNATURE_MODE_LEGACY,
+                  hash_mode: str = HASH_MODE_SHA256,
+                  store: Optional[SignatureStore] = None) -> Iterator[SignResult]:
+        """
+        Ký nhiều file: tải khóa một lần, hash song song, trả kết quả theo thứ tự hoàn thành
+        
+        Args:
+            paths: Danh sách (hoặc iterator) đường dẫn file cần ký
+            private_key_path: Đường dẫn khóa riêng
+            password: Mật khẩu khóa riêng (nếu có)
+            jobs: Số luồng hash/ký song song (mặc định bằng số CPU)
+            sign_processes: Số tiến trình thực hiện phép ký RSA (0 = ký ngay trong luồng hash)
+            save: Lưu chữ ký cạnh mỗi file (<file>.sig, <file>.rsig...)
+            format_type: Định dạng chữ ký khi lưu ('binary', 'base64', 'envelope' hoặc 'armored';
+                         mặc định theo default_signature_format)
+            mode: Chế độ chữ ký ('v1' mặc định, 'v2' dùng Prehashed)
+            hash_mode: Chế độ hash file ('sha256' mặc định)
+            store: Ghi chữ ký vào SignatureStore (khóa là đường dẫn file) thay cho file riêng;
+                   ghi theo lượt STORE_BATCH_SIZE chữ ký, kết quả được trả sau khi lượt đã fsync
+            
+        Yields:
+            SignResult cho từng file; lỗi của một file không làm dừng cả lô
+        """
+        jobs = jobs or os.cpu_count() or 1
+        format_type = format_type or default_signature_format(hash_mode)
+        context = self.signing_context(private_key_path, password, mode, hash_mode)
+        public_key = context.public_key
+        
+        sign_pool = None
+        if sign_processes > 0:
+            private_der = context.private_key.private_bytes(
+                encoding=serialization.Encoding.DER,
+                format=serialization.PrivateFormat.PKCS8,
+                encryption_algorithm=serialization.NoEncryption()
+            )
+            sign_pool = ProcessPoolExecutor(max_workers=sign_processes,
+                                            initializer=_init_sign_worker,
+                                            initargs=(private_der, mode, hash_mode))
+        
+        def process(path: Union[str, Path]) -> Tuple[SignResult, Optional[bytes]]:
+            started = time.perf_counter()
+            result = SignResult(path=str(path))
+            encoded = None
+            try:
+                # hashlib nhả GIL khi hash nên các luồng đọc/hash song song; trong lúc
+                # một luồng chờ phép ký RSA, luồng khác tiếp tục đọc file tiếp theo
+                file_hash = self.hash_file(path, hash_mode)
+                if sign_pool is not None:
+                    result.signature = sign_pool.submit(_sign_in_worker, file_hash).result()
+                else:
+                    result.signature = context.sign_digest(file_hash)
+                if save or store is not None:
+                    signature = result.signature
+                    if format_type in ENVELOPE_FORMATS:
+                        signature = SignatureEnvelope.create(signature, public_key, mode, hash_mode)
+                    if store is not None:
+                        encoded = self.encode_signature(signature, format_type)
+                        result.signature_path = str(store.pack_path)
+                    else:
+                        signature_path = self.default_signature_path(path, format_type)
+                        self.save_signature(signature, signature_path, format_type)
+                        result.signature_path = str(signature_path)
+            except Exception as e:
+                result.error = str(e)
+                logger.error("Lỗi khi ký file %s: %s", path, e)
+            result.seconds = time.perf_counter() - started
+            return result, encoded
+        
+        batch = []
+        
+        def flush() -> Iterator[SignResult]:
+            items = [(result.path, encoded) for result, encoded in batch if encoded is not None]
+            if items:
+                try:
+                    store.put_many(items)
+                except Exception as e:
+                    logger.error("Lỗi khi ghi chữ ký vào kho: %s", e)
+                    for result, encoded in batch:
+                        if encoded is not None:
+                            result.error = str(e)
+                            result.signature_path = None
+            for result, _ in batch:
+                yield result
+            batch.clear()
+        
+        def collect(done) -> Iterator[SignResult]:
+            for future in done:
+                if store is None:
+                    yield future.result()[0]
+                    continue
+                batch.append(future.result())
+                if len(batch) >= STORE_BATCH_SIZE:
+                    yield from flush()
+        
+        # Giới hạn số file đang xử lý để bộ nhớ không tăng theo kích thước lô
+        max_in_flight = jobs * 2
+        try:
+            with ThreadPoolExecutor(max_workers=jobs) as pool:
+                pending = set()
+                for path in paths:
+                    pending.add(pool.submit(process, path))
+                    if len(pending) >= max_in_flight:
+                        done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                        yield from collect(done)
+                while pending:
+                    done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                    yield from collect(done)
+                yield from flush()
+        finally:
+            if sign_pool is not None:
+                sign_pool.shutdown()
\ No newline at end of file
@@ -0,0 +1,450 @@
+"""
+Kho chữ ký dạng pack append-only: một file pack và một chỉ mục SQLite (khóa -> offset)
+thay cho hàng triệu file .sig nhỏ
+
+Định dạng pack (big-endian):
+    header: magic 'RSPK' (4) | phiên bản (1)
+    bản ghi: độ dài khóa (2) | độ dài dữ liệu (4) | CRC32(khóa + dữ liệu) (4) | khóa | dữ liệu
+Dữ liệu rỗng là tombstone (đánh dấu xóa). Khóa là b'p' + đường dẫn tuyệt đối (UTF-8) hoặc
+b'd' + digest của artifact. Dữ liệu là nội dung file chữ ký (binary, base64 hoặc envelope).
+
+Ghi theo lô chỉ fsync một lần; đọc qua mmap; compact() ghi lại pack chỉ gồm bản ghi còn
+hiệu lực. Pack được ghi (và fsync) trước chỉ mục: khi mở lại, phần đuôi pack chưa có trong
+chỉ mục được quét lại và bản ghi ghi dở bị cắt bỏ. Mỗi lô ghi giữ flock trên pack (POSIX)
+và trước tiên đưa vào chỉ mục phần đuôi do SignatureStore khác (cùng pack) đã ghi.
+"""
+
+import mmap
+import os
+import sqlite3
+import struct
+import threading
+import zlib
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, Dict, Iterable, Iterator, Optional, Tuple, Union
+
+from .utils import get_logger
+
+try:
+    import fcntl
+except ImportError:  # Windows: không khóa pack giữa các tiến trình
+    fcntl = None
+
+logger = get_logger()
+
+PACK_MAGIC = b'RSPK'
+PACK_VERSION = 1
+
+_PACK_HEADER = struct.Struct('>4sB')
+_RECORD = struct.Struct('>HII')
+_MAX_KEY_SIZE = 0xFFFF
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS signatures (
+    key    BLOB PRIMARY KEY,
+    offset INTEGER NOT NULL,
+    length INTEGER NOT NULL
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS meta (
+    name  TEXT PRIMARY KEY,
+    value INTEGER NOT NULL
+);
+"""
+
+StoreKey = Union[str, Path, bytes]
+
+
+class SignatureStoreError(IOError):
+    """Pack hoặc chỉ mục của kho chữ ký bị hỏng"""
+
+
+def store_key(key: StoreKey) -> bytes:
+    """Khóa trong kho: bytes là digest của artifact, str / Path là đường dẫn file"""
+    if isinstance(key, (bytes, bytearray, memoryview)):
+        return b'd' + bytes(key)
+    return b'p' + os.path.abspath(key).encode('utf-8')
+
+
+def _fsync_directory(directory: Path) -> None:
+    """fsync thư mục để os.replace bền vững (POSIX; Windows không hỗ trợ mở thư mục)"""
+    if os.name != 'posix':
+        return
+    fd = os.open(directory, os.O_RDONLY)
+    try:
+        os.fsync(fd)
+    finally:
+        os.close(fd)
+
+
+def _record_crc(key: bytes, data: bytes) -> int:
+    return zlib.crc32(data, zlib.crc32(key))
+
+
+class SignatureStore:
+    """Kho chữ ký append-only (an toàn khi dùng chung giữa các luồng)"""
+
+    INDEX_SUFFIX = '.idx.sqlite3'
+
+    def __init__(self, pack_path: Union[str, Path],
+                 index_path: Optional[Union[str, Path]] = None,
+                 fsync: bool = True):
+        """
+        Mở (hoặc tạo) kho chữ ký
+
+        Args:
+            pack_path: Đường dẫn file pack
+            index_path: Đường dẫn chỉ mục SQLite (mặc định <pack>.idx.sqlite3)
+            fsync: fsync pack sau mỗi lô ghi (tắt chỉ khi chấp nhận mất lô cuối khi mất điện)
+        """
+        self.pack_path = Path(pack_path)
+        self.index_path = (Path(index_path) if index_path is not None
+                           else self.pack_path.with_name(self.pack_path.name + self.INDEX_SUFFIX))
+        self.fsync = fsync
+        self._lock = threading.RLock()
+        self._mmap: Optional[mmap.mmap] = None
+        self._open_pack()
+        self._db = sqlite3.connect(str(self.index_path), check_same_thread=False)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        with self._db:
+            self._db.executescript(_SCHEMA)
+        self._recover()
+
+    def _open_pack(self) -> None:
+        """Mở file pack ở chế độ append, tạo header nếu file mới"""
+        self._pack = open(self.pack_path, 'a+b')
+        self._size = os.fstat(self._pack.fileno()).st_size
+        if self._size == 0:
+            self._pack.write(_PACK_HEADER.pack(PACK_MAGIC, PACK_VERSION))
+            self._pack.flush()
+            os.fsync(self._pack.fileno())
+            self._size = _PACK_HEADER.size
+            return
+        self._pack.seek(0)
+        header = self._pack.read(_PACK_HEADER.size)
+        if len(header) < _PACK_HEADER.size or _PACK_HEADER.unpack(header) != (PACK_MAGIC, PACK_VERSION):
+            self._pack.close()
+            raise SignatureStoreError(f"File không phải pack chữ ký hợp lệ: {self.pack_path}")
+
+    def _view(self, end: int) -> mmap.mmap:
+        """mmap chỉ đọc của pack, map lại khi pack đã lớn hơn vùng đang map"""
+        if self._mmap is None or len(self._mmap) < end:
+            if self._mmap is not None:
+                self._mmap.close()
+            self._mmap = mmap.mmap(self._pack.fileno(), 0, access=mmap.ACCESS_READ)
+        return self._mmap
+
+    def _indexed_size(self) -> int:
+        row = self._db.execute("SELECT value FROM meta WHERE name = 'indexed_size'").fetchone()
+        return row[0] if row is not None else _PACK_HEADER.size
+
+    def _scan(self, start: int) -> Iterator[Tuple[bytes, int, int, int]]:
+        """
+        Duyệt bản ghi từ offset start
+
+        Yields:
+            Tuple (khóa, offset dữ liệu, độ dài dữ liệu, offset bản ghi kế tiếp); dừng ở
+            bản ghi ghi dở hoặc sai CRC
+        """
+        view = self._view(self._size)
+        offset = start
+        while offset + _RECORD.size <= self._size:
+            key_length, data_length, crc = _RECORD.unpack_from(view, offset)
+            key_start = offset + _RECORD.size
+            data_start = key_start + key_length
+            end = data_start + data_length
+            if key_length == 0 or end > self._size:
+                return
+            key = view[key_start:data_start]
+            if _record_crc(key, view[data_start:end]) != crc:
+                return
+            yield key, data_start, data_length, end
+            offset = end
+
+    def _apply_scan(self, start: int) -> int:
+        """Đưa bản ghi từ start vào chỉ mục (gọi trong transaction); trả về offset quét được"""
+        valid_end = start
+        for key, data_offset, length, end in self._scan(start):
+            if length:
+                self._db.execute("INSERT OR REPLACE INTO signatures VALUES (?, ?, ?)",
+                                 (key, data_offset, length))
+            else:
+                self._db.execute("DELETE FROM signatures WHERE key = ?", (key,))
+            valid_end = end
+        return valid_end
+
+    def _recover(self) -> None:
+        """Đồng bộ chỉ mục với pack sau khi mở (ghi dở, chỉ mục cũ hoặc mất chỉ mục)"""
+        with self._lock:
+            indexed = self._indexed_size()
+            if indexed == self._size:
+                return
+            if indexed > self._size:
+                logger.warning("Chỉ mục kho chữ ký không khớp pack, dựng lại: %s", self.pack_path)
+                self.rebuild_index()
+                return
+            with self._db:
+                valid_end = self._apply_scan(indexed)
+                if valid_end < self._size:
+                    logger.warning("Cắt %s byte ghi dở ở cuối pack %s",
+                                   self._size - valid_end, self.pack_path)
+                    self._truncate(valid_end)
+                self._set_indexed_size(self._size)
+
+    def _truncate(self, size: int) -> None:
+        if self._mmap is not None:
+            self._mmap.close()
+            self._mmap = None
+        self._pack.truncate(size)
+        os.fsync(self._pack.fileno())
+        self._size = size
+
+    def _discard_partial_write(self, size: int) -> None:
+        """Bỏ phần lô ghi dở sau lỗi I/O: mở lại pack (bỏ bộ đệm chưa ghi) và cắt về size"""
+        try:
+            self._pack.close()
+        except OSError:
+            pass
+        if self._mmap is not None:
+            self._mmap.close()
+            self._mmap = None
+        self._open_pack()
+        if self._size != size:
+            self._truncate(size)
+        logger.warning("Ghi pack thất bại, đã bỏ lô ghi dở: %s", self.pack_path)
+
+    def _set_indexed_size(self, size: int) -> None:
+        self._db.execute("INSERT OR REPLACE INTO meta VALUES ('indexed_size', ?)", (size,))
+
+    def rebuild_index(self) -> int:
+        """
+        Dựng lại chỉ mục từ pack
+
+        Returns:
+            Số chữ ký còn hiệu lực
+        """
+        with self._lock:
+            with self._db:
+                self._db.execute("DELETE FROM signatures")
+                valid_end = self._apply_scan(_PACK_HEADER.size)
+                if valid_end < self._size:
+                    self._truncate(valid_end)
+                self._set_indexed_size(self._size)
+            return len(self)
+
+    @contextmanager
+    def _pack_lock(self):
+        """Khóa ghi pack giữa các SignatureStore và tiến trình dùng chung pack (flock)"""
+        if fcntl is None:
+            yield
+            return
+        # fd riêng: _discard_partial_write mở lại self._pack nhưng khóa vẫn được giữ
+        fd = os.open(self.pack_path, os.O_RDONLY)
+        try:
+            fcntl.flock(fd, fcntl.LOCK_EX)
+            yield
+        finally:
+            os.close(fd)
+
+    def _sync_tail(self) -> None:
+        """Đưa vào chỉ mục bản ghi mà SignatureStore khác đã nối vào pack (gọi khi giữ khóa pack)"""
+        end = self._pack.seek(0, os.SEEK_END)
+        if end == self._size:
+            return
+        if end < self._size:
+            raise SignatureStoreError(f"Pack bị thu nhỏ bởi tiến trình khác: {self.pack_path}")
+        start, self._size = self._size, end
+        with self._db:
+            valid_end = self._apply_scan(start)
+            if valid_end < end:
+                if fcntl is None:
+                    raise SignatureStoreError(f"Đuôi pack không đọc được: {self.pack_path}")
+                # Đang giữ flock nên phần đuôi này là lô ghi dở của tiến trình đã dừng
+                logger.warning("Cắt %s byte ghi dở ở cuối pack %s", end - valid_end, self.pack_path)
+                self._truncate(valid_end)
+            self._set_indexed_size(self._size)
+
+    def _append(self, records: Iterable[Tuple[bytes, bytes]]) -> int:
+        """Ghi một lô bản ghi (một lần write, một lần fsync) rồi cập nhật chỉ mục"""
+        with self._lock, self._pack_lock():
+            self._sync_tail()
+            buffer = bytearray()
+            entries = []
+            for key, data in records:
+                if len(key) > _MAX_KEY_SIZE:
+                    raise ValueError("Khóa của chữ ký quá dài")
+                data_offset = self._size + len(buffer) + _RECORD.size + len(key)
+                buffer += _RECORD.pack(len(key), len(data), _record_crc(key, data))
+                buffer += key
+                buffer += data
+                entries.append((key, data_offset, len(data)))
+            if not entries:
+                return 0
+
+            try:
+                self._pack.write(buffer)
+                self._pack.flush()
+                if self.fsync:
+                    os.fsync(self._pack.fileno())
+            except OSError:
+                self._discard_partial_write(self._size)
+                raise
+            self._size += len(buffer)
+
+            with self._db:
+                for key, data_offset, length in entries:
+                    if length:
+                        self._db.execute("INSERT OR REPLACE INTO signatures VALUES (?, ?, ?)",
+                                         (key, data_offset, length))
+                    else:
+                        self._db.execute("DELETE FROM signatures WHERE key = ?", (key,))
+                self._set_indexed_size(self._size)
+            return len(entries)
+
+    def put_many(self, items: Iterable[Tuple[StoreKey, bytes]]) -> int:
+        """
+        Thêm (hoặc thay thế) nhiều chữ ký trong một lô
+
+        Args:
+            items: Các cặp (đường dẫn file hoặc digest artifact, nội dung file chữ ký)
+
+        Returns:
+            Số chữ ký đã ghi
+        """
+        def records():
+            for key, data in items:
+                data = bytes(data)
+                if not data:
+                    raise ValueError("Chữ ký rỗng")
+                yield store_key(key), data
+        try:
+            return self._append(records())
+        except ValueError:
+            raise
+        except Exception as e:
+            logger.error("Lỗi khi ghi kho chữ ký: %s", e)
+            raise IOError(f"Không thể ghi kho chữ ký: {str(e)}")
+
+    def put(self, key: StoreKey, data: bytes) -> None:
+        """Thêm (hoặc thay thế) một chữ ký; ghi nhiều chữ ký nên dùng put_many"""
+        self.put_many([(key, data)])
+
+    def get(self, key: StoreKey) -> Optional[bytes]:
+        """
+        Đọc chữ ký (qua mmap, kiểm tra CRC)
+
+        Args:
+            key: Đường dẫn file hoặc digest artifact
+
+        Returns:
+            Nội dung file chữ ký, hoặc None nếu không có
+        """
+        raw_key = store_key(key)
+        with self._lock:
+            row = self._db.execute("SELECT offset, length FROM signatures WHERE key = ?",
+                                   (raw_key,)).fetchone()
+            if row is None:
+                return None
+            offset, length = row
+            record_offset = offset - len(raw_key) - _RECORD.size
+            view = self._view(offset + length)
+            key_length, data_length, crc = _RECORD.unpack_from(view, record_offset)
+            data = view[offset:offset + length]
+        if (key_length, data_length) != (len(raw_key), length) or _record_crc(raw_key, data) != crc:
+            raise SignatureStoreError(f"Bản ghi chữ ký bị hỏng trong {self.pack_path}")
+        return data
+
+    def delete(self, key: StoreKey) -> bool:
+        """
+        Xóa chữ ký (ghi tombstone, dung lượng được thu hồi khi compact)
+
+        Returns:
+            True nếu chữ ký tồn tại
+        """
+        raw_key = store_key(key)
+        with self._lock:
+            if not self._has(raw_key):
+                return False
+            self._append([(raw_key, b'')])
+            return True
+
+    def _has(self, raw_key: bytes) -> bool:
+        with self._lock:
+            return self._db.execute("SELECT 1 FROM signatures WHERE key = ?",
+                                    (raw_key,)).fetchone() is not None
+
+    def __contains__(self, key: StoreKey) -> bool:
+        return self._has(store_key(key))
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._db.execute("SELECT COUNT(*) FROM signatures").fetchone()[0]
+
+    def stats(self) -> Dict[str, Any]:
+        """Số chữ ký, kích thước pack và phần dung lượng có thể thu hồi bằng compact()"""
+        with self._lock:
+            count, live = self._db.execute(
+                "SELECT COUNT(*), COALESCE(SUM(length + LENGTH(key)), 0) FROM signatures"
+            ).fetchone()
+            live += count * _RECORD.size + _PACK_HEADER.size
+            return {'signatures': count, 'pack_bytes': self._size,
+                    'garbage_bytes': self._size - live}
+
+    def compact(self) -> int:
+        """
+        Ghi lại pack chỉ gồm bản ghi còn hiệu lực (bỏ bản ghi bị thay thế và tombstone)
+
+        Returns:
+            Số byte đã thu hồi
+        """
+        with self._lock:
+            try:
+                old_size = self._size
+                temp_path = self.pack_path.with_name(self.pack_path.name + '.compact')
+                view = self._view(self._size)
+                moved = []
+                with open(temp_path, 'wb') as output:
+                    output.write(_PACK_HEADER.pack(PACK_MAGIC, PACK_VERSION))
+                    position = _PACK_HEADER.size
+                    rows = self._db.execute(
+                        "SELECT key, offset, length FROM signatures ORDER BY offset"
+                    ).fetchall()
+                    for key, offset, length in rows:
+                        record_offset = offset - len(key) - _RECORD.size
+                        output.write(view[record_offset:offset + length])
+                        moved.append((position + _RECORD.size + len(key), key))
+                        position += offset + length - record_offset
+                    output.flush()
+                    os.fsync(output.fileno())
+
+                self._mmap.close()
+                self._mmap = None
+                self._pack.close()
+                os.replace(temp_path, self.pack_path)
+                _fsync_directory(self.pack_path.parent)
+                self._open_pack()
+                with self._db:
+                    self._db.executemany("UPDATE signatures SET offset = ? WHERE key = ?", moved)
+                    self._set_indexed_size(self._size)
+            except Exception as e:
+                logger.error("Lỗi khi compact kho chữ ký: %s", e)
+                raise IOError(f"Không thể compact kho chữ ký: {str(e)}")
+        reclaimed = old_size - self._size
+        logger.info("Đã compact kho chữ ký %s, thu hồi %s byte", self.pack_path, reclaimed)
+        return reclaimed
+
+    def close(self) -> None:
+        """Đóng pack và chỉ mục"""
+        with self._lock:
+            if self._mmap is not None:
+                self._mmap.close()
+                self._mmap = None
+            self._pack.close()
+            self._db.close()
+
+    def __enter__(self) -> "SignatureStore":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
@@ -1,15 +1,287 @@
 """
 Chức năng timestamp cho chữ ký số (tùy chọn mở rộng)
+
+Timestamp theo lô: digest của các chữ ký gửi tới trong một cửa sổ ngắn được gom thành
+cây Merkle; gốc cây (kèm thời điểm) được ký một lần bằng khóa timestamp. Mỗi chữ ký nhận
+một token gồm thời điểm, chữ ký gốc và bằng chứng thành viên.
+
+Định dạng token (big-endian):
+    magic 'RSTT' (4) | version (1) | thời điểm unix micro giây (8) | fingerprint khóa TSA (32)
+    | độ dài digest (1) | số bước proof (1) | độ dài chữ ký gốc (2) | digest | gốc (32)
+    | mỗi bước proof: bên (1, 1 = anh em bên trái) + hash (32) | chữ ký gốc
 """
 
+import hashlib
+import struct
+import threading
 import time
 import json
-from datetime import datetime
-from typing import Dict, Any
+from concurrent.futures import Future
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Dict, Any, List, Optional, Sequence, Tuple, Union
+
+from cryptography.hazmat.primitives.asymmetric import rsa
+
+from .key_manager import public_key_fingerprint
+from .merkle import MerkleTree, ProofStep, leaf_hash, verify_proof
+from .signer import sign_hash
+from .utils import get_logger, safe_file_read, safe_file_write, SIGNATURE_MODE_PREHASHED
+from .verifier import verify_hash
+
+logger = get_logger()
+
+TOKEN_MAGIC = b'RSTT'
+TOKEN_VERSION = 1
+MAX_DIGEST_SIZE = 64
+
+_TOKEN_HEADER = struct.Struct('>4sBq32sBBH')
+_PROOF_STEP = struct.Struct('>B32s')
+
+
+class TimestampTokenError(ValueError):
+    """Dữ liệu token timestamp sai định dạng"""
+
+
+def signature_digest(signature: bytes) -> bytes:
+    """Digest của chữ ký được timestamp (SHA-256 của các byte chữ ký)"""
+    return hashlib.sha256(signature).digest()
+
+
+def root_message(root: bytes, timestamp_us: int) -> bytes:
+    """Digest được khóa TSA ký cho một lô: gắn gốc Merkle với thời điểm của lô"""
+    return hashlib.sha256(TOKEN_MAGIC + bytes([TOKEN_VERSION]) + root
+                          + struct.pack('>q', timestamp_us)).digest()
+
+
+@dataclass(frozen=True)
+class TimestampToken:
+    """Token timestamp của một digest trong lô (thời điểm, chữ ký gốc, proof)"""
+    digest: bytes
+    timestamp_us: int
+    key_fingerprint: str
+    root: bytes
+    root_signature: bytes
+    proof: Tuple[ProofStep, ...] = ()
+
+    @property
+    def unix_time(self) -> float:
+        return self.timestamp_us / 1e6
+
+    def isoformat(self) -> str:
+        """Thời điểm timestamp dạng ISO 8601 (UTC)"""
+        return datetime.fromtimestamp(self.unix_time, timezone.utc).isoformat()
+
+    def verify(self, public_key: rsa.RSAPublicKey, digest: Optional[bytes] = None) -> bool:
+        """
+        Kiểm tra token: khóa TSA, bằng chứng thành viên và chữ ký gốc
+
+        Args:
+            public_key: Khóa công khai của TSA
+            digest: Digest cần khớp với token (tùy chọn)
+
+        Returns:
+            True nếu token hợp lệ
+        """
+        if digest is not None and digest != self.digest:
+            return False
+        if public_key_fingerprint(public_key) != self.key_fingerprint:
+            return False
+        if not verify_proof(leaf_hash(self.digest), self.proof, self.root):
+            return False
+        return verify_hash(public_key, self.root_signature,
+                           root_message(self.root, self.timestamp_us), SIGNATURE_MODE_PREHASHED)
+
+    def to_bytes(self) -> bytes:
+        """Mã hóa token nhị phân"""
+        try:
+            header = _TOKEN_HEADER.pack(TOKEN_MAGIC, TOKEN_VERSION, self.timestamp_us,
+                                        bytes.fromhex(self.key_fingerprint), len(self.digest),
+                                        len(self.proof), len(self.root_signature))
+            steps = b''.join(_PROOF_STEP.pack(is_left, sibling) for is_left, sibling in self.proof)
+        except (ValueError, struct.error) as e:
+            raise TimestampTokenError(f"Không thể tạo token timestamp: {str(e)}")
+        return header + self.digest + self.root + steps + self.root_signature
+
+    @classmethod
+    def from_bytes(cls, data: bytes) -> "TimestampToken":
+        """
+        Giải mã token nhị phân
+
+        Raises:
+            TimestampTokenError: Dữ liệu không phải token hợp lệ
+        """
+        if len(data) < _TOKEN_HEADER.size:
+            raise TimestampTokenError("Token timestamp quá ngắn")
+        (magic, version, timestamp_us, fingerprint, digest_length,
+         steps, signature_length) = _TOKEN_HEADER.unpack_from(data)
+        if magic != TOKEN_MAGIC:
+            raise TimestampTokenError("Sai magic của token timestamp")
+        if version != TOKEN_VERSION:
+            raise TimestampTokenError(f"Phiên bản token timestamp không hỗ trợ: {version}")
+        proof_offset = _TOKEN_HEADER.size + digest_length + 32
+        signature_offset = proof_offset + steps * _PROOF_STEP.size
+        if len(data) != signature_offset + signature_length:
+            raise TimestampTokenError("Độ dài token timestamp không khớp")
+        proof = tuple((bool(is_left), sibling) for is_left, sibling in
+                      _PROOF_STEP.iter_unpack(data[proof_offset:signature_offset]))
+        return cls(digest=bytes(data[_TOKEN_HEADER.size:_TOKEN_HEADER.size + digest_length]),
+                   timestamp_us=timestamp_us,
+                   key_fingerprint=fingerprint.hex(),
+                   root=bytes(data[proof_offset - 32:proof_offset]),
+                   root_signature=bytes(data[signature_offset:]),
+                   proof=proof)
+
+
+def issue_tokens(private_key: rsa.RSAPrivateKey, digests: Sequence[bytes],
+                 timestamp_us: Optional[int] = None,
+                 key_fingerprint: Optional[str] = None) -> List[TimestampToken]:
+    """
+    Timestamp một lô digest với một phép ký RSA duy nhất
+
+    Args:
+        private_key: Khóa riêng của TSA
+        digests: Digest cần timestamp (thứ tự token theo thứ tự digest)
+        timestamp_us: Thời điểm của lô (mặc định là hiện tại)
+        key_fingerprint: Fingerprint khóa TSA đã tính sẵn (tùy chọn)
+
+    Returns:
+        Danh sách token tương ứng từng digest
+    """
+    check_digests(digests)
+    if timestamp_us is None:
+        timestamp_us = time.time_ns() // 1000
+    key_fingerprint = key_fingerprint or public_key_fingerprint(private_key.public_key())
+    tree = MerkleTree([leaf_hash(digest) for digest in digests])
+    root_signature = sign_hash(private_key, root_message(tree.root, timestamp_us),
+                               SIGNATURE_MODE_PREHASHED)
+    return [TimestampToken(digest=bytes(digest), timestamp_us=timestamp_us,
+                           key_fingerprint=key_fingerprint, root=tree.root,
+                           root_signature=root_signature, proof=tuple(tree.proof(index)))
+            for index, digest in enumerate(digests)]
+
+
+def check_digests(digests: Sequence[bytes]) -> None:
+    """
+    Kiểm tra độ dài các digest cần timestamp
+
+    Raises:
+        ValueError: Có digest rỗng hoặc dài hơn MAX_DIGEST_SIZE byte
+    """
+    for digest in digests:
+        if not 0 < len(digest) <= MAX_DIGEST_SIZE:
+            raise ValueError(f"Độ dài digest không hợp lệ: {len(digest)} byte")
+
+
+class TimestampBatcher:
+    """Gom digest trong một cửa sổ thời gian ngắn và timestamp cả lô bằng một phép ký"""
+
+    def __init__(self, private_key: rsa.RSAPrivateKey, window: float = 0.01,
+                 max_batch: int = 65536):
+        """
+        Khởi tạo Timestamp Batcher
+
+        Args:
+            private_key: Khóa riêng của TSA
+            window: Thời gian gom tối đa (giây) tính từ digest đầu tiên của lô
+            max_batch: Số digest tối đa mỗi lô (đủ lô thì timestamp ngay)
+        """
+        self.private_key = private_key
+        self.window = window
+        self.max_batch = max_batch
+        self.key_fingerprint = public_key_fingerprint(private_key.public_key())
+        self._pending: List[Tuple[bytes, Future]] = []
+        self._first_at = 0.0
+        self._closed = False
+        self._condition = threading.Condition()
+        self._thread = threading.Thread(target=self._run, name='timestamp-batcher', daemon=True)
+        self._thread.start()
+
+    def submit_many(self, digests: Sequence[bytes]) -> List[Future]:
+        """
+        Đưa digest vào lô đang gom
+
+        Returns:
+            Future cho từng digest, trả về TimestampToken khi lô được ký
+
+        Raises:
+            ValueError: Có digest không hợp lệ (kiểm tra trước khi vào lô, để một yêu cầu
+                        sai không làm hỏng cả lô của các yêu cầu khác)
+        """
+        digests = [bytes(digest) for digest in digests]
+        check_digests(digests)
+        futures = []
+        with self._condition:
+            if self._closed:
+                raise RuntimeError("TimestampBatcher đã đóng")
+            if not self._pending:
+                self._first_at = time.monotonic()
+            for digest in digests:
+                future: Future = Future()
+                self._pending.append((digest, future))
+                futures.append(future)
+            self._condition.notify()
+        return futures
 
-from .utils import setup_logging
+    def submit(self, digest: bytes) -> Future:
+        return self.submit_many([digest])[0]
+
+    def timestamp_many(self, digests: Sequence[bytes],
+                       timeout: Optional[float] = None) -> List[TimestampToken]:
+        """Timestamp nhiều digest và chờ token (các digest có thể thuộc nhiều lô)"""
+        return [future.result(timeout) for future in self.submit_many(digests)]
+
+    def timestamp(self, digest: bytes, timeout: Optional[float] = None) -> TimestampToken:
+        return self.submit(digest).result(timeout)
+
+    def _take_batch(self) -> List[Tuple[bytes, Future]]:
+        """Chờ đến khi lô đầy, hết cửa sổ hoặc batcher đóng (gọi khi giữ _condition)"""
+        while True:
+            if self._pending:
+                remaining = self._first_at + self.window - time.monotonic()
+                if self._closed or remaining <= 0 or len(self._pending) >= self.max_batch:
+                    batch = self._pending[:self.max_batch]
+                    self._pending = self._pending[self.max_batch:]
+                    self._first_at = time.monotonic()
+                    return batch
+                self._condition.wait(remaining)
+            elif self._closed:
+                return []
+            else:
+                self._condition.wait()
+
+    def _run(self) -> None:
+        while True:
+            with self._condition:
+                batch = self._take_batch()
+            if not batch:
+                return
+            try:
+                tokens = issue_tokens(self.private_key, [digest for digest, _ in batch],
+                                      key_fingerprint=self.key_fingerprint)
+            except Exception as e:
+                logger.error("Lỗi khi timestamp lô %s digest: %s", len(batch), e)
+                for _, future in batch:
+                    future.set_exception(e)
+                continue
+            for (_, future), token in zip(batch, tokens):
+                future.set_result(token)
+            logger.debug("Đã timestamp lô %s digest", len(batch))
+
+    def close(self) -> None:
+        """Timestamp nốt các digest đang chờ rồi dừng luồng gom lô"""
+        with self._condition:
+            self._closed = True
+            self._condition.notify()
+        self._thread.join()
+
+    def __enter__(self) -> "TimestampBatcher":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
 
-logger = setup_logging()
 
 class TimestampService:
     """Dịch vụ timestamp cho chữ ký số"""
@@ -42,9 +314,9 @@ class TimestampService:
         try:
             with open(file_path, 'w', encoding='utf-8') as f:
                 json.dump(timestamp_data, f, indent=2, ensure_ascii=False)
-            logger.info(f"Đã lưu timestamp vào {file_path}")
+            logger.info("Đã lưu timestamp vào %s", file_path)
         except Exception as e:
-            logger.error(f"Lỗi khi lưu timestamp: {str(e)}")
+            logger.error("Lỗi khi lưu timestamp: %s", e)
             raise IOError(f"Không thể lưu timestamp: {str(e)}")
     
     @staticmethod
@@ -62,5 +334,46 @@ class TimestampService:
             with open(file_path, 'r', encoding='utf-8') as f:
                 return json.load(f)
         except Exception as e:
-            logger.error(f"Lỗi khi tải timestamp: {str(e)}")
+            logger.error("Lỗi khi tải timestamp: %s", e)
             raise IOError(f"Không thể tải timestamp: {str(e)}")
+    
+    @staticmethod
+    def save_token(token: TimestampToken, file_path: Union[str, Path]) -> None:
+        """
+        Lưu token timestamp theo lô (nhị phân, thường cạnh chữ ký: <chữ ký>.tst)
+        
+        Args:
+            token: Token timestamp
+            file_path: Đường dẫn file để lưu
+        """
+        safe_file_write(file_path, token.to_bytes())
+        logger.info("Đã lưu token timestamp vào %s", file_path)
+    
+    @staticmethod
+    def load_token(file_path: Union[str, Path]) -> TimestampToken:
+        """
+        Tải token timestamp từ file
+        
+        Args:
+            file_path: Đường dẫn file token
+            
+        Returns:
+            TimestampToken
+        """
+        return TimestampToken.from_bytes(safe_file_read(file_path))
+    
+    @staticmethod
+    def verify_token(token: TimestampToken, signature: bytes,
+                     public_key: rsa.RSAPublicKey) -> bool:
+        """
+        Kiểm tra token timestamp của một chữ ký
+        
+        Args:
+            token: Token timestamp
+            signature: Chữ ký được timestamp
+            public_key: Khóa công khai của TSA
+            
+        Returns:
+            True nếu token thuộc chữ ký và được TSA ký
+        """
+        return token.verify(public_key, signature_digest(signature))
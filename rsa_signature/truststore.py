@@ -0,0 +1,191 @@
+"""
+Trust store: tập khóa công khai tin cậy, xác minh chữ ký mà không cần biết trước khóa nào đã ký
+"""
+
+import threading
+from collections import OrderedDict
+from pathlib import Path
+from typing import List, Optional, Tuple, Union
+
+from cryptography.hazmat.primitives.asymmetric import rsa
+
+from .context import VerificationContext
+from .envelope import SignatureEnvelope
+from .key_manager import RSAKeyManager, public_key_fingerprint
+from .utils import get_logger, hash_file_mode, SIGNATURE_MODE_LEGACY, HASH_MODE_SHA256
+
+logger = get_logger()
+
+
+class TrustStore:
+    """Khóa công khai đánh chỉ mục theo fingerprint; thử khóa theo thứ tự dùng thành công gần nhất"""
+
+    def __init__(self, key_manager: Optional[RSAKeyManager] = None,
+                 mode: str = SIGNATURE_MODE_LEGACY,
+                 hash_mode: str = HASH_MODE_SHA256):
+        """
+        Khởi tạo Trust Store
+
+        Args:
+            key_manager: RSA Key Manager dùng để tải khóa (tùy chọn)
+            mode: Chế độ chữ ký của các chữ ký cần xác minh ('v1' mặc định)
+            hash_mode: Chế độ hash của các chữ ký cần xác minh ('sha256' mặc định)
+        """
+        self.key_manager = key_manager or RSAKeyManager()
+        self.mode = mode
+        self.hash_mode = hash_mode
+        self._lock = threading.Lock()
+        # fingerprint -> context; thứ tự = khóa xác minh thành công gần nhất đứng đầu
+        self._contexts: "OrderedDict[str, VerificationContext]" = OrderedDict()
+
+    @classmethod
+    def from_directory(cls, directory: Union[str, Path], pattern: str = '*.pem',
+                       key_manager: Optional[RSAKeyManager] = None,
+                       mode: str = SIGNATURE_MODE_LEGACY,
+                       hash_mode: str = HASH_MODE_SHA256) -> "TrustStore":
+        """Tạo trust store từ mọi khóa công khai trong thư mục"""
+        store = cls(key_manager, mode, hash_mode)
+        store.load_directory(directory, pattern)
+        return store
+
+    @classmethod
+    def from_keystore(cls, keystore, mode: str = SIGNATURE_MODE_LEGACY,
+                      hash_mode: str = HASH_MODE_SHA256) -> "TrustStore":
+        """
+        Tạo trust store từ KeyStore (bỏ qua khóa đã thu hồi; khóa 'retired' vẫn
+        dùng để xác minh chữ ký cũ)
+        """
+        store = cls(keystore.key_manager, mode, hash_mode)
+        for record in keystore.keys():
+            if record['status'] != 'revoked':
+                store.add_key(keystore.key_manager.load_public_key(record['public_path']))
+        return store
+
+    def add_key(self, public_key: rsa.RSAPublicKey) -> str:
+        """
+        Thêm một khóa công khai
+
+        Returns:
+            Fingerprint (key ID) của khóa
+        """
+        fingerprint = public_key_fingerprint(public_key)
+        context = VerificationContext(public_key, self.mode, self.hash_mode)
+        with self._lock:
+            if fingerprint not in self._contexts:
+                self._contexts[fingerprint] = context
+        return fingerprint
+
+    def load_directory(self, directory: Union[str, Path], pattern: str = '*.pem') -> int:
+        """
+        Nạp các khóa công khai trong thư mục (file không phải khóa công khai bị bỏ qua)
+
+        Returns:
+            Số khóa đã nạp
+        """
+        loaded = 0
+        for path in sorted(Path(directory).glob(pattern)):
+            if not path.is_file():
+                continue
+            try:
+                self.add_key(self.key_manager.read_public_key(str(path)))
+                loaded += 1
+            except (IOError, ValueError):
+                logger.debug("Bỏ qua file không phải khóa công khai: %s", path)
+        logger.info("Trust store đã nạp %s khóa từ %s", loaded, directory)
+        return loaded
+
+    def fingerprints(self) -> List[str]:
+        """Fingerprint các khóa theo thứ tự sẽ được thử"""
+        with self._lock:
+            return list(self._contexts)
+
+    def _candidates(self, signature: bytes, key_id: Optional[str],
+                    envelope: Optional[SignatureEnvelope] = None
+                    ) -> List[Tuple[str, VerificationContext]]:
+        """
+        Các khóa có thể đã tạo chữ ký: lọc theo key ID (của envelope nếu có) và kiểm tra
+        sơ bộ (độ dài, miền giá trị); envelope quyết định chế độ chữ ký và chế độ hash
+        """
+        with self._lock:
+            items = list(self._contexts.items())
+        if envelope is not None:
+            key_id = key_id or envelope.key_fingerprint
+        if key_id:
+            key_id = key_id.lower()
+            items = [(fp, ctx) for fp, ctx in items if fp.startswith(key_id)]
+        items = [(fp, ctx) for fp, ctx in items if ctx.precheck(signature) is None]
+        # Chỉ dựng context theo chế độ của envelope cho các khóa còn lại sau khi lọc
+        if envelope is not None:
+            items = [(fp, ctx.with_mode(envelope.mode, envelope.hash_mode)) for fp, ctx in items]
+        return items
+
+    @staticmethod
+    def _unwrap(signature: Union[bytes, SignatureEnvelope]
+                ) -> Tuple[bytes, Optional[SignatureEnvelope]]:
+        if isinstance(signature, SignatureEnvelope):
+            return signature.signature, signature
+        return signature, None
+
+    def verify_digest_any(self, digest: bytes, signature: Union[bytes, SignatureEnvelope],
+                          key_id: Optional[str] = None) -> Optional[str]:
+        """
+        Xác minh chữ ký trên digest với bất kỳ khóa nào trong trust store
+
+        Args:
+            digest: Digest của dữ liệu theo chế độ hash của trust store (hoặc của envelope)
+            signature: Chữ ký, hoặc SignatureEnvelope (chỉ thử khóa có key ID của envelope)
+            key_id: Key ID (hoặc tiền tố) nếu biết khóa đã ký
+
+        Returns:
+            Fingerprint của khóa xác minh thành công, hoặc None
+        """
+        signature, envelope = self._unwrap(signature)
+        return self._verify_candidates(self._candidates(signature, key_id, envelope),
+                                       digest, signature)
+
+    def _verify_candidates(self, candidates: List[Tuple[str, VerificationContext]],
+                           digest: bytes, signature: bytes) -> Optional[str]:
+        """Thử lần lượt các khóa ứng viên, đưa khóa thành công lên đầu thứ tự"""
+        for fingerprint, context in candidates:
+            if context.verify_digest(signature, digest):
+                with self._lock:
+                    if fingerprint in self._contexts:
+                        self._contexts.move_to_end(fingerprint, last=False)
+                return fingerprint
+        return None
+
+    def verify_any(self, file_path: Union[str, Path], signature: Union[bytes, SignatureEnvelope],
+                   key_id: Optional[str] = None) -> Optional[str]:
+        """
+        Xác minh file với bất kỳ khóa nào trong trust store (file chỉ được hash một lần)
+
+        Args:
+            file_path: Đường dẫn file
+            signature: Chữ ký, hoặc SignatureEnvelope (key ID, chế độ chữ ký và chế độ hash
+                       lấy từ envelope, chỉ khóa có key ID đó được thử)
+            key_id: Key ID (hoặc tiền tố) nếu biết khóa đã ký
+
+        Returns:
+            Fingerprint của khóa xác minh thành công, hoặc None
+        """
+        try:
+            signature, envelope = self._unwrap(signature)
+            hash_mode = envelope.hash_mode if envelope is not None else self.hash_mode
+            # Lọc khóa trước khi đọc file: chữ ký không khớp khóa nào thì không cần hash
+            candidates = self._candidates(signature, key_id, envelope)
+            if not candidates:
+                logger.warning("Không có khóa nào trong trust store phù hợp với chữ ký")
+                return None
+            digest = hash_file_mode(file_path, hash_mode)
+            return self._verify_candidates(candidates, digest, signature)
+        except Exception as e:
+            logger.error("Lỗi khi xác minh bằng trust store: %s", e)
+            raise RuntimeError(f"Không thể xác minh chữ ký: {str(e)}")
+
+    def __contains__(self, fingerprint: str) -> bool:
+        with self._lock:
+            return fingerprint.lower() in self._contexts
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._contexts)
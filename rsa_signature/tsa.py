@@ -0,0 +1,228 @@
+"""
+Timestamp authority (TSA) cục bộ: tiến trình chạy nền timestamp digest chữ ký theo lô
+qua Unix socket (thay thế cho một TSA thật khi chạy nội bộ)
+
+Giao thức dùng cùng kiểu frame với signing agent (độ dài 4 byte big-endian + nội dung).
+    Yêu cầu:  op (1 byte) | payload
+    (op 1 timestamp digest: độ dài digest (1 byte) | các digest nối liền;
+    op 2 lấy khóa công khai của TSA dạng PEM)
+    Phản hồi: status (1 byte, 0 = OK) | payload
+    (op 1: mỗi token gồm độ dài 2 byte + token, theo thứ tự digest; lỗi: thông báo UTF-8)
+Yêu cầu từ mọi kết nối trong cùng cửa sổ được gom chung một lô (một phép ký RSA).
+"""
+
+import os
+import socket
+import socketserver
+import struct
+import threading
+from pathlib import Path
+from typing import List, Optional, Sequence, Tuple, Union
+
+from cryptography.hazmat.primitives import serialization
+from cryptography.hazmat.primitives.asymmetric import rsa
+
+from .agent import (AgentError, create_unix_server, recv_frame, remove_socket, send_frame,
+                    STATUS_ERROR, STATUS_OK)
+from .key_manager import RSAKeyManager
+from .timestamp import MAX_DIGEST_SIZE, TimestampBatcher, TimestampToken
+from .utils import get_logger
+
+logger = get_logger()
+
+TSA_SOCKET_ENV = 'RSA_SIGNATURE_TSA_SOCK'
+
+OP_TIMESTAMP = 1
+OP_PUBLIC_KEY = 2
+
+# Số digest tối đa mỗi frame yêu cầu (phản hồi vẫn nằm dưới MAX_FRAME_SIZE khi lô lớn nhất)
+MAX_DIGESTS_PER_REQUEST = 512
+
+_TOKEN_LENGTH = struct.Struct('>H')
+
+
+class TimestampAuthorityError(RuntimeError):
+    """Lỗi do TSA trả về hoặc lỗi kết nối tới TSA"""
+
+
+class TimestampAuthority:
+    """Giữ khóa timestamp và phục vụ yêu cầu timestamp theo lô"""
+
+    def __init__(self, private_key: rsa.RSAPrivateKey, window: float = 0.01,
+                 max_batch: int = 65536):
+        """
+        Khởi tạo Timestamp Authority
+
+        Args:
+            private_key: Khóa riêng dùng để ký gốc Merkle của mỗi lô
+            window: Thời gian gom lô tối đa (giây)
+            max_batch: Số digest tối đa mỗi lô
+        """
+        self.batcher = TimestampBatcher(private_key, window, max_batch)
+        self._public_pem = private_key.public_key().public_bytes(
+            encoding=serialization.Encoding.PEM,
+            format=serialization.PublicFormat.SubjectPublicKeyInfo
+        )
+        self._server: Optional[socketserver.BaseServer] = None
+
+    @classmethod
+    def from_key_file(cls, private_key_path: Union[str, Path], password: Optional[str] = None,
+                      **kwargs) -> "TimestampAuthority":
+        """Tạo TSA từ file khóa riêng"""
+        private_key = RSAKeyManager(use_cache=False).load_private_key(str(private_key_path), password)
+        return cls(private_key, **kwargs)
+
+    def handle_request(self, request: bytes) -> Tuple[int, bytes]:
+        """
+        Xử lý một yêu cầu đã nhận (chờ đến khi lô chứa các digest được ký)
+
+        Returns:
+            Tuple (status, payload)
+        """
+        try:
+            op = request[0]
+            if op == OP_PUBLIC_KEY:
+                return STATUS_OK, self._public_pem
+            if op == OP_TIMESTAMP:
+                size = request[1]
+                body = request[2:]
+                if not 0 < size <= MAX_DIGEST_SIZE or len(body) % size:
+                    raise ValueError("Độ dài digest trong yêu cầu không hợp lệ")
+                if len(body) // size > MAX_DIGESTS_PER_REQUEST:
+                    raise ValueError("Yêu cầu có quá nhiều digest")
+                digests = [body[i:i + size] for i in range(0, len(body), size)]
+                tokens = [token.to_bytes() for token in self.batcher.timestamp_many(digests)]
+                return STATUS_OK, b''.join(_TOKEN_LENGTH.pack(len(token)) + token
+                                           for token in tokens)
+            raise ValueError(f"Thao tác không hỗ trợ: {op}")
+        except Exception as e:
+            logger.warning("TSA từ chối yêu cầu: %s", e)
+            return STATUS_ERROR, str(e).encode('utf-8')
+
+    def serve_forever(self, socket_path: Union[str, Path]) -> None:
+        """
+        Lắng nghe trên Unix socket cho đến khi shutdown()
+
+        Args:
+            socket_path: Đường dẫn Unix domain socket
+        """
+        authority = self
+        socket_path = str(socket_path)
+
+        class _Handler(socketserver.BaseRequestHandler):
+            def handle(self):
+                while True:
+                    try:
+                        request = recv_frame(self.request)
+                    except (AgentError, OSError):
+                        return
+                    if request is None:
+                        return
+                    status, payload = authority.handle_request(request)
+                    send_frame(self.request, bytes([status]) + payload)
+
+        server, identity = create_unix_server(socket_path, _Handler)
+        self._server = server
+
+        logger.info("TSA đang lắng nghe tại %s", socket_path)
+        try:
+            server.serve_forever()
+        finally:
+            server.server_close()
+            self._server = None
+            self.batcher.close()
+            remove_socket(socket_path, identity)
+
+    def shutdown(self) -> None:
+        """Dừng vòng lặp phục vụ (gọi từ luồng khác)"""
+        server = self._server
+        if server is not None:
+            threading.Thread(target=server.shutdown, daemon=True).start()
+
+
+class TimestampClient:
+    """Client kết nối tới TSA cục bộ"""
+
+    def __init__(self, socket_path: Optional[Union[str, Path]] = None, timeout: float = 30.0):
+        """
+        Khởi tạo Timestamp Client
+
+        Args:
+            socket_path: Đường dẫn socket (mặc định lấy từ biến môi trường
+                         RSA_SIGNATURE_TSA_SOCK)
+            timeout: Thời gian chờ tối đa cho mỗi yêu cầu (giây)
+        """
+        socket_path = socket_path or os.environ.get(TSA_SOCKET_ENV)
+        if not socket_path:
+            raise TimestampAuthorityError(f"Chưa đặt biến môi trường {TSA_SOCKET_ENV}")
+        self.socket_path = str(socket_path)
+        self.timeout = timeout
+        self._sock: Optional[socket.socket] = None
+
+    def _connect(self) -> socket.socket:
+        if self._sock is None:
+            sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+            sock.settimeout(self.timeout)
+            try:
+                sock.connect(self.socket_path)
+            except OSError as e:
+                sock.close()
+                raise TimestampAuthorityError(f"Không kết nối được TSA tại {self.socket_path}: {str(e)}")
+            self._sock = sock
+        return self._sock
+
+    def _request(self, op: int, payload: bytes = b'') -> bytes:
+        """Gửi một yêu cầu và trả về payload phản hồi"""
+        sock = self._connect()
+        try:
+            send_frame(sock, bytes([op]) + payload)
+            response = recv_frame(sock)
+        except (AgentError, OSError) as e:
+            self.close()
+            raise TimestampAuthorityError(f"Lỗi giao tiếp với TSA: {str(e)}")
+        if not response:
+            self.close()
+            raise TimestampAuthorityError("TSA đóng kết nối")
+        if response[0] != STATUS_OK:
+            raise TimestampAuthorityError(response[1:].decode('utf-8', 'replace'))
+        return response[1:]
+
+    def timestamp_many(self, digests: Sequence[bytes]) -> List[TimestampToken]:
+        """
+        Timestamp nhiều digest (cùng độ dài), gửi theo từng nhóm MAX_DIGESTS_PER_REQUEST
+
+        Returns:
+            Token theo thứ tự digest
+        """
+        tokens: List[TimestampToken] = []
+        for start in range(0, len(digests), MAX_DIGESTS_PER_REQUEST):
+            chunk = digests[start:start + MAX_DIGESTS_PER_REQUEST]
+            size = len(chunk[0])
+            if any(len(digest) != size for digest in chunk):
+                raise ValueError("Các digest trong một yêu cầu phải cùng độ dài")
+            payload = self._request(OP_TIMESTAMP, bytes([size]) + b''.join(chunk))
+            offset = 0
+            while offset < len(payload):
+                (length,) = _TOKEN_LENGTH.unpack_from(payload, offset)
+                offset += _TOKEN_LENGTH.size
+                tokens.append(TimestampToken.from_bytes(payload[offset:offset + length]))
+                offset += length
+        return tokens
+
+    def timestamp(self, digest: bytes) -> TimestampToken:
+        return self.timestamp_many([digest])[0]
+
+    def public_key(self) -> rsa.RSAPublicKey:
+        """Khóa công khai của TSA (để kiểm tra token)"""
+        return serialization.load_pem_public_key(self._request(OP_PUBLIC_KEY))
+
+    def close(self) -> None:
+        if self._sock is not None:
+            self._sock.close()
+            self._sock = None
+
+    def __enter__(self) -> "TimestampClient":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
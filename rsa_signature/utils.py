@@ -3,36 +3,199 @@ Các tiện ích chung cho hệ thống chữ ký số RSA
 """
 
 import os
+import mmap
 import base64
 import hashlib
+import atexit
+import queue
 import logging
+import threading
+from logging.handlers import QueueHandler
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
-from typing import Optional, Union
+from typing import BinaryIO, Iterable, List, Optional, Union
+
+from .constants import (SIGNATURE_MODE_LEGACY, SIGNATURE_MODE_PREHASHED, SIGNATURE_MODES,
+                        DIGEST_SIZE, HASH_MODE_SHA256, HASH_MODE_TREE, HASH_MODE_SHA512,
+                        HASH_MODE_SHA3_256, HASH_MODE_SHA3_512, HASH_MODE_BLAKE2B, HASH_MODES)
+
+_HASH_FACTORIES = {
+    HASH_MODE_SHA256: hashlib.sha256,
+    HASH_MODE_SHA512: hashlib.sha512,
+    HASH_MODE_SHA3_256: hashlib.sha3_256,
+    HASH_MODE_SHA3_512: hashlib.sha3_512,
+    HASH_MODE_BLAKE2B: hashlib.blake2b,
+}
+TREE_HASH_PREFIX = b'rsa-signature/sha256-tree-v1\x00'
+TREE_CHUNK_SIZE = 8 * 1024 * 1024
+
+# Buffer đọc file (dùng lại theo từng luồng) và ngưỡng chuyển sang mmap
+HASH_BUFFER_SIZE = 1024 * 1024
+MMAP_THRESHOLD = 64 * 1024 * 1024
 
 # Cấu hình logging an toàn
-def setup_logging(level: str = "INFO") -> logging.Logger:
-    """Thiết lập logging không ghi thông tin nhạy cảm"""
-    logging.basicConfig(
-        level=getattr(logging, level.upper()),
-        format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
-        handlers=[
-            logging.StreamHandler(),
-            logging.FileHandler('rsa_signature.log')
-        ]
-    )
+# Các module chỉ lấy logger (get_logger) khi import; handler do điểm vào (CLI, webapp)
+# cấu hình một lần bằng configure_logging. Khi chưa cấu hình, thư viện không ghi file nào.
+LOGGER_NAME = 'rsa_signature'
+LOG_FORMAT = '%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+_SENSITIVE_KEYWORDS = ('password', 'private_key', 'secret')
+_logging_lock = threading.Lock()
+_logging_hooks_registered = False
+# Trạng thái do configure_logging tạo: filter, handler gắn vào logger, listener (nếu dùng hàng đợi)
+_log_filter: Optional[logging.Filter] = None
+_log_handlers: List[logging.Handler] = []
+_log_listener: Optional['_BatchingQueueListener'] = None
+
+class SensitiveDataFilter(logging.Filter):
+    """
+    Bỏ bản ghi chứa từ khóa nhạy cảm (không phân biệt hoa thường)
+    
+    Message được ghép với args ngay tại đây nên các handler phía sau không định dạng lại.
+    Một lần lower() rồi tìm chuỗi con: nhanh hơn regex IGNORECASE với message tiếng Việt.
+    """
+    def filter(self, record: logging.LogRecord) -> bool:
+        message = record.getMessage()
+        lowered = message.lower()
+        for keyword in _SENSITIVE_KEYWORDS:
+            if keyword in lowered:
+                return False
+        record.msg, record.args = message, None
+        return True
+
+class _DeferredQueueHandler(QueueHandler):
+    """Đưa bản ghi vào hàng đợi nguyên trạng: định dạng và ghi file do luồng listener làm"""
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        return record
+
+class _BatchingQueueListener:
+    """
+    Luồng ghi log: mỗi FLUSH_INTERVAL giây lấy hết bản ghi trong hàng đợi và chuyển cho handler
+    
+    Khác QueueListener chuẩn (chờ get() và thức dậy theo từng bản ghi), luồng ký chỉ put
+    vào hàng đợi mà không đánh thức luồng nào, nên không mất lượt GIL cho mỗi dòng log.
+    """
+    FLUSH_INTERVAL = 0.05
+    
+    def __init__(self, log_queue: "queue.SimpleQueue", *handlers: logging.Handler):
+        self.queue = log_queue
+        self.handlers = handlers
+        self._stopped = threading.Event()
+        self._thread = threading.Thread(target=self._run, name='rsa-signature-log', daemon=True)
+    
+    def start(self) -> None:
+        self._thread.start()
+    
+    def _run(self) -> None:
+        while not self._stopped.wait(self.FLUSH_INTERVAL):
+            self._drain()
+        self._drain()
     
-    # Tạo filter để loại bỏ thông tin nhạy cảm
-    class SensitiveDataFilter(logging.Filter):
-        def filter(self, record):
-            # Loại bỏ các từ khóa nhạy cảm khỏi log
-            sensitive_keywords = ['password', 'private_key', 'secret']
-            message = record.getMessage().lower()
-            return not any(keyword in message for keyword in sensitive_keywords)
+    def _drain(self) -> None:
+        while True:
+            try:
+                record = self.queue.get_nowait()
+            except queue.Empty:
+                return
+            for handler in self.handlers:
+                if record.levelno >= handler.level:
+                    handler.handle(record)
     
-    logger = logging.getLogger('rsa_signature')
-    logger.addFilter(SensitiveDataFilter())
+    def stop(self) -> None:
+        """Ghi nốt các bản ghi còn trong hàng đợi rồi dừng luồng"""
+        self._stopped.set()
+        self._thread.join()
+
+def get_logger() -> logging.Logger:
+    """Logger của package (không cấu hình handler, an toàn khi gọi lúc import)"""
+    return logging.getLogger(LOGGER_NAME)
+
+def configure_logging(level: str = "INFO",
+                      log_file: Optional[Union[str, Path]] = 'rsa_signature.log',
+                      console: bool = True,
+                      use_queue: bool = True) -> logging.Logger:
+    """
+    Cấu hình logging cho package một lần; các lần gọi sau chỉ đổi mức log
+    
+    Args:
+        level: Mức log ('DEBUG', 'INFO', 'WARNING'...)
+        log_file: File log (mở khi có bản ghi đầu tiên; None = không ghi file)
+        console: Ghi log ra stderr
+        use_queue: Ghi log qua QueueHandler và luồng listener riêng để định dạng và I/O file
+                   chạy trên luồng riêng thay vì luồng đang ký
+        
+    Returns:
+        Logger của package
+    """
+    global _logging_hooks_registered, _log_filter, _log_handlers, _log_listener
+    logger = get_logger()
+    with _logging_lock:
+        logger.setLevel(getattr(logging, level.upper()))
+        if _log_filter is not None:
+            return logger
+        
+        formatter = logging.Formatter(LOG_FORMAT)
+        handlers: List[logging.Handler] = []
+        if console:
+            handlers.append(logging.StreamHandler())
+        if log_file:
+            handlers.append(logging.FileHandler(log_file, encoding='utf-8', delay=True))
+        for handler in handlers:
+            handler.setFormatter(formatter)
+        
+        if use_queue and handlers:
+            log_queue = queue.SimpleQueue()
+            _log_listener = _BatchingQueueListener(log_queue, *handlers)
+            _log_listener.start()
+            handlers = [_DeferredQueueHandler(log_queue)]
+            if not _logging_hooks_registered:
+                atexit.register(shutdown_logging)
+                if hasattr(os, 'register_at_fork'):
+                    os.register_at_fork(after_in_child=_logging_after_fork)
+                _logging_hooks_registered = True
+        
+        # Lọc trên logger: chạy một lần cho mỗi bản ghi, kể cả khi lan truyền lên root
+        _log_filter = SensitiveDataFilter()
+        logger.addFilter(_log_filter)
+        for handler in handlers:
+            logger.addHandler(handler)
+        _log_handlers = handlers
     return logger
 
+def shutdown_logging() -> None:
+    """Ghi hết bản ghi đang chờ rồi gỡ cấu hình của configure_logging (có thể cấu hình lại)"""
+    global _log_filter, _log_handlers, _log_listener
+    logger = get_logger()
+    with _logging_lock:
+        if _log_filter is None:
+            return
+        for handler in _log_handlers:
+            logger.removeHandler(handler)
+        logger.removeFilter(_log_filter)
+        listener, handlers = _log_listener, _log_handlers
+        _log_filter, _log_handlers, _log_listener = None, [], None
+    if listener is not None:
+        listener.stop()
+        handlers = listener.handlers
+    for handler in handlers:
+        handler.close()
+
+def _logging_after_fork() -> None:
+    """Tiến trình con (fork) không có luồng listener: ghi thẳng vào các handler gốc"""
+    global _log_handlers, _log_listener
+    listener, _log_listener = _log_listener, None
+    if listener is None:
+        return
+    logger = get_logger()
+    for handler in _log_handlers:
+        logger.removeHandler(handler)
+    _log_handlers = list(listener.handlers)
+    for handler in _log_handlers:
+        logger.addHandler(handler)
+
+def setup_logging(level: str = "INFO", **kwargs) -> logging.Logger:
+    """Tương thích ngược: chuyển hết cho configure_logging (cùng handler, hàng đợi và filter)"""
+    return configure_logging(level, **kwargs)
+
 def ensure_directory(path: Union[str, Path]) -> Path:
     """Đảm bảo thư mục tồn tại"""
     path = Path(path)
@@ -73,17 +236,175 @@ def decode_base64(data: str) -> bytes:
     except Exception as e:
         raise ValueError(f"Lỗi giải mã base64: {str(e)}")
 
-def hash_file(file_path: Union[str, Path]) -> bytes:
-    """Hash file bằng SHA-256"""
-    hasher = hashlib.sha256()
+_hash_buffers = threading.local()
+
+def _read_buffer() -> bytearray:
+    """Buffer đọc dùng lại của luồng hiện tại"""
+    buffer = getattr(_hash_buffers, 'buffer', None)
+    if buffer is None:
+        buffer = _hash_buffers.buffer = bytearray(HASH_BUFFER_SIZE)
+    return buffer
+
+def _advise_sequential(fd: int) -> None:
+    """Báo kernel file sẽ được đọc tuần tự (tăng read-ahead) nếu hệ điều hành hỗ trợ"""
+    if hasattr(os, 'posix_fadvise'):
+        try:
+            os.posix_fadvise(fd, 0, 0, os.POSIX_FADV_SEQUENTIAL)
+        except OSError:
+            pass
+
+def _hash_fd(hasher, fd: int, size: int) -> None:
+    """Đưa nội dung file vào hasher: mmap cho file lớn, readinto với buffer dùng lại cho file nhỏ"""
+    if size >= MMAP_THRESHOLD:
+        with mmap.mmap(fd, 0, access=mmap.ACCESS_READ) as mapped:
+            if hasattr(mapped, 'madvise') and hasattr(mmap, 'MADV_SEQUENTIAL'):
+                mapped.madvise(mmap.MADV_SEQUENTIAL)
+            view = memoryview(mapped)
+            try:
+                hasher.update(view)
+            finally:
+                view.release()
+        return
+
+    buffer = _read_buffer()
+    view = memoryview(buffer)
     try:
-        with open(file_path, 'rb') as f:
-            for chunk in iter(lambda: f.read(4096), b""):
-                hasher.update(chunk)
+        with open(fd, 'rb', buffering=0, closefd=False) as f:
+            while True:
+                read = f.readinto(buffer)
+                if not read:
+                    break
+                hasher.update(view[:read])
+    finally:
+        view.release()
+
+def new_hasher(hash_mode: str = HASH_MODE_SHA256):
+    """Đối tượng hashlib cho chế độ hash (trừ chế độ tree, chỉ dùng được với file)"""
+    try:
+        return _HASH_FACTORIES[hash_mode]()
+    except KeyError:
+        raise ValueError(f"Chế độ hash không hỗ trợ: {hash_mode}")
+
+def digest_size(hash_mode: str = HASH_MODE_SHA256) -> int:
+    """Độ dài digest (byte) của chế độ hash"""
+    if hash_mode == HASH_MODE_TREE:
+        return DIGEST_SIZE
+    return new_hasher(hash_mode).digest_size
+
+def hash_file(file_path: Union[str, Path], hash_mode: str = HASH_MODE_SHA256) -> bytes:
+    """Hash file (SHA-256 mặc định, hoặc thuật toán của chế độ hash khác)"""
+    hasher = new_hasher(hash_mode)
+    try:
+        with open(file_path, 'rb', buffering=0) as f:
+            fd = f.fileno()
+            _advise_sequential(fd)
+            _hash_fd(hasher, fd, os.fstat(fd).st_size)
         return hasher.digest()
     except Exception as e:
         raise IOError(f"Lỗi khi hash file {file_path}: {str(e)}")
 
+def hash_file_tree(file_path: Union[str, Path],
+                   chunk_size: int = TREE_CHUNK_SIZE,
+                   jobs: Optional[int] = None) -> bytes:
+    """
+    Hash file theo chế độ sha256-tree-v1: các chunk cố định được hash song song
+    
+    Args:
+        file_path: Đường dẫn file
+        chunk_size: Kích thước chunk (được ghi vào digest nên phải giống khi xác minh)
+        jobs: Số luồng hash (mặc định số lõi CPU)
+        
+    Returns:
+        Digest 32 byte (khác SHA-256 thường của file)
+    """
+    if chunk_size <= 0:
+        raise ValueError("chunk_size phải lớn hơn 0")
+    try:
+        with open(file_path, 'rb', buffering=0) as f:
+            fd = f.fileno()
+            size = os.fstat(fd).st_size
+            hasher = hashlib.sha256(TREE_HASH_PREFIX)
+            hasher.update(chunk_size.to_bytes(8, 'big') + size.to_bytes(8, 'big'))
+            if size == 0:
+                return hasher.digest()
+
+            _advise_sequential(fd)
+            with mmap.mmap(fd, 0, access=mmap.ACCESS_READ) as mapped:
+                view = memoryview(mapped)
+                try:
+                    # hashlib nhả GIL khi hash buffer lớn nên các luồng chạy song song thật
+                    def hash_chunk(offset: int) -> bytes:
+                        return hashlib.sha256(view[offset:offset + chunk_size]).digest()
+                    
+                    with ThreadPoolExecutor(max_workers=jobs or os.cpu_count() or 1) as pool:
+                        for chunk_digest in pool.map(hash_chunk, range(0, size, chunk_size)):
+                            hasher.update(chunk_digest)
+                finally:
+                    view.release()
+            return hasher.digest()
+    except ValueError:
+        raise
+    except Exception as e:
+        raise IOError(f"Lỗi khi hash file {file_path}: {str(e)}")
+
+def hash_file_mode(file_path: Union[str, Path], hash_mode: str = HASH_MODE_SHA256,
+                   jobs: Optional[int] = None) -> bytes:
+    """
+    Hash file theo chế độ hash đã chọn
+    
+    Args:
+        file_path: Đường dẫn file
+        hash_mode: Một trong HASH_MODES ('sha256' mặc định)
+        jobs: Số luồng cho chế độ tree
+        
+    Returns:
+        Digest (32 byte với sha256 / sha256-tree-v1)
+    """
+    if hash_mode == HASH_MODE_TREE:
+        return hash_file_tree(file_path, jobs=jobs)
+    return hash_file(file_path, hash_mode)
+
+def hash_bytes(data: Union[bytes, bytearray, memoryview],
+               hash_mode: str = HASH_MODE_SHA256) -> bytes:
+    """Hash dữ liệu trong bộ nhớ (SHA-256 mặc định, không sao chép dữ liệu)"""
+    hasher = new_hasher(hash_mode)
+    hasher.update(data)
+    return hasher.digest()
+
+def hash_stream(stream: Union[BinaryIO, Iterable[bytes]], chunk_size: int = 65536,
+                hash_mode: str = HASH_MODE_SHA256) -> bytes:
+    """
+    Hash dần dữ liệu từ file-like object nhị phân hoặc iterator các chunk
+    
+    Args:
+        stream: Đối tượng có readinto()/read() hoặc iterable các chunk bytes
+        chunk_size: Kích thước mỗi lần đọc
+        hash_mode: Chế độ hash ('sha256' mặc định; không hỗ trợ chế độ tree)
+        
+    Returns:
+        Digest
+    """
+    hasher = new_hasher(hash_mode)
+    try:
+        if hasattr(stream, 'readinto'):
+            # Dùng lại một buffer cho mọi lần đọc
+            buffer = bytearray(chunk_size)
+            view = memoryview(buffer)
+            while True:
+                size = stream.readinto(buffer)
+                if not size:
+                    break
+                hasher.update(view[:size])
+        elif hasattr(stream, 'read'):
+            for chunk in iter(lambda: stream.read(chunk_size), b""):
+                hasher.update(chunk)
+        else:
+            for chunk in stream:
+                hasher.update(chunk)
+        return hasher.digest()
+    except Exception as e:
+        raise IOError(f"Lỗi khi hash dữ liệu: {str(e)}")
+
 def validate_file_path(file_path: Union[str, Path]) -> Path:
     """Kiểm tra và validate đường dẫn file"""
     path = Path(file_path)
@@ -2,28 +2,108 @@
 Chức năng xác minh chữ ký RSA-PSS
 """
 
+import os
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from dataclasses import dataclass
 from pathlib import Path
-from typing import Union, Optional
+from typing import BinaryIO, Dict, Iterable, Iterator, Tuple, Union, Optional
 from cryptography.hazmat.primitives import hashes
 from cryptography.hazmat.primitives.asymmetric import rsa, padding
 from cryptography.exceptions import InvalidSignature
 
-from .utils import setup_logging, hash_file, safe_file_read, decode_base64
+from .utils import (get_logger, hash_file_mode, hash_stream, safe_file_read, decode_base64,
+                    SIGNATURE_MODE_LEGACY, HASH_MODE_SHA256)
 from .key_manager import RSAKeyManager
+from .digest_cache import DigestCache
+from .verify_cache import VerifyCache
+from .sigstore import SignatureStore, StoreKey
+from .context import VALID_RESULT, VerificationContext, VerificationResult, VerifyFailure
+from .envelope import (EnvelopeError, SignatureEnvelope, is_envelope, looks_like_base64,
+                       parse_envelope)
 
-logger = setup_logging()
+logger = get_logger()
+
+def verify_hash(public_key: rsa.RSAPublicKey, signature: bytes, file_hash: bytes,
+                mode: str = SIGNATURE_MODE_LEGACY,
+                hash_mode: str = HASH_MODE_SHA256) -> bool:
+    """
+    Xác minh chữ ký RSA-PSS trên digest đã tính
+    
+    Args:
+        public_key: Khóa công khai RSA
+        signature: Chữ ký
+        file_hash: Digest của dữ liệu (SHA-256 mặc định)
+        mode: Chế độ chữ ký ('v1' mặc định, 'v2' dùng Prehashed)
+        hash_mode: Chế độ hash khi ký ('sha256' mặc định)
+        
+    Returns:
+        True nếu chữ ký hợp lệ, False nếu không
+    """
+    return VerificationContext(public_key, mode, hash_mode).verify_digest(signature, file_hash)
+
+class SignatureEncodingError(IOError):
+    """File chữ ký đọc được nhưng nội dung không giải mã được"""
+
+@dataclass
+class VerifyResult:
+    """Kết quả xác minh một bộ (file, chữ ký, khóa công khai) trong verify_many"""
+    path: str
+    signature_path: str
+    public_key_path: str
+    valid: bool = False
+    reason: Optional[VerifyFailure] = None
+    error: Optional[str] = None
+    seconds: float = 0.0
+    
+    @property
+    def status(self) -> str:
+        """'valid', 'invalid' hoặc 'error'"""
+        if self.error is not None:
+            return 'error'
+        return 'valid' if self.valid else 'invalid'
 
 class RSAVerifier:
     """Xác minh chữ ký RSA-PSS"""
     
-    def __init__(self, key_manager: Optional[RSAKeyManager] = None):
+    def __init__(self, key_manager: Optional[RSAKeyManager] = None,
+                 digest_cache: Optional[DigestCache] = None,
+                 verify_cache: Optional[VerifyCache] = None,
+                 signature_store: Optional[SignatureStore] = None):
         """
         Khởi tạo RSA Verifier
         
         Args:
             key_manager: RSA Key Manager (tùy chọn)
+            digest_cache: Cache digest file để bỏ qua hash lại file không đổi (tùy chọn)
+            verify_cache: Cache kết quả xác minh để bỏ qua kiểm tra RSA lặp lại (tùy chọn)
+            signature_store: Kho chữ ký dạng pack, dùng thay cho file chữ ký riêng (tùy chọn)
         """
         self.key_manager = key_manager or RSAKeyManager()
+        self.digest_cache = digest_cache
+        self.verify_cache = verify_cache
+        self.signature_store = signature_store
+    
+    def hash_file(self, file_path: Union[str, Path],
+                  hash_mode: str = HASH_MODE_SHA256) -> bytes:
+        """Digest của file theo chế độ hash (SHA-256 qua digest cache nếu có)"""
+        if self.digest_cache is not None and hash_mode == HASH_MODE_SHA256:
+            return self.digest_cache.digest(file_path)
+        return hash_file_mode(file_path, hash_mode)
+    
+    def verification_context(self, public_key_path: str,
+                             mode: str = SIGNATURE_MODE_LEGACY,
+                             hash_mode: str = HASH_MODE_SHA256) -> VerificationContext:
+        """
+        Context xác minh bất biến cho một khóa (có thể dùng chung giữa các luồng)
+        
+        Args:
+            public_key_path: Đường dẫn khóa công khai
+            mode: Chế độ chữ ký ('v1' mặc định, 'v2' dùng Prehashed)
+            hash_mode: Chế độ hash khi ký ('sha256' mặc định)
+        """
+        return VerificationContext.from_file(public_key_path, mode, self.key_manager, hash_mode)
     
     def load_signature(self, signature_path: Union[str, Path]) -> bytes:
         """
@@ -35,24 +115,133 @@ class RSAVerifier:
         Returns:
             Chữ ký dưới dạng bytes
         """
+        return self.read_signature(signature_path)[0]
+    
+    def read_signature(self, signature_path: Union[str, Path]
+                       ) -> Tuple[bytes, Optional[SignatureEnvelope]]:
+        """
+        Tải file chữ ký với một lần đọc, nhận diện định dạng theo nội dung
+        
+        Args:
+            signature_path: Đường dẫn file chữ ký (envelope, envelope armored, .sig hoặc .b64)
+            
+        Returns:
+            Tuple (chữ ký, envelope hoặc None với định dạng cũ)
+        """
+        signature_path = Path(signature_path)
         try:
-            signature_path = Path(signature_path)
-            
-            if signature_path.suffix.lower() == '.b64':
-                # Đọc và decode base64
-                signature_b64 = safe_file_read(signature_path).decode('utf-8')
-                return decode_base64(signature_b64)
-            else:
-                # Đọc binary
-                return safe_file_read(signature_path)
-                
+            data = safe_file_read(signature_path)
         except Exception as e:
-            logger.error(f"Lỗi khi tải chữ ký: {str(e)}")
+            logger.error("Lỗi khi tải chữ ký: %s", e)
             raise IOError(f"Không thể tải chữ ký: {str(e)}")
+        return self.parse_signature(data, signature_path)
+    
+    def read_stored_signature(self, key: StoreKey
+                              ) -> Tuple[bytes, Optional[SignatureEnvelope]]:
+        """
+        Tải chữ ký từ signature_store thay cho file chữ ký
+        
+        Args:
+            key: Đường dẫn file đã ký hoặc digest của artifact (khóa lúc ghi vào store)
+            
+        Returns:
+            Tuple (chữ ký, envelope hoặc None với định dạng cũ)
+        """
+        if self.signature_store is None:
+            raise IOError("Không thể tải chữ ký: verifier chưa có signature_store")
+        try:
+            data = self.signature_store.get(key)
+        except Exception as e:
+            logger.error("Lỗi khi tải chữ ký: %s", e)
+            raise IOError(f"Không thể tải chữ ký: {str(e)}")
+        if data is None:
+            raise IOError(f"Không thể tải chữ ký: không có chữ ký cho {key!r} trong kho")
+        return self.parse_signature(data)
+    
+    @staticmethod
+    def parse_signature(data: bytes, signature_path: Optional[Union[str, Path]] = None
+                        ) -> Tuple[bytes, Optional[SignatureEnvelope]]:
+        """
+        Giải mã nội dung file chữ ký: envelope (nhị phân / armored), base64 hoặc binary
+        
+        Args:
+            data: Nội dung file chữ ký
+            signature_path: Đường dẫn file (file .b64 luôn được coi là base64)
+            
+        Returns:
+            Tuple (chữ ký, envelope hoặc None với định dạng cũ)
+            
+        Raises:
+            SignatureEncodingError: Envelope hoặc base64 không hợp lệ
+        """
+        try:
+            if is_envelope(data):
+                envelope = parse_envelope(data)
+                return envelope.signature, envelope
+            is_b64 = signature_path is not None and Path(signature_path).suffix.lower() == '.b64'
+            if is_b64 or looks_like_base64(data):
+                return decode_base64(data.decode('ascii')), None
+            return data, None
+        except (EnvelopeError, ValueError) as e:
+            logger.error("Lỗi khi tải chữ ký: %s", e)
+            raise SignatureEncodingError(f"Không thể tải chữ ký: {str(e)}")
+    
+    @staticmethod
+    def _prepare(context: VerificationContext, signature: bytes,
+                 envelope: Optional[SignatureEnvelope] = None
+                 ) -> Tuple[VerificationContext, Optional[VerificationResult]]:
+        """
+        Kiểm tra sơ bộ không cần đọc file; envelope (nếu có) quyết định
+        chế độ chữ ký, chế độ hash và khóa phải dùng
+        
+        Returns:
+            Tuple (context sẽ dùng, kết quả thất bại hoặc None nếu cần hash file để xác minh)
+        """
+        if envelope is not None:
+            if envelope.key_fingerprint != context.key_id:
+                logger.warning("Chữ ký không hợp lệ: key_mismatch")
+                return context, VerificationResult(False, VerifyFailure.KEY_MISMATCH)
+            context = context.with_mode(envelope.mode, envelope.hash_mode)
+        
+        failure = context.precheck(signature)
+        if failure is not None:
+            logger.warning("Chữ ký không hợp lệ: %s", failure.value)
+            return context, VerificationResult(False, failure)
+        return context, None
+    
+    def _check(self, context: VerificationContext, signature: bytes,
+               file_path: Union[str, Path],
+               envelope: Optional[SignatureEnvelope] = None) -> VerificationResult:
+        """Kiểm tra sơ bộ rồi hash file và xác minh"""
+        # Kiểm tra sơ bộ trước khi hash file
+        context, failed = self._prepare(context, signature, envelope)
+        if failed is not None:
+            return failed
+        
+        # Hash file
+        file_hash = self.hash_file(file_path, context.hash_mode)
+        
+        return self._verify_digest(context, signature, file_hash)
+    
+    def _verify_digest(self, context: VerificationContext, signature: bytes,
+                       digest: bytes) -> VerificationResult:
+        """Xác minh chữ ký trên digest, dùng verify cache nếu có (chỉ cache kết quả hợp lệ)"""
+        cache = self.verify_cache
+        # Chế độ hash quyết định thuật toán PSS nên là một phần của khóa cache
+        scheme = f"{context.mode}/{context.hash_mode}"
+        if cache is not None and cache.lookup(digest, signature, context.key_id, scheme):
+            logger.info("Chữ ký hợp lệ (cache)")
+            return VALID_RESULT
+        result = context.verify_digest_detailed(signature, digest)
+        if result and cache is not None:
+            cache.record(digest, signature, context.key_id, scheme)
+        return result
     
     def verify_signature(self, file_path: Union[str, Path],
                         signature: bytes,
-                        public_key_path: str) -> bool:
+                        public_key_path: str,
+                        mode: str = SIGNATURE_MODE_LEGACY,
+                        hash_mode: str = HASH_MODE_SHA256) -> bool:
         """
         Xác minh chữ ký file
         
@@ -60,43 +249,153 @@ class RSAVerifier:
             file_path: Đường dẫn file gốc
             signature: Chữ ký
             public_key_path: Đường dẫn khóa công khai
+            mode: Chế độ chữ ký ('v1' mặc định, 'v2' dùng Prehashed)
+            hash_mode: Chế độ hash khi ký ('sha256' mặc định)
             
         Returns:
             True nếu chữ ký hợp lệ, False nếu không
         """
+        return self.verify_signature_detailed(file_path, signature, public_key_path, mode,
+                                              hash_mode=hash_mode).valid
+    
+    def verify_signature_detailed(self, file_path: Union[str, Path],
+                                  signature: bytes,
+                                  public_key_path: str,
+                                  mode: str = SIGNATURE_MODE_LEGACY,
+                                  envelope: Optional[SignatureEnvelope] = None,
+                                  hash_mode: str = HASH_MODE_SHA256) -> VerificationResult:
+        """
+        Xác minh chữ ký file, trả về lý do khi thất bại
+        
+        Chữ ký sai độ dài / ngoài miền giá trị bị loại trước khi đọc file.
+        
+        Args:
+            file_path: Đường dẫn file gốc
+            signature: Chữ ký
+            public_key_path: Đường dẫn khóa công khai
+            mode: Chế độ chữ ký ('v1' mặc định, 'v2' dùng Prehashed)
+            envelope: Envelope đã đọc cùng chữ ký (từ read_signature), nếu có
+            hash_mode: Chế độ hash khi ký ('sha256' mặc định; envelope tự mang chế độ hash)
+            
+        Returns:
+            VerificationResult (valid, reason)
+        """
         try:
-            logger.info(f"Đang xác minh chữ ký cho file: {file_path}")
+            logger.info("Đang xác minh chữ ký cho file: %s", file_path)
             
             # Tải khóa công khai
-            public_key = self.key_manager.load_public_key(public_key_path)
-            
-            # Hash file
-            file_hash = hash_file(file_path)
-            
-            # Xác minh chữ ký bằng RSA-PSS
-            public_key.verify(
-                signature,
-                file_hash,
-                padding.PSS(
-                    mgf=padding.MGF1(hashes.SHA256()),
-                    salt_length=padding.PSS.MAX_LENGTH
-                ),
-                hashes.SHA256()
-            )
-            
-            logger.info("Chữ ký hợp lệ")
-            return True
-            
-        except InvalidSignature:
-            logger.warning("Chữ ký không hợp lệ")
-            return False
+            context = self.verification_context(public_key_path, mode, hash_mode)
+            
+            return self._check(context, signature, file_path, envelope)
+            
+        except Exception as e:
+            logger.error("Lỗi khi xác minh chữ ký: %s", e)
+            raise RuntimeError(f"Không thể xác minh chữ ký: {str(e)}")
+    
+    def verify_bytes(self, data: Union[bytes, bytearray, memoryview],
+                     signature: bytes,
+                     public_key_path: str,
+                     mode: str = SIGNATURE_MODE_LEGACY,
+                     hash_mode: str = HASH_MODE_SHA256) -> bool:
+        """
+        Xác minh chữ ký của dữ liệu trong bộ nhớ
+        
+        Args:
+            data: Dữ liệu gốc (bytes, bytearray hoặc memoryview, không bị sao chép)
+            signature: Chữ ký
+            public_key_path: Đường dẫn khóa công khai
+            mode: Chế độ chữ ký ('v1' mặc định, 'v2' dùng Prehashed)
+            hash_mode: Chế độ hash khi ký ('sha256' mặc định)
+            
+        Returns:
+            True nếu chữ ký hợp lệ, False nếu không
+        """
+        try:
+            context = self.verification_context(public_key_path, mode, hash_mode)
+            return context.verify_bytes(signature, data)
+        except Exception as e:
+            logger.error("Lỗi khi xác minh chữ ký: %s", e)
+            raise RuntimeError(f"Không thể xác minh chữ ký: {str(e)}")
+    
+    def verify_stream(self, stream: Union[BinaryIO, Iterable[bytes]],
+                      signature: bytes,
+                      public_key_path: str,
+                      mode: str = SIGNATURE_MODE_LEGACY,
+                      hash_mode: str = HASH_MODE_SHA256) -> bool:
+        """
+        Xác minh chữ ký của dữ liệu đọc dần từ stream
+        
+        Args:
+            stream: File-like object nhị phân hoặc iterator các chunk bytes
+            signature: Chữ ký
+            public_key_path: Đường dẫn khóa công khai
+            mode: Chế độ chữ ký ('v1' mặc định, 'v2' dùng Prehashed)
+            hash_mode: Chế độ hash khi ký ('sha256' mặc định)
+            
+        Returns:
+            True nếu chữ ký hợp lệ, False nếu không
+        """
+        try:
+            context = self.verification_context(public_key_path, mode, hash_mode)
+            return context.verify_stream(signature, stream)
+        except Exception as e:
+            logger.error("Lỗi khi xác minh chữ ký: %s", e)
+            raise RuntimeError(f"Không thể xác minh chữ ký: {str(e)}")
+    
+    def check_stream(self, context: VerificationContext, signature: bytes,
+                     stream: Union[BinaryIO, Iterable[bytes]],
+                     envelope: Optional[SignatureEnvelope] = None) -> VerificationResult:
+        """
+        Xác minh dữ liệu đọc dần từ stream với context đã tải sẵn
+        
+        Kiểm tra sơ bộ (envelope, độ dài chữ ký) chạy trước khi đọc stream; envelope
+        quyết định chế độ hash dùng để hash stream.
+        
+        Args:
+            context: Verification context của khóa công khai
+            signature: Chữ ký
+            stream: File-like object nhị phân hoặc iterator các chunk bytes
+            envelope: Envelope của chữ ký (nếu có)
+            
+        Returns:
+            VerificationResult (valid, reason)
+        """
+        context, failed = self._prepare(context, signature, envelope)
+        if failed is not None:
+            return failed
+        digest = hash_stream(stream, hash_mode=context.hash_mode)
+        return self._verify_digest(context, signature, digest)
+    
+    def verify_digest(self, digest: bytes,
+                      signature: bytes,
+                      public_key_path: str,
+                      mode: str = SIGNATURE_MODE_LEGACY,
+                      hash_mode: str = HASH_MODE_SHA256) -> bool:
+        """
+        Xác minh chữ ký với digest đã tính sẵn (không cần dữ liệu gốc)
+        
+        Args:
+            digest: Digest của dữ liệu (SHA-256 32 byte mặc định)
+            signature: Chữ ký
+            public_key_path: Đường dẫn khóa công khai
+            mode: Chế độ chữ ký ('v1' mặc định, 'v2' dùng Prehashed)
+            hash_mode: Chế độ hash khi ký ('sha256' mặc định)
+            
+        Returns:
+            True nếu chữ ký hợp lệ, False nếu không
+        """
+        try:
+            context = self.verification_context(public_key_path, mode, hash_mode)
+            return self._verify_digest(context, signature, digest).valid
         except Exception as e:
-            logger.error(f"Lỗi khi xác minh chữ ký: {str(e)}")
+            logger.error("Lỗi khi xác minh chữ ký: %s", e)
             raise RuntimeError(f"Không thể xác minh chữ ký: {str(e)}")
     
     def verify_file(self, file_path: Union[str, Path],
                    signature_path: Union[str, Path],
-                   public_key_path: str) -> bool:
+                   public_key_path: str,
+                   mode: str = SIGNATURE_MODE_LEGACY,
+                   hash_mode: str = HASH_MODE_SHA256) -> bool:
         """
         Xác minh file với chữ ký từ file
         
@@ -104,17 +403,151 @@ class RSAVerifier:
             file_path: Đường dẫn file gốc
             signature_path: Đường dẫn file chữ ký
             public_key_path: Đường dẫn khóa công khai
+            mode: Chế độ chữ ký ('v1' mặc định, 'v2' dùng Prehashed)
+            hash_mode: Chế độ hash khi ký ('sha256' mặc định)
             
         Returns:
             True nếu chữ ký hợp lệ, False nếu không
         """
         try:
-            # Tải chữ ký
-            signature = self.load_signature(signature_path)
+            # Tải chữ ký (envelope, nếu có, quyết định chế độ chữ ký)
+            signature, envelope = self.read_signature(signature_path)
             
             # Xác minh
-            return self.verify_signature(file_path, signature, public_key_path)
+            logger.info("Đang xác minh chữ ký cho file: %s", file_path)
+            context = self.verification_context(public_key_path, mode, hash_mode)
+            return self._check(context, signature, file_path, envelope).valid
             
         except Exception as e:
-            logger.error(f"Lỗi trong quá trình xác minh file: {str(e)}")
-            raise RuntimeError(f"Không thể xác minh file: {str(e)}")
\ No newline at end of file
+            logger.error("Lỗi trong quá trình xác minh file: %s", e)
+            raise RuntimeError(f"Không thể xác minh file: {str(e)}")
+    
+    def verify_file_detailed(self, file_path: Union[str, Path],
+                             signature_path: Union[str, Path],
+                             public_key_path: str,
+                             mode: str = SIGNATURE_MODE_LEGACY,
+                             hash_mode: str = HASH_MODE_SHA256) -> VerificationResult:
+        """
+        Xác minh file với chữ ký từ file, trả về lý do khi thất bại
+        
+        File chữ ký (envelope hoặc base64) hỏng được báo là signature_encoding thay vì ngoại lệ.
+        
+        Returns:
+            VerificationResult (valid, reason)
+        """
+        try:
+            signature, envelope = self.read_signature(signature_path)
+        except SignatureEncodingError:
+            return VerificationResult(False, VerifyFailure.SIGNATURE_ENCODING)
+        try:
+            logger.info("Đang xác minh chữ ký cho file: %s", file_path)
+            context = self.verification_context(public_key_path, mode, hash_mode)
+            return self._check(context, signature, file_path, envelope)
+        except Exception as e:
+            logger.error("Lỗi trong quá trình xác minh file: %s", e)
+            raise RuntimeError(f"Không thể xác minh file: {str(e)}")
+    
+    def verify_file_from_store(self, file_path: Union[str, Path],
+                               public_key_path: str,
+                               mode: str = SIGNATURE_MODE_LEGACY,
+                               hash_mode: str = HASH_MODE_SHA256,
+                               key: Optional[StoreKey] = None) -> VerificationResult:
+        """
+        Xác minh file với chữ ký lấy từ signature_store
+        
+        Args:
+            file_path: Đường dẫn file gốc
+            public_key_path: Đường dẫn khóa công khai
+            mode: Chế độ chữ ký ('v1' mặc định, 'v2' dùng Prehashed)
+            hash_mode: Chế độ hash khi ký ('sha256' mặc định; envelope tự mang chế độ hash)
+            key: Khóa trong store (mặc định là đường dẫn file)
+            
+        Returns:
+            VerificationResult (valid, reason)
+        """
+        try:
+            signature, envelope = self.read_stored_signature(file_path if key is None else key)
+        except SignatureEncodingError:
+            return VerificationResult(False, VerifyFailure.SIGNATURE_ENCODING)
+        try:
+            logger.info("Đang xác minh chữ ký cho file: %s", file_path)
+            context = self.verification_context(public_key_path, mode, hash_mode)
+            return self._check(context, signature, file_path, envelope)
+        except Exception as e:
+            logger.error("Lỗi trong quá trình xác minh file: %s", e)
+            raise RuntimeError(f"Không thể xác minh file: {str(e)}")
+    
+    def verify_many(self, items: Iterable[Tuple[Union[str, Path], Union[str, Path], str]],
+                    jobs: Optional[int] = None,
+                    mode: str = SIGNATURE_MODE_LEGACY,
+                    hash_mode: str = HASH_MODE_SHA256) -> Iterator[VerifyResult]:
+        """
+        Xác minh nhiều bộ (file, chữ ký, khóa công khai): mỗi khóa chỉ tải một lần,
+        hash song song, trả kết quả theo thứ tự hoàn thành
+        
+        Args:
+            items: Danh sách (hoặc iterator) các bộ (file, file chữ ký, khóa công khai);
+                   file chữ ký None nghĩa là lấy chữ ký của file từ signature_store
+            jobs: Số luồng song song (mặc định bằng số CPU)
+            mode: Chế độ chữ ký ('v1' mặc định, 'v2' dùng Prehashed)
+            hash_mode: Chế độ hash khi ký ('sha256' mặc định)
+            
+        Yields:
+            VerifyResult cho từng bộ; lỗi của một bộ không làm dừng cả lô
+        """
+        jobs = jobs or os.cpu_count() or 1
+        contexts: Dict[str, VerificationContext] = {}
+        key_locks: Dict[str, threading.Lock] = {}
+        keys_lock = threading.Lock()
+        
+        def context_for(public_key_path: str) -> VerificationContext:
+            # Mỗi đường dẫn khóa chỉ tải một lần kể cả khi nhiều luồng cùng cần
+            with keys_lock:
+                lock = key_locks.setdefault(public_key_path, threading.Lock())
+            with lock:
+                context = contexts.get(public_key_path)
+                if context is None:
+                    context = self.verification_context(public_key_path, mode, hash_mode)
+                    contexts[public_key_path] = context
+                return context
+        
+        def process(item) -> VerifyResult:
+            started = time.perf_counter()
+            file_path, signature_path, public_key_path = item
+            from_store = signature_path is None and self.signature_store is not None
+            result = VerifyResult(path=str(file_path),
+                                  signature_path=str(self.signature_store.pack_path if from_store
+                                                     else signature_path),
+                                  public_key_path=str(public_key_path))
+            try:
+                context = context_for(str(public_key_path))
+                try:
+                    if from_store:
+                        signature, envelope = self.read_stored_signature(file_path)
+                    else:
+                        signature, envelope = self.read_signature(signature_path)
+                except SignatureEncodingError:
+                    result.reason = VerifyFailure.SIGNATURE_ENCODING
+                else:
+                    outcome = self._check(context, signature, file_path, envelope)
+                    result.valid, result.reason = outcome.valid, outcome.reason
+            except Exception as e:
+                result.error = str(e)
+                logger.error("Lỗi khi xác minh file %s: %s", file_path, e)
+            result.seconds = time.perf_counter() - started
+            return result
+        
+        # Giới hạn số bộ đang xử lý để bộ nhớ không tăng theo kích thước lô
+        max_in_flight = jobs * 2
+        with ThreadPoolExecutor(max_workers=jobs) as pool:
+            pending = set()
+            for item in items:
+                pending.add(pool.submit(process, item))
+                if len(pending) >= max_in_flight:
+                    done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                    for future in done:
+                        yield future.result()
+            while pending:
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    yield future.result()
@@ -0,0 +1,197 @@
+"""
+Cache kết quả xác minh thành công (SQLite), khóa theo (digest nội dung, digest chữ ký,
+fingerprint khóa, chế độ chữ ký)
+
+Dùng cho dịch vụ xác minh lặp lại cùng một file nhiều lần: kết hợp với DigestCache,
+lần xác minh lặp lại chỉ còn một truy vấn theo khóa chính thay cho phép kiểm tra RSA.
+Chỉ kết quả hợp lệ được cache; chữ ký sai luôn được kiểm tra lại.
+"""
+
+import hashlib
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Any, Dict, Optional, Union
+
+from .utils import get_logger
+
+logger = get_logger()
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS verifications (
+    content_digest   BLOB NOT NULL,
+    signature_digest BLOB NOT NULL,
+    key_fingerprint  TEXT NOT NULL,
+    mode             TEXT NOT NULL,
+    verified_at_ns   INTEGER NOT NULL,
+    PRIMARY KEY (content_digest, signature_digest, key_fingerprint, mode)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS verifications_key ON verifications (key_fingerprint);
+CREATE INDEX IF NOT EXISTS verifications_age ON verifications (verified_at_ns);
+"""
+
+
+class VerifyCache:
+    """Cache kết quả xác minh bền vững, có TTL và giới hạn số entry (kiểm tra mỗi COMMIT_EVERY lần ghi)"""
+
+    COMMIT_EVERY = 256
+
+    def __init__(self, db_path: Union[str, Path],
+                 ttl: Optional[float] = 86400.0,
+                 max_entries: Optional[int] = 100_000):
+        """
+        Khởi tạo Verify Cache
+
+        Args:
+            db_path: Đường dẫn file SQLite của cache
+            ttl: Thời gian sống của một entry tính bằng giây (None = không hết hạn)
+            max_entries: Số entry tối đa, entry cũ nhất bị xóa trước (None = không giới hạn)
+        """
+        self.db_path = Path(db_path)
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._pending = 0
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(str(self.db_path), check_same_thread=False)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        with self._db:
+            self._db.executescript(_SCHEMA)
+
+    @staticmethod
+    def _cache_key(digest: bytes, signature: bytes, key_fingerprint: str, mode: str):
+        return (bytes(digest), hashlib.sha256(signature).digest(), key_fingerprint, mode)
+
+    def _oldest_valid_ns(self) -> int:
+        if self.ttl is None:
+            return 0
+        return time.time_ns() - int(self.ttl * 1e9)
+
+    def lookup(self, digest: bytes, signature: bytes,
+               key_fingerprint: str, mode: str) -> bool:
+        """
+        Chữ ký đã được xác minh hợp lệ trên digest này bằng khóa này chưa
+
+        Args:
+            digest: Digest nội dung đã ký
+            signature: Chữ ký
+            key_fingerprint: Fingerprint khóa công khai
+            mode: Chế độ chữ ký
+
+        Returns:
+            True nếu có entry còn hạn
+        """
+        key = self._cache_key(digest, signature, key_fingerprint, mode)
+        with self._lock:
+            row = self._db.execute(
+                "SELECT verified_at_ns FROM verifications WHERE content_digest = ? "
+                "AND signature_digest = ? AND key_fingerprint = ? AND mode = ?", key
+            ).fetchone()
+            hit = row is not None and row[0] >= self._oldest_valid_ns()
+            if hit:
+                self.hits += 1
+            else:
+                self.misses += 1
+        return hit
+
+    def record(self, digest: bytes, signature: bytes,
+               key_fingerprint: str, mode: str) -> None:
+        """Ghi một kết quả xác minh hợp lệ"""
+        with self._lock:
+            self._db.execute(
+                "INSERT OR REPLACE INTO verifications VALUES (?, ?, ?, ?, ?)",
+                self._cache_key(digest, signature, key_fingerprint, mode) + (time.time_ns(),)
+            )
+            self._pending += 1
+            if self._pending >= self.COMMIT_EVERY:
+                self._evict()
+                self._db.commit()
+                self._pending = 0
+
+    def _evict(self) -> int:
+        """Xóa entry hết hạn và entry cũ nhất vượt quá max_entries (gọi khi đang giữ khóa)"""
+        removed = 0
+        if self.ttl is not None:
+            removed += self._db.execute(
+                "DELETE FROM verifications WHERE verified_at_ns < ?",
+                (self._oldest_valid_ns(),)
+            ).rowcount
+        if self.max_entries is not None:
+            (count,) = self._db.execute("SELECT COUNT(*) FROM verifications").fetchone()
+            if count > self.max_entries:
+                removed += self._db.execute(
+                    "DELETE FROM verifications WHERE "
+                    "(content_digest, signature_digest, key_fingerprint, mode) IN ("
+                    "SELECT content_digest, signature_digest, key_fingerprint, mode "
+                    "FROM verifications ORDER BY verified_at_ns LIMIT ?)",
+                    (count - self.max_entries,)
+                ).rowcount
+        self.evictions += removed
+        return removed
+
+    def evict(self) -> int:
+        """
+        Xóa entry hết hạn và entry cũ nhất vượt quá max_entries
+
+        Returns:
+            Số entry đã xóa
+        """
+        with self._lock, self._db:
+            removed = self._evict()
+            self._pending = 0
+        if removed:
+            logger.info("Đã xóa %s kết quả xác minh khỏi cache", removed)
+        return removed
+
+    def revoke_key(self, key_fingerprint: str) -> int:
+        """
+        Xóa mọi kết quả của một khóa (gọi khi khóa bị thu hồi)
+
+        Returns:
+            Số entry đã xóa
+        """
+        with self._lock, self._db:
+            removed = self._db.execute(
+                "DELETE FROM verifications WHERE key_fingerprint = ?",
+                (key_fingerprint.lower(),)
+            ).rowcount
+            self._pending = 0
+        logger.info("Đã xóa %s kết quả xác minh của khóa %s", removed, key_fingerprint)
+        return removed
+
+    def clear(self) -> None:
+        """Xóa toàn bộ cache"""
+        with self._lock, self._db:
+            self._db.execute("DELETE FROM verifications")
+            self._pending = 0
+
+    def flush(self) -> None:
+        """Ghi các entry đang chờ xuống đĩa"""
+        with self._lock:
+            self._db.commit()
+            self._pending = 0
+
+    def stats(self) -> Dict[str, Any]:
+        """Thống kê hit/miss, số entry đã xóa và số entry hiện có"""
+        return {'hits': self.hits, 'misses': self.misses, 'evictions': self.evictions,
+                'entries': len(self)}
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._db.execute("SELECT COUNT(*) FROM verifications").fetchone()[0]
+
+    def close(self) -> None:
+        """Ghi entry đang chờ và đóng cache"""
+        with self._lock:
+            self._db.commit()
+            self._db.close()
+
+    def __enter__(self) -> "VerifyCache":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
@@ -3,18 +3,26 @@ Web Application cho hệ thống chữ ký số RSA
 """
 
 import os
+import base64
+import binascii
 import tempfile
+import threading
 from pathlib import Path
 from flask import Flask, request, render_template, flash, redirect, url_for, send_file, jsonify
 from werkzeug.utils import secure_filename
 from werkzeug.security import generate_password_hash
 
+from .constants import SIGNATURE_MODE_LEGACY, SIGNATURE_MODES, HASH_MODE_TREE
+from .context import SigningContext, VerificationContext
+from .envelope import SignatureEnvelope
 from .key_manager import RSAKeyManager
-from .signer import RSASigner
-from .verifier import RSAVerifier
-from .utils import setup_logging
+from .key_pool import KeyPool
+from .keystore import KeyStore
+from .signer import RSASigner, default_signature_format
+from .verifier import RSAVerifier, SignatureEncodingError
+from .utils import get_logger, configure_logging, hash_stream, HASH_MODE_SHA256, HASH_MODES
 
-logger = setup_logging()
+logger = get_logger()
 
 app = Flask(__name__)
 app.secret_key = os.environ.get('SECRET_KEY', 'dev-secret-key-change-in-production')
@@ -24,6 +32,48 @@ app.config['MAX_CONTENT_LENGTH'] = 16 * 1024 * 1024  # 16MB max file size
 UPLOAD_FOLDER = 'uploads'
 ALLOWED_EXTENSIONS = {'txt', 'pdf', 'png', 'jpg', 'jpeg', 'gif', 'doc', 'docx', 'zip', 'py', 'js', 'html', 'css'}
 
+# Mức log khi app tự cấu hình logging (chạy dưới WSGI server không qua __main__)
+app.config['LOG_LEVEL'] = os.environ.get('RSA_SIGNATURE_LOG_LEVEL', 'INFO')
+
+@app.before_request
+def configure_app_logging():
+    """Cấu hình logging ở request đầu tiên nếu điểm vào chưa cấu hình (gunicorn, uWSGI...)"""
+    if not logger.handlers:
+        configure_logging(app.config['LOG_LEVEL'])
+
+# Kho khóa cho JSON API /api/v1 (khóa chọn theo key ID, không upload khóa theo request)
+app.config['KEYSTORE_PATH'] = os.environ.get('RSA_SIGNATURE_KEYSTORE')
+app.config['KEYSTORE_PASSWORD'] = os.environ.get('RSA_SIGNATURE_KEYSTORE_PASSWORD')
+
+def create_key_pool():
+    """
+    Pool khóa tạo sẵn, bật bằng biến môi trường RSA_SIGNATURE_KEY_POOL=<số khóa>
+    (số nguyên dương; 0 hoặc không đặt là tắt pool, giá trị sai được ghi log và bỏ qua).
+    Pool tự nạp ở lần lấy khóa đầu tiên nếu chưa được start()
+    """
+    value = os.environ.get('RSA_SIGNATURE_KEY_POOL', '').strip()
+    if not value:
+        return None
+    try:
+        pool_size = int(value)
+    except ValueError:
+        pool_size = -1
+    if pool_size < 0:
+        logger.warning("Bỏ qua RSA_SIGNATURE_KEY_POOL không hợp lệ: %r", value)
+        return None
+    if pool_size == 0:
+        return None
+    return KeyPool(key_sizes=(2048, 3072),
+                   low_watermark=pool_size // 4,
+                   high_watermark=pool_size)
+
+key_pool = create_key_pool()
+
+# Signer/verifier dùng chung cho mọi request: mỗi phép ký/xác minh dùng context bất biến
+# riêng và khóa đã tải được cache theo file, nên an toàn khi server chạy nhiều luồng
+file_signer = RSASigner()
+file_verifier = RSAVerifier()
+
 def allowed_file(filename):
     return '.' in filename and filename.rsplit('.', 1)[1].lower() in ALLOWED_EXTENSIONS
 
@@ -45,7 +95,7 @@ def generate_keys():
             password = request.form.get('password', '').strip()
             
             # Tạo key manager
-            key_manager = RSAKeyManager(key_size)
+            key_manager = RSAKeyManager(key_size, key_pool=key_pool)
             key_manager.generate_keypair()
             
             # Tạo tên file tạm
@@ -83,7 +133,11 @@ def sign_file():
             file = request.files['file']
             private_key_file = request.files['private_key']
             password = request.form.get('password', '').strip()
-            format_type = request.form.get('format', 'binary')
+            format_type = request.form.get('format') or None
+            hash_mode = request.form.get('hash') or HASH_MODE_SHA256
+            if hash_mode not in HASH_MODES:
+                flash(f'Thuật toán hash không hỗ trợ: {hash_mode}', 'error')
+                return redirect(request.url)
             
             if file.filename == '' or private_key_file.filename == '':
                 flash('Vui lòng chọn file hợp lệ', 'error')
@@ -100,12 +154,12 @@ def sign_file():
             private_key_file.save(str(private_key_path))
             
             # Ký file
-            signer = RSASigner()
-            signature_path = signer.sign_and_save(
+            signature_path = file_signer.sign_and_save(
                 str(file_path), 
                 str(private_key_path), 
                 password=password if password else None,
-                format_type=format_type
+                format_type=format_type,
+                hash_mode=hash_mode
             )
             
             flash('Đã ký file thành công!', 'success')
@@ -117,7 +171,7 @@ def sign_file():
         except Exception as e:
             flash(f'Lỗi khi ký file: {str(e)}', 'error')
     
-    return render_template('sign_file.html')
+    return render_template('sign_file.html', hash_modes=HASH_MODES)
 
 @app.route('/verify-signature', methods=['GET', 'POST'])
 def verify_signature():
@@ -155,8 +209,7 @@ def verify_signature():
             public_key_file.save(str(public_key_path))
             
             # Xác minh chữ ký
-            verifier = RSAVerifier()
-            is_valid = verifier.verify_file(
+            is_valid = file_verifier.verify_file(
                 str(file_path),
                 str(signature_path),
                 str(public_key_path)
@@ -176,6 +229,159 @@ def verify_signature():
     
     return render_template('verify_signature.html')
 
+# JSON API: nội dung file là body của request (application/octet-stream), được hash dần
+# từ luồng WSGI trong lúc nhận; không qua request.files nên không ghi file tạm xuống đĩa
+
+_keystore = None
+_keystore_lock = threading.Lock()
+
+class ApiError(Exception):
+    """Lỗi trả về cho client JSON API"""
+    def __init__(self, message, status=400):
+        super().__init__(message)
+        self.message = message
+        self.status = status
+
+def get_keystore():
+    """Kho khóa của API (mở một lần theo app.config['KEYSTORE_PATH'])"""
+    global _keystore
+    if _keystore is None:
+        with _keystore_lock:
+            if _keystore is None:
+                if not app.config.get('KEYSTORE_PATH'):
+                    raise ApiError('Chưa cấu hình kho khóa (RSA_SIGNATURE_KEYSTORE)', 503)
+                _keystore = KeyStore(app.config['KEYSTORE_PATH'])
+    return _keystore
+
+def api_scheme():
+    """Đọc và kiểm tra mode / hash từ query string"""
+    mode = request.args.get('mode', SIGNATURE_MODE_LEGACY)
+    hash_mode = request.args.get('hash', HASH_MODE_SHA256)
+    if mode not in SIGNATURE_MODES:
+        raise ApiError(f'Chế độ chữ ký không hỗ trợ: {mode}')
+    if hash_mode not in HASH_MODES:
+        raise ApiError(f'Thuật toán hash không hỗ trợ: {hash_mode}')
+    if hash_mode == HASH_MODE_TREE:
+        raise ApiError('API không hỗ trợ sha256-tree-v1 (body được hash tuần tự)')
+    return mode, hash_mode
+
+def resolve_key(key_id):
+    """Thông tin khóa trong kho theo key ID hoặc tiền tố"""
+    if not key_id:
+        raise ApiError('Thiếu key_id')
+    try:
+        return get_keystore().resolve(key_id)
+    except KeyError as e:
+        raise ApiError(str(e.args[0]), 404)
+    except ValueError as e:
+        raise ApiError(str(e))
+
+class CountingStream:
+    """Bọc luồng body của request và đếm số byte thực sự đã đọc"""
+    def __init__(self, stream):
+        self.stream = stream
+        self.bytes_read = 0
+
+    def readinto(self, buffer):
+        size = self.stream.readinto(buffer)
+        self.bytes_read += size or 0
+        return size
+
+def hash_body(hash_mode):
+    """
+    Hash dần body của request (body vượt MAX_CONTENT_LENGTH bị từ chối với 413)
+
+    Returns:
+        Tuple (digest, số byte đã hash)
+    """
+    stream = CountingStream(request.stream)
+    try:
+        return hash_stream(stream, hash_mode=hash_mode), stream.bytes_read
+    except IOError as e:
+        raise ApiError(str(e))
+
+@app.errorhandler(ApiError)
+def api_error(e):
+    return jsonify({'error': e.message}), e.status
+
+@app.route('/api/v1/sign', methods=['POST'])
+def api_sign():
+    """
+    Ký body của request bằng khóa trong kho
+
+    Query: key_id (bắt buộc), mode, hash, format ('binary' hoặc 'envelope')
+    Trả về JSON: key_id, mode, hash, format, digest (hex), signature (base64)
+    """
+    mode, hash_mode = api_scheme()
+    format_type = request.args.get('format') or default_signature_format(hash_mode)
+    if format_type not in ('binary', 'envelope'):
+        raise ApiError(f'Định dạng chữ ký không hỗ trợ: {format_type}')
+    record = resolve_key(request.args.get('key_id'))
+    try:
+        private_key = get_keystore().load_private_key(record['key_id'],
+                                                      app.config.get('KEYSTORE_PASSWORD'))
+    except (KeyError, ValueError) as e:
+        raise ApiError(str(e.args[0]), 409)
+    except IOError as e:
+        # File khóa trong kho hỏng hoặc sai mật khẩu kho: lỗi phía server
+        raise ApiError(str(e), 500)
+    context = SigningContext(private_key, mode, hash_mode)
+
+    digest, size = hash_body(hash_mode)
+    signature = context.sign_digest(digest)
+    if format_type == 'envelope':
+        signature = SignatureEnvelope.create(signature, context.public_key, mode, hash_mode,
+                                             timestamp=True)
+    encoded = RSASigner.encode_signature(signature, format_type)
+    logger.info("API đã ký %s byte bằng khóa %s", size, record['key_id'][:16])
+    return jsonify({
+        'key_id': record['key_id'],
+        'mode': mode,
+        'hash': hash_mode,
+        'format': format_type,
+        'digest': digest.hex(),
+        'signature': base64.b64encode(encoded).decode('ascii')
+    })
+
+@app.route('/api/v1/verify', methods=['POST'])
+def api_verify():
+    """
+    Xác minh chữ ký cho body của request
+
+    Header X-Signature: base64 nội dung file chữ ký (binary hoặc envelope)
+    Query: key_id (không bắt buộc với envelope), mode, hash (envelope tự mang mode / hash)
+    Trả về JSON: valid, reason, key_id
+    """
+    mode, hash_mode = api_scheme()
+    encoded = request.headers.get('X-Signature')
+    if not encoded:
+        raise ApiError('Thiếu header X-Signature')
+    try:
+        signature, envelope = RSAVerifier.parse_signature(base64.b64decode(encoded, validate=True))
+    except (binascii.Error, SignatureEncodingError):
+        return jsonify({'valid': False, 'reason': 'signature_encoding', 'key_id': None})
+
+    key_id = request.args.get('key_id') or (envelope.key_fingerprint if envelope else None)
+    record = resolve_key(key_id)
+    if record['status'] == 'revoked':
+        raise ApiError(f"Khóa {record['key_id']} đã bị thu hồi", 409)
+    try:
+        public_key = get_keystore().load_public_key(record['key_id'])
+    except IOError as e:
+        raise ApiError(str(e), 500)
+    context = VerificationContext(public_key, mode, hash_mode)
+
+    stream = request.stream
+    try:
+        result = file_verifier.check_stream(context, signature, stream, envelope)
+    except IOError as e:
+        raise ApiError(str(e))
+    return jsonify({
+        'valid': result.valid,
+        'reason': result.reason.value if result.reason else None,
+        'key_id': record['key_id']
+    })
+
 @app.route('/download/<path:filename>')
 def download_file(filename):
     """Download file"""
@@ -192,10 +398,15 @@ def download_file(filename):
 
 @app.errorhandler(413)
 def too_large(e):
+    if request.path.startswith('/api/'):
+        return jsonify({'error': 'File quá lớn'}), 413
     flash('File quá lớn. Kích thước tối đa là 16MB', 'error')
     return redirect(request.url), 413
 
 if __name__ == '__main__':
+    configure_logging(app.config['LOG_LEVEL'])
     ensure_upload_folder()
+    if key_pool is not None:
+        key_pool.start()
     # Chỉ chạy HTTP trong development, production nên dùng HTTPS
     app.run(debug=True, host='0.0.0.0', port=5000)
\ No newline at end of file
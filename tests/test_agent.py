@@ -0,0 +1,92 @@
+import os
+import pytest
+import socket
+import socketserver
+import stat
+import tempfile
+import threading
+import time
+from pathlib import Path
+from rsa_signature.agent import (AgentClient, AgentError, SigningAgent, create_unix_server,
+                                 remove_stale_socket)
+from rsa_signature.key_manager import RSAKeyManager
+from rsa_signature.utils import hash_file
+from rsa_signature.verifier import RSAVerifier
+
+class TestSigningAgent:
+    def setup_method(self):
+        """Khởi động agent với một khóa có mật khẩu"""
+        self.temp_dir = tempfile.mkdtemp()
+        key_manager = RSAKeyManager()
+        key_manager.generate_keypair()
+
+        self.private_key_path = Path(self.temp_dir) / "private.pem"
+        self.public_key_path = Path(self.temp_dir) / "public.pem"
+        key_manager.save_private_key(str(self.private_key_path), "testpass123")
+        key_manager.save_public_key(str(self.public_key_path))
+
+        self.test_file = Path(self.temp_dir) / "test.txt"
+        self.test_file.write_text("Hello, this is a test file for RSA signature!")
+
+        self.socket_path = Path(self.temp_dir) / "agent.sock"
+        self.agent = SigningAgent(idle_ttl=None)
+        self.fingerprint = self.agent.add_key(self.private_key_path, "testpass123")
+        self.thread = threading.Thread(target=self.agent.serve_forever,
+                                       args=(self.socket_path,), daemon=True)
+        self.thread.start()
+        while not self.socket_path.exists():
+            time.sleep(0.01)
+
+    def teardown_method(self):
+        self.agent.shutdown()
+        self.thread.join(timeout=5)
+
+    def test_sign_digest_and_file(self):
+        verifier = RSAVerifier()
+        with AgentClient(self.socket_path) as client:
+            assert client.list_keys() == [self.fingerprint]
+            assert client.key_fingerprint(self.fingerprint[:8]) == self.fingerprint
+
+            by_path = client.sign_digest(hash_file(self.test_file),
+                                         str(self.private_key_path.resolve()))
+            by_file = client.sign_file(self.test_file, self.fingerprint[:8])
+            prehashed = client.sign_digest(hash_file(self.test_file), mode='v2')
+            sha512 = client.sign_digest(hash_file(self.test_file, 'sha512'), hash_mode='sha512')
+
+        assert verifier.verify_signature(str(self.test_file), prehashed,
+                                         str(self.public_key_path), mode='v2')
+        assert verifier.verify_signature(str(self.test_file), sha512,
+                                         str(self.public_key_path), hash_mode='sha512')
+        for signature in (by_path, by_file):
+            assert verifier.verify_signature(str(self.test_file), signature,
+                                             str(self.public_key_path))
+
+    def test_unknown_key_is_rejected(self):
+        with AgentClient(self.socket_path) as client:
+            with pytest.raises(AgentError):
+                client.sign_digest(b"\x00" * 32, "ffffffff")
+            with pytest.raises(AgentError):
+                client.sign_digest(b"short")
+            # Kết nối vẫn dùng được sau lỗi
+            assert client.list_keys() == [self.fingerprint]
+
+    def test_socket_path_safety(self):
+        assert stat.S_IMODE(os.stat(self.socket_path).st_mode) == 0o600
+        # Socket của agent đang chạy không bị chiếm
+        with pytest.raises(FileExistsError):
+            create_unix_server(str(self.socket_path), socketserver.BaseRequestHandler)
+
+        # File thường trùng đường dẫn không bị xóa
+        regular = Path(self.temp_dir) / "not-a-socket"
+        regular.write_text("data")
+        with pytest.raises(FileExistsError):
+            remove_stale_socket(str(regular))
+        assert regular.read_text() == "data"
+
+        # Socket cũ không còn ai lắng nghe thì được dọn
+        stale = Path(self.temp_dir) / "stale.sock"
+        sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        sock.bind(str(stale))
+        sock.close()
+        remove_stale_socket(str(stale))
+        assert not stale.exists()
@@ -0,0 +1,96 @@
+import asyncio
+import tempfile
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from rsa_signature import aio as aio_module
+from rsa_signature.aio import AsyncSigner, AsyncVerifier
+from rsa_signature.context import SigningContext, VerifyFailure
+from rsa_signature.key_manager import RSAKeyManager
+from rsa_signature.verifier import RSAVerifier
+
+class TestAsyncAPI:
+    def setup_method(self):
+        """Tạo cặp khóa và vài file mẫu"""
+        self.temp_dir = Path(tempfile.mkdtemp())
+        key_manager = RSAKeyManager()
+        key_manager.generate_keypair()
+        self.private_key_path = str(self.temp_dir / "private.pem")
+        self.public_key_path = str(self.temp_dir / "public.pem")
+        key_manager.save_private_key(self.private_key_path)
+        key_manager.save_public_key(self.public_key_path)
+
+        self.files = []
+        for index in range(6):
+            path = self.temp_dir / f"file{index}.txt"
+            path.write_bytes(f"nội dung {index}".encode() * 1000)
+            self.files.append(path)
+
+    def test_sign_and_verify_many(self):
+        async def run():
+            async with AsyncSigner() as signer, AsyncVerifier() as verifier:
+                signature = await signer.sign_file(self.files[0], self.private_key_path)
+                assert RSAVerifier().verify_signature(self.files[0], signature,
+                                                      self.public_key_path)
+
+                signed = [result async for result in signer.sign_many(
+                    self.files, self.private_key_path, concurrency=2, save=True,
+                    hash_mode='sha512')]
+                assert all(result.ok for result in signed)
+
+                self.files[1].write_bytes(b"tampered")
+                items = [(result.path, result.signature_path, self.public_key_path)
+                         for result in signed]
+                statuses = {result.path: result.status
+                            async for result in verifier.verify_many(items, concurrency=3)}
+                assert statuses.pop(str(self.files[1])) == 'invalid'
+                assert set(statuses.values()) == {'valid'}
+
+                bad_signature = self.temp_dir / "bad.b64"
+                bad_signature.write_text("not base64 !!")
+                results = [result async for result in verifier.verify_many(
+                    [(self.files[0], bad_signature, self.public_key_path)])]
+                assert results[0].reason is VerifyFailure.SIGNATURE_ENCODING
+        asyncio.run(run())
+
+    def test_private_key_caches_are_bounded(self, monkeypatch):
+        monkeypatch.setattr(aio_module, "PROCESS_CONTEXT_CACHE_SIZE", 2)
+        monkeypatch.setattr(aio_module, "_process_contexts", OrderedDict())
+        keys = [RSAKeyManager(use_cache=False).generate_keypair()[0]
+                for _ in range(AsyncSigner.PRIVATE_DER_CACHE_SIZE + 1)]
+        contexts = [SigningContext(key) for key in keys]
+        signer = AsyncSigner()
+        for context in contexts:
+            der = signer._private_der(context)
+            aio_module._sign_in_process(context.key_id, der, 'v1', 'sha256', b"\x00" * 32)
+        assert list(signer._private_ders) == [context.key_id for context in contexts[1:]]
+        assert [key[0] for key in aio_module._process_contexts] == \
+            [context.key_id for context in contexts[-2:]]
+        signer.close()
+        assert not signer._private_ders
+
+    def test_process_pool_signing(self):
+        async def run():
+            with ProcessPoolExecutor(max_workers=1) as pool:
+                async with AsyncSigner(sign_executor=pool) as signer:
+                    signature = await signer.sign_file(self.files[2], self.private_key_path,
+                                                       mode='v2')
+            async with AsyncVerifier() as verifier:
+                signature_path = self.temp_dir / "file2.sig"
+                signature_path.write_bytes(signature)
+                assert await verifier.verify_file(self.files[2], signature_path,
+                                                  self.public_key_path, mode='v2')
+        asyncio.run(run())
+
+    def test_break_cancels_pending(self):
+        async def run():
+            async with AsyncSigner() as signer:
+                results = signer.sign_many(self.files * 10, self.private_key_path, concurrency=4)
+                async for result in results:
+                    assert result.ok
+                    break
+                await results.aclose()
+                # Không còn tác vụ nào của lô chạy sau khi dừng
+                current = asyncio.current_task()
+                assert [task for task in asyncio.all_tasks() if task is not current] == []
+        asyncio.run(run())
@@ -1,8 +1,12 @@
 import pytest
 import tempfile
 import os
+import time
 from pathlib import Path
-from rsa_signature.key_manager import RSAKeyManager
+from rsa_signature.key_manager import RSAKeyManager, public_key_fingerprint
+from rsa_signature.key_cache import KeyCache
+from rsa_signature.key_pool import KeyPool
+from rsa_signature.provisioning import provision_keypairs
 
 class TestRSAKeyManager:
     def test_generate_keypair_2048(self):
@@ -75,5 +79,130 @@ class TestRSAKeyManager:
             with pytest.raises(ValueError):
                 new_key_manager.load_private_key(str(private_key_path), wrong_password)
 
+    @pytest.mark.parametrize("encoding,kdf_rounds", [
+        ("der", None),
+        ("pkcs12", None),
+        ("pkcs12", 1000),
+    ])
+    def test_save_and_load_binary_encodings(self, encoding, kdf_rounds):
+        with tempfile.TemporaryDirectory() as temp_dir:
+            key_manager = RSAKeyManager()
+            key_manager.generate_keypair()
+            
+            private_key_path = Path(temp_dir) / "private.key"
+            public_key_path = Path(temp_dir) / "public.der"
+            key_manager.save_private_key(str(private_key_path), "test123",
+                                         encoding=encoding, kdf_rounds=kdf_rounds)
+            key_manager.save_public_key(str(public_key_path), encoding='der')
+            
+            assert not private_key_path.read_bytes().startswith(b'-----')
+            
+            # Định dạng được nhận diện từ nội dung, không cần chỉ định khi tải
+            new_key_manager = RSAKeyManager(use_cache=False)
+            loaded_key = new_key_manager.load_private_key(str(private_key_path), "test123")
+            public_key = new_key_manager.load_public_key(str(public_key_path))
+            assert public_key_fingerprint(loaded_key.public_key()) == public_key_fingerprint(public_key)
+            
+            with pytest.raises(ValueError):
+                new_key_manager.load_private_key(str(private_key_path), "wrong")
+    
+    def test_kdf_rounds_require_pkcs12(self):
+        key_manager = RSAKeyManager()
+        key_manager.generate_keypair()
+        with pytest.raises(ValueError):
+            key_manager.save_private_key("unused.pem", "test123", kdf_rounds=1000)
+    
+    def test_key_cache_hit_and_invalidate_on_change(self):
+        with tempfile.TemporaryDirectory() as temp_dir:
+            cache = KeyCache(max_entries=4)
+            key_manager = RSAKeyManager(key_cache=cache)
+            key_manager.generate_keypair()
+            
+            private_key_path = Path(temp_dir) / "private.pem"
+            key_manager.save_private_key(str(private_key_path), "test123")
+            
+            first = key_manager.load_private_key(str(private_key_path), "test123")
+            second = key_manager.load_private_key(str(private_key_path), "test123")
+            assert first is second
+            assert cache.stats()['hits'] == 1
+            
+            # Mật khẩu khác không được dùng lại khóa đã cache
+            with pytest.raises(ValueError):
+                key_manager.load_private_key(str(private_key_path), "wrong")
+            
+            # Ghi đè file khóa phải làm mất hiệu lực cache
+            key_manager.generate_keypair()
+            key_manager.save_private_key(str(private_key_path), "test123")
+            third = key_manager.load_private_key(str(private_key_path), "test123")
+            assert third is not first
+    
+    def test_key_cache_separates_unvalidated_keys(self):
+        with tempfile.TemporaryDirectory() as temp_dir:
+            cache = KeyCache(max_entries=4)
+            key_manager = RSAKeyManager(key_cache=cache)
+            key_manager.generate_keypair()
+            private_key_path = str(Path(temp_dir) / "private.pem")
+            key_manager.save_private_key(private_key_path)
+            
+            unvalidated = RSAKeyManager(key_cache=cache, skip_key_validation=True)
+            skipped = unvalidated.load_private_key(private_key_path)
+            validated = RSAKeyManager(key_cache=cache).load_private_key(private_key_path)
+            assert validated is not skipped
+            assert len(cache) == 2
+    
+    def test_key_cache_lru_eviction(self):
+        with tempfile.TemporaryDirectory() as temp_dir:
+            cache = KeyCache(max_entries=1)
+            key_manager = RSAKeyManager(key_cache=cache)
+            key_manager.generate_keypair()
+            
+            paths = [Path(temp_dir) / f"public{i}.pem" for i in range(2)]
+            for path in paths:
+                key_manager.save_public_key(str(path))
+                key_manager.load_public_key(str(path))
+            
+            assert len(cache) == 1
+            assert cache.invalidate() == 1
+
+    def test_generate_keypair_from_pool(self):
+        with KeyPool(key_sizes=(2048,), low_watermark=0, high_watermark=1,
+                     max_workers=1) as pool:
+            deadline = time.time() + 30
+            while pool.depth(2048) == 0 and time.time() < deadline:
+                time.sleep(0.05)
+            
+            key_manager = RSAKeyManager(2048, key_pool=pool)
+            private_key, public_key = key_manager.generate_keypair()
+            assert private_key.key_size == 2048
+            
+            stats = pool.stats()[2048]
+            assert stats['taken'] == 1
+            assert stats['last_refill_latency'] is not None
+    
+    def test_generate_keypair_pool_fallback(self):
+        with KeyPool(key_sizes=(3072,), max_workers=1) as pool:
+            # Pool không giữ khóa 2048 bit nên phải tạo trực tiếp
+            key_manager = RSAKeyManager(2048, key_pool=pool)
+            private_key, _ = key_manager.generate_keypair()
+            assert private_key.key_size == 2048
+
+    def test_provision_keypairs_parallel(self):
+        with tempfile.TemporaryDirectory() as temp_dir:
+            summary = provision_keypairs(temp_dir, count=2, jobs=2, password="test123")
+            
+            assert [item['index'] for item in summary['keys']] == [1, 2]
+            for item in summary['keys']:
+                key_manager = RSAKeyManager(use_cache=False)
+                public_key = key_manager.load_public_key(item['public_key'])
+                assert public_key_fingerprint(public_key) == item['fingerprint']
+                key_manager.load_private_key(item['private_key'], "test123")
+            
+            # Chạy lại vào cùng thư mục: khóa cũ không bị ghi đè, lỗi nằm trong tóm tắt
+            original = Path(summary['keys'][0]['private_key']).read_bytes()
+            rerun = provision_keypairs(temp_dir, count=3, jobs=2)
+            assert rerun['failed'] == 2 and [item['index'] for item in rerun['errors']] == [1, 2]
+            assert [item['index'] for item in rerun['keys']] == [3]
+            assert Path(summary['keys'][0]['private_key']).read_bytes() == original
+
 if __name__ == "__main__":
     pytest.main([__file__])
\ No newline at end of file
@@ -0,0 +1,48 @@
+import pytest
+import tempfile
+from pathlib import Path
+from rsa_signature.key_manager import RSAKeyManager, public_key_fingerprint
+from rsa_signature.keystore import KeyStore
+
+class TestKeyStore:
+    def setup_method(self):
+        """Thiết lập cho mỗi test"""
+        self.temp_dir = tempfile.mkdtemp()
+        self.store = KeyStore(Path(self.temp_dir) / "store")
+        self.key_manager = RSAKeyManager()
+        self.key_manager.generate_keypair()
+
+    def teardown_method(self):
+        self.store.close()
+
+    def test_add_and_resolve_by_prefix(self):
+        key_id = self.store.add_keypair(self.key_manager, "test123")
+
+        assert key_id == public_key_fingerprint(self.key_manager.public_key)
+        record = self.store.resolve(key_id[:8])
+        assert record['key_id'] == key_id
+        assert record['status'] == 'active'
+        assert Path(record['public_path']).name == f"{key_id}.pub.pem"
+
+        private_key = self.store.load_private_key(key_id[:8], "test123")
+        assert public_key_fingerprint(private_key.public_key()) == key_id
+
+    def test_public_only_and_unknown_key(self):
+        key_id = self.store.add_public_key(self.key_manager.public_key)
+
+        assert key_id in self.store
+        assert len(self.store) == 1
+        with pytest.raises(KeyError):
+            self.store.load_private_key(key_id)
+        with pytest.raises(KeyError):
+            self.store.resolve("0000" if not key_id.startswith("0000") else "ffff")
+
+    def test_revoked_key_cannot_sign(self):
+        key_id = self.store.add_keypair(self.key_manager)
+        self.store.revoke(key_id)
+
+        assert [r['key_id'] for r in self.store.keys(status='revoked')] == [key_id]
+        with pytest.raises(ValueError):
+            self.store.load_private_key(key_id)
+        # Khóa công khai vẫn tải được để xác minh chữ ký cũ
+        assert self.store.load_public_key(key_id).key_size == 2048
@@ -0,0 +1,37 @@
+import os
+import tempfile
+from pathlib import Path
+from rsa_signature.utils import configure_logging, get_logger, shutdown_logging
+
+class TestLogging:
+    def setup_method(self):
+        self.temp_dir = Path(tempfile.mkdtemp())
+        self.log_file = self.temp_dir / "rsa_signature.log"
+
+    def teardown_method(self):
+        shutdown_logging()
+
+    def test_configure_once_and_redact(self):
+        logger = configure_logging(log_file=self.log_file, console=False)
+        # Gọi lại chỉ đổi mức log, không thêm handler
+        handlers = list(logger.handlers)
+        assert configure_logging("DEBUG", log_file=self.log_file, console=False) is logger
+        assert logger.handlers == handlers
+
+        logger.info("Đã ký %s file", 3)
+        logger.info("Password của khóa là %s", "hunter2")
+        logger.debug("chi tiết %s", "debug")
+        shutdown_logging()
+
+        lines = self.log_file.read_text(encoding='utf-8').splitlines()
+        assert [line.split(' - ')[-1] for line in lines] == ["Đã ký 3 file", "chi tiết debug"]
+        assert handlers[0] not in logger.handlers
+
+    def test_import_has_no_side_effects(self):
+        cwd = os.getcwd()
+        os.chdir(self.temp_dir)
+        try:
+            get_logger().warning("chưa cấu hình logging")
+            assert not (self.temp_dir / "rsa_signature.log").exists()
+        finally:
+            os.chdir(cwd)
@@ -0,0 +1,117 @@
+import json
+import os
+import time
+import pytest
+import tempfile
+from pathlib import Path
+from rsa_signature.digest_cache import DigestCache
+from rsa_signature.key_manager import RSAKeyManager
+from rsa_signature.manifest import TreeSigner
+from rsa_signature.merkle import MerkleTree, leaf_hash, verify_proof
+
+class TestTreeSigner:
+    def setup_method(self):
+        """Tạo cây thư mục và cặp khóa cho mỗi test"""
+        self.temp_dir = Path(tempfile.mkdtemp())
+        self.tree = self.temp_dir / "release"
+        for rel in ["a.txt", "b/c.txt", "b/d/e.bin", "z.txt", "m.txt"]:
+            path = self.tree / rel
+            path.parent.mkdir(parents=True, exist_ok=True)
+            path.write_text(f"content of {rel}")
+
+        key_manager = RSAKeyManager()
+        key_manager.generate_keypair()
+        self.private_key_path = str(self.temp_dir / "private.pem")
+        self.public_key_path = str(self.temp_dir / "public.pem")
+        key_manager.save_private_key(self.private_key_path)
+        key_manager.save_public_key(self.public_key_path)
+
+        self.signer = TreeSigner()
+
+    def test_merkle_proofs_for_odd_sizes(self):
+        for size in range(1, 9):
+            leaves = [leaf_hash(bytes([i])) for i in range(size)]
+            tree = MerkleTree(leaves)
+            for index, leaf in enumerate(leaves):
+                assert verify_proof(leaf, tree.proof(index), tree.root)
+            assert not verify_proof(leaf_hash(b"other"), tree.proof(0), tree.root)
+
+    def test_sign_and_verify_tree(self):
+        manifest = self.signer.sign_tree(self.tree, self.private_key_path, jobs=2)
+        manifest_path = TreeSigner.default_manifest_path(self.tree)
+        self.signer.save_manifest(manifest, manifest_path)
+
+        loaded = self.signer.load_manifest(manifest_path)
+        assert [rel for rel, _ in loaded['files']] == ["a.txt", "b/c.txt", "b/d/e.bin",
+                                                       "m.txt", "z.txt"]
+        assert self.signer.verify_tree(self.tree, loaded, self.public_key_path)['valid']
+
+        (self.tree / "b/c.txt").write_text("tampered")
+        (self.tree / "new.txt").write_text("extra")
+        (self.tree / "a.txt").unlink()
+        report = self.signer.verify_tree(self.tree, loaded, self.public_key_path)
+        assert not report['valid']
+        assert report['modified'] == ["b/c.txt"]
+        assert report['missing'] == ["a.txt"]
+        assert report['extra'] == ["new.txt"]
+
+    def test_verify_single_file_with_proof(self):
+        manifest = self.signer.sign_tree(self.tree, self.private_key_path)
+        proof = self.signer.inclusion_proof(manifest, "b/d/e.bin")
+
+        # Chỉ cần root + chữ ký + proof, không cần danh sách file
+        header = {k: manifest[k] for k in ('root', 'signature', 'mode')}
+        target = self.tree / "b/d/e.bin"
+        assert self.signer.verify_file(target, "b/d/e.bin", header, self.public_key_path,
+                                       proof=json.loads(json.dumps(proof)))
+        assert not self.signer.verify_file(target, "a.txt", manifest, self.public_key_path)
+
+        target.write_text("tampered")
+        assert not self.signer.verify_file(target, "b/d/e.bin", manifest, self.public_key_path)
+
+    def test_tampered_manifest_is_rejected(self):
+        manifest = self.signer.sign_tree(self.tree, self.private_key_path)
+        manifest['files'][0][1] = "00" * 32
+        assert not self.signer.verify_manifest(manifest, self.public_key_path)
+
+    def _backdate(self, rel, seconds=60):
+        """Lùi mtime để entry cache không bị coi là racy"""
+        mtime = time.time() - seconds
+        os.utime(self.tree / rel, (mtime, mtime))
+
+    def test_digest_cache_rehashes_only_changed_files(self):
+        files = ["a.txt", "b/c.txt", "b/d/e.bin", "z.txt", "m.txt"]
+        for rel in files:
+            self._backdate(rel)
+
+        with DigestCache.for_directory(self.tree) as cache:
+            signer = TreeSigner(digest_cache=cache)
+            first = signer.sign_tree(self.tree, self.private_key_path)
+            assert cache.misses == len(files)
+
+            second = signer.sign_tree(self.tree, self.private_key_path)
+            assert cache.hits == len(files)
+            assert second['root'] == first['root']
+
+            (self.tree / "z.txt").write_text("changed")
+            self._backdate("z.txt", 30)
+            third = signer.sign_tree(self.tree, self.private_key_path)
+            assert cache.misses == len(files) + 1
+            assert third['root'] != first['root']
+            assert signer.verify_tree(self.tree, third, self.public_key_path)['valid']
+
+            (self.tree / "a.txt").unlink()
+            assert cache.evict_missing() == 1
+            assert len(cache) == len(files) - 1
+
+        with DigestCache.for_directory(self.tree, strict=True) as cache:
+            TreeSigner(digest_cache=cache).sign_tree(self.tree, self.private_key_path)
+            assert cache.hits == 0 and cache.misses == len(files) - 1
+
+    def test_digest_cache_ignores_racy_entries(self):
+        with DigestCache(self.temp_dir / "digests.sqlite3") as cache:
+            path = self.tree / "a.txt"
+            cache.digest(path)
+            # mtime vừa mới ghi: có thể đổi trong cùng tick mtime nên không tin cache
+            cache.digest(path)
+            assert cache.hits == 0
@@ -1,9 +1,19 @@
+import io
+import json
+import os
+import hashlib
+from concurrent.futures import ThreadPoolExecutor
 import pytest
 import tempfile
 from pathlib import Path
 from rsa_signature.key_manager import RSAKeyManager
 from rsa_signature.signer import RSASigner
 from rsa_signature.verifier import RSAVerifier
+from rsa_signature.batch import ReportWriter, iter_batch_items
+from rsa_signature.context import SigningContext, VerificationContext, VerifyFailure
+from rsa_signature.envelope import SignatureEnvelope
+from rsa_signature import utils
+from rsa_signature.utils import hash_file, hash_file_tree
 
 class TestSignerVerifier:
     def setup_method(self):
@@ -106,3 +116,276 @@ class TestSignerVerifier:
         )
 
         assert is_valid == True
+
+
+    def test_sign_many_reports_per_file_errors(self):
+        """Test ký hàng loạt: lỗi một file không dừng cả lô"""
+        files = []
+        for i in range(5):
+            path = Path(self.temp_dir) / f"batch{i}.txt"
+            path.write_text(f"batch file {i}")
+            files.append(str(path))
+        missing = str(Path(self.temp_dir) / "missing.txt")
+
+        signer = RSASigner()
+        verifier = RSAVerifier()
+        results = list(signer.sign_many(files + [missing], str(self.private_key_path),
+                                        jobs=2, save=True))
+
+        assert len(results) == 6
+        failed = [r for r in results if not r.ok]
+        assert [r.path for r in failed] == [missing]
+        for result in results:
+            if result.ok:
+                assert verifier.verify_file(result.path, result.signature_path,
+                                            str(self.public_key_path))
+
+    def test_sign_many_with_sign_processes(self):
+        """Test ký hàng loạt với phép ký RSA chạy trên tiến trình riêng"""
+        signer = RSASigner()
+        verifier = RSAVerifier()
+        results = list(signer.sign_many([str(self.test_file)] * 3, str(self.private_key_path),
+                                        jobs=2, sign_processes=1))
+
+        assert all(r.ok for r in results)
+        for result in results:
+            assert verifier.verify_signature(str(self.test_file), result.signature,
+                                             str(self.public_key_path))
+
+
+    def test_sign_bytes_and_stream_match_file(self):
+        """Test ký dữ liệu trong bộ nhớ và stream tương thích với ký file"""
+        signer = RSASigner()
+        verifier = RSAVerifier()
+        data = self.test_file.read_bytes()
+
+        from_bytes = signer.sign_bytes(memoryview(data), str(self.private_key_path))
+        from_stream = signer.sign_stream(io.BytesIO(data), str(self.private_key_path))
+        from_chunks = signer.sign_stream(iter([data[:5], data[5:]]), str(self.private_key_path))
+
+        for signature in (from_bytes, from_stream, from_chunks):
+            assert verifier.verify_signature(str(self.test_file), signature,
+                                             str(self.public_key_path))
+            assert verifier.verify_bytes(bytearray(data), signature, str(self.public_key_path))
+            assert verifier.verify_stream(io.BytesIO(data), signature, str(self.public_key_path))
+
+        assert not verifier.verify_bytes(b"tampered", from_bytes, str(self.public_key_path))
+
+
+    def test_sign_digest_modes(self):
+        """Test ký digest: v1 tương thích sign_file, v2 dùng Prehashed"""
+        signer = RSASigner()
+        verifier = RSAVerifier()
+        digest = hash_file(self.test_file)
+
+        legacy = signer.sign_digest(digest, str(self.private_key_path))
+        assert verifier.verify_signature(str(self.test_file), legacy, str(self.public_key_path))
+
+        prehashed = signer.sign_digest(digest, str(self.private_key_path), mode='v2')
+        assert verifier.verify_digest(digest, prehashed, str(self.public_key_path), mode='v2')
+        assert verifier.verify_signature(str(self.test_file), prehashed,
+                                         str(self.public_key_path), mode='v2')
+        # Chữ ký v2 không hợp lệ khi xác minh theo chế độ v1 và ngược lại
+        assert not verifier.verify_digest(digest, prehashed, str(self.public_key_path))
+        assert not verifier.verify_digest(digest, legacy, str(self.public_key_path), mode='v2')
+
+        with pytest.raises(RuntimeError):
+            signer.sign_digest(b"short", str(self.private_key_path), mode='v2')
+
+    def test_hash_file_engines(self):
+        """Test hash_file (readinto và mmap) và chế độ tree-hash có phiên bản"""
+        data = os.urandom(300_000)
+        self.test_file.write_bytes(data)
+        assert hash_file(self.test_file) == hashlib.sha256(data).digest()
+
+        threshold = utils.MMAP_THRESHOLD
+        utils.MMAP_THRESHOLD = 0
+        try:
+            assert hash_file(self.test_file) == hashlib.sha256(data).digest()
+        finally:
+            utils.MMAP_THRESHOLD = threshold
+
+        chunk_size = 65536
+        expected = hashlib.sha256(
+            utils.TREE_HASH_PREFIX + chunk_size.to_bytes(8, 'big') + len(data).to_bytes(8, 'big')
+            + b"".join(hashlib.sha256(data[i:i + chunk_size]).digest()
+                       for i in range(0, len(data), chunk_size))
+        ).digest()
+        assert hash_file_tree(self.test_file, chunk_size, jobs=3) == expected
+        assert hash_file_tree(self.test_file, chunk_size, jobs=1) == expected
+        assert hash_file_tree(self.test_file, chunk_size * 2) != expected
+
+    def test_verify_many_loads_each_key_once(self):
+        """Test verify_many: trạng thái từng bộ và mỗi khóa chỉ tải một lần"""
+        signer = RSASigner()
+        files = []
+        for index in range(6):
+            path = Path(self.temp_dir) / f"file{index}.txt"
+            path.write_text(f"data {index}")
+            signer.sign_and_save(str(path), str(self.private_key_path))
+            files.append(path)
+        files[0].write_text("tampered")
+
+        verifier = RSAVerifier()
+        loads = []
+        original = verifier.key_manager.load_public_key
+        verifier.key_manager.load_public_key = lambda path: loads.append(path) or original(path)
+
+        items = [(path, f"{path}.sig", str(self.public_key_path)) for path in files]
+        items.append((Path(self.temp_dir) / "missing.txt", "missing.txt.sig",
+                      str(self.public_key_path)))
+        results = {Path(r.path).name: r.status for r in verifier.verify_many(iter(items), jobs=3)}
+
+        assert results.pop("file0.txt") == "invalid"
+        assert results.pop("missing.txt") == "error"
+        assert set(results.values()) == {"valid"}
+        assert loads == [str(self.public_key_path)]
+
+    def test_batch_list_and_report(self):
+        """Test đọc danh sách JSON Lines và ghi báo cáo kèm mã thoát"""
+        signer = RSASigner()
+        signer.sign_and_save(str(self.test_file), str(self.private_key_path))
+        listing = io.StringIO('{"file": "test.txt"}\n\n{"file": "nope.txt", "signature": "x.sig"}\n')
+        items = iter_batch_items(listing, 'jsonl', self.temp_dir, "public.pem")
+
+        report = io.StringIO()
+        writer = ReportWriter(report, 'jsonl')
+        for result in RSAVerifier().verify_many(items, jobs=1):
+            writer.write(result)
+
+        records = [json.loads(line) for line in report.getvalue().splitlines()]
+        statuses = {Path(r['file']).name: r['status'] for r in records}
+        assert statuses == {"test.txt": "valid", "nope.txt": "error"}
+        assert writer.counts == {'valid': 1, 'invalid': 0, 'error': 1}
+        assert writer.exit_code == 2
+
+        # Dòng hỏng được báo cáo riêng, không dừng cả lô
+        listing = io.StringIO('{"file": "test.txt"}\n{broken\n[1, 2]\n{"signature": "x.sig"}\n'
+                              '{"file": "test.txt"}\n')
+        report = io.StringIO()
+        writer = ReportWriter(report, 'jsonl')
+        items = iter_batch_items(listing, 'jsonl', self.temp_dir, "public.pem",
+                                 on_invalid=writer.write)
+        for result in RSAVerifier().verify_many(items, jobs=1):
+            writer.write(result)
+        records = [json.loads(line) for line in report.getvalue().splitlines()]
+        assert [r['reason'] for r in records if r['status'] == 'error'] == ['invalid_item'] * 3
+        assert writer.counts == {'valid': 2, 'invalid': 0, 'error': 3}
+        with pytest.raises(ValueError):
+            list(iter_batch_items(io.StringIO('{broken\n'), 'jsonl'))
+
+    def test_contexts_are_immutable_and_shareable(self):
+        """Test context bất biến dùng chung giữa nhiều luồng"""
+        signing = SigningContext.from_file(self.private_key_path, mode='v2')
+        verification = VerificationContext.from_file(self.public_key_path, mode='v2')
+
+        with pytest.raises(AttributeError):
+            signing.mode = 'v1'
+        with pytest.raises(AttributeError):
+            verification.extra = 1
+        with pytest.raises(ValueError):
+            SigningContext(signing.private_key, mode='v9')
+
+        digests = [hashlib.sha256(str(i).encode()).digest() for i in range(16)]
+        with ThreadPoolExecutor(max_workers=4) as pool:
+            signatures = list(pool.map(signing.sign_digest, digests))
+            results = list(pool.map(verification.verify_digest, signatures, digests))
+        assert all(results)
+        assert not verification.verify_digest(signatures[0], digests[1])
+
+        # RSASigner/RSAVerifier cho cùng kết quả qua context
+        signature = RSASigner().sign_file(str(self.test_file), str(self.private_key_path))
+        assert signing.verification_context().public_key.public_numbers() == \
+            verification.public_key.public_numbers()
+        assert VerificationContext(verification.public_key).verify_file(signature, self.test_file)
+
+    def test_precheck_rejects_before_reading_file(self):
+        """Test chữ ký sai định dạng bị loại với lý do cụ thể, không cần đọc file"""
+        verifier = RSAVerifier()
+        signature = RSASigner().sign_file(str(self.test_file), str(self.private_key_path))
+        missing = Path(self.temp_dir) / "does-not-exist.bin"
+
+        result = verifier.verify_signature_detailed(missing, signature[:-1],
+                                                    str(self.public_key_path))
+        assert not result and result.reason is VerifyFailure.SIGNATURE_LENGTH
+        result = verifier.verify_signature_detailed(missing, b"\xff" * len(signature),
+                                                    str(self.public_key_path))
+        assert result.reason is VerifyFailure.SIGNATURE_RANGE
+
+        corrupt = Path(self.temp_dir) / "corrupt.b64"
+        corrupt.write_bytes(b"\xff\xfe not base64")
+        result = verifier.verify_file_detailed(missing, corrupt, str(self.public_key_path))
+        assert result.reason is VerifyFailure.SIGNATURE_ENCODING
+
+        self.test_file.write_text("tampered")
+        result = verifier.verify_signature_detailed(self.test_file, signature,
+                                                    str(self.public_key_path))
+        assert result.reason is VerifyFailure.SIGNATURE_MISMATCH
+
+    def test_envelope_formats(self):
+        """Test envelope nhị phân / armored: nhận biết theo nội dung, mang chế độ và key ID"""
+        signer = RSASigner()
+        verifier = RSAVerifier()
+
+        envelope_path = signer.sign_and_save(str(self.test_file), str(self.private_key_path),
+                                             format_type='envelope', mode='v2', timestamp=True)
+        armored_path = signer.sign_and_save(str(self.test_file), str(self.private_key_path),
+                                            format_type='armored')
+        assert envelope_path.endswith('.rsig') and armored_path.endswith('.rsig.asc')
+
+        signature, envelope = verifier.read_signature(envelope_path)
+        assert envelope.mode == 'v2' and envelope.timestamp
+        assert envelope.signature == signature
+        assert SignatureEnvelope.from_bytes(envelope.to_bytes()) == envelope
+
+        # Phần mở rộng không quan trọng; chế độ lấy từ envelope thay vì tham số mode
+        renamed = Path(self.temp_dir) / "renamed.sig"
+        renamed.write_bytes(Path(envelope_path).read_bytes())
+        for path in (renamed, armored_path):
+            assert verifier.verify_file(str(self.test_file), path, str(self.public_key_path))
+
+        # Chữ ký .sig / .b64 cũ vẫn đọc được
+        for format_type in ('binary', 'base64'):
+            legacy_path = signer.sign_and_save(str(self.test_file), str(self.private_key_path),
+                                               format_type=format_type)
+            assert verifier.read_signature(legacy_path)[1] is None
+            assert verifier.verify_file(str(self.test_file), legacy_path,
+                                        str(self.public_key_path))
+
+        other = RSAKeyManager()
+        other.generate_keypair()
+        other_public = Path(self.temp_dir) / "other.pem"
+        other.save_public_key(str(other_public))
+        result = verifier.verify_file_detailed(self.test_file, envelope_path, str(other_public))
+        assert result.reason is VerifyFailure.KEY_MISMATCH
+
+        truncated = Path(self.temp_dir) / "truncated.rsig"
+        truncated.write_bytes(Path(envelope_path).read_bytes()[:-1])
+        result = verifier.verify_file_detailed(self.test_file, truncated,
+                                               str(self.public_key_path))
+        assert result.reason is VerifyFailure.SIGNATURE_ENCODING
+
+    def test_hash_algorithms_recorded_in_envelope(self):
+        """Test ký với SHA-512 / SHA3 / BLAKE2b: thuật toán ghi trong envelope, xác minh tự nhận"""
+        signer = RSASigner()
+        verifier = RSAVerifier()
+
+        for hash_mode in ('sha512', 'sha3-256', 'blake2b'):
+            for mode in ('v1', 'v2'):
+                # Mặc định lưu envelope khi thuật toán khác SHA-256
+                signature_path = signer.sign_and_save(str(self.test_file),
+                                                      str(self.private_key_path),
+                                                      mode=mode, hash_mode=hash_mode)
+                assert signature_path.endswith('.rsig')
+                assert verifier.read_signature(signature_path)[1].hash_mode == hash_mode
+                assert verifier.verify_file(str(self.test_file), signature_path,
+                                            str(self.public_key_path))
+
+        # Chữ ký thô: cần chỉ định thuật toán khi xác minh
+        signature = signer.sign_file(str(self.test_file), str(self.private_key_path),
+                                     hash_mode='sha512')
+        assert verifier.verify_signature(str(self.test_file), signature,
+                                         str(self.public_key_path), hash_mode='sha512')
+        assert not verifier.verify_signature(str(self.test_file), signature,
+                                             str(self.public_key_path), hash_mode='sha3-512')
+        assert signer.sign_bytes(b"data", str(self.private_key_path), hash_mode='blake2b')
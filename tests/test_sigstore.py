@@ -0,0 +1,128 @@
+import hashlib
+import pytest
+import tempfile
+from pathlib import Path
+from rsa_signature import sigstore as sigstore_module
+from rsa_signature.key_manager import RSAKeyManager
+from rsa_signature.signer import RSASigner
+from rsa_signature.sigstore import SignatureStore
+from rsa_signature.verifier import RSAVerifier
+
+class TestSignatureStore:
+    def setup_method(self):
+        self.temp_dir = Path(tempfile.mkdtemp())
+        self.pack_path = self.temp_dir / "signatures.pack"
+
+    def test_put_get_delete_compact_and_recover(self):
+        digest = hashlib.sha256(b"artifact").digest()
+        with SignatureStore(self.pack_path) as store:
+            assert store.put_many([(self.temp_dir / f"f{i}", b"sig%d" % i) for i in range(50)]) == 50
+            store.put(digest, b"digest-sig")
+            store.put(self.temp_dir / "f0", b"new")
+            assert store.get(self.temp_dir / "f0") == b"new"
+            assert store.get(digest) == b"digest-sig"
+            assert store.delete(self.temp_dir / "f1")
+            assert not store.delete(self.temp_dir / "f1")
+            assert store.get(self.temp_dir / "f1") is None
+            assert len(store) == 50
+            assert store.stats()["garbage_bytes"] > 0
+
+            assert store.compact() > 0
+            assert store.stats()["garbage_bytes"] == 0
+            assert store.get(self.temp_dir / "f49") == b"sig49"
+
+        # Bản ghi đã nằm trong pack nhưng chưa vào chỉ mục, kèm một bản ghi ghi dở
+        with SignatureStore(self.pack_path) as store:
+            indexed = store.stats()["pack_bytes"]
+            store.put(self.temp_dir / "late", b"late-sig")
+            size = store.stats()["pack_bytes"]
+            with store._db:
+                store._db.execute("DELETE FROM signatures WHERE key = ?",
+                                  (b'p' + str(self.temp_dir / "late").encode(),))
+                store._set_indexed_size(indexed)
+        with open(self.pack_path, "ab") as pack:
+            pack.write(b"\x00\x05\x00\x00")
+        with SignatureStore(self.pack_path) as store:
+            assert store.get(self.temp_dir / "late") == b"late-sig"
+            assert store.stats()["pack_bytes"] == size
+            assert len(store) == 51
+
+    def test_failed_write_is_discarded(self, monkeypatch):
+        real_fsync = sigstore_module.os.fsync
+        failures = [OSError("đĩa đầy")]
+
+        def fsync(fd):
+            if failures:
+                raise failures.pop()
+            real_fsync(fd)
+
+        with SignatureStore(self.pack_path) as store:
+            store.put(self.temp_dir / "a", b"sig-a")
+            size = store.stats()["pack_bytes"]
+            monkeypatch.setattr(sigstore_module.os, "fsync", fsync)
+            with pytest.raises(OSError):
+                store.put(self.temp_dir / "b", b"sig-b")
+            # Bản ghi đã nằm trên đĩa nhưng chưa fsync bị cắt bỏ, offset lô sau vẫn đúng
+            assert self.pack_path.stat().st_size == size
+            store.put(self.temp_dir / "c", b"sig-c")
+            assert store.get(self.temp_dir / "c") == b"sig-c"
+            assert store.get(self.temp_dir / "b") is None
+
+        with SignatureStore(self.pack_path) as store:
+            assert store.get(self.temp_dir / "c") == b"sig-c"
+            assert len(store) == 2
+
+    def test_two_stores_append_in_turn(self):
+        first = SignatureStore(self.pack_path)
+        second = SignatureStore(self.pack_path)
+        try:
+            for index in range(6):
+                store = (first, second)[index % 2]
+                store.put(self.temp_dir / f"f{index}", b"sig%d" % index)
+            second.delete(self.temp_dir / "f0")
+            first.put(self.temp_dir / "f1", b"new")
+            for store in (first, second):
+                assert store.get(self.temp_dir / "f0") is None
+                assert store.get(self.temp_dir / "f1") == b"new"
+                assert store.get(self.temp_dir / "f5") == b"sig5"
+        finally:
+            first.close()
+            second.close()
+
+        with SignatureStore(self.pack_path) as store:
+            assert len(store) == 5
+            assert [store.get(self.temp_dir / f"f{index}") for index in range(2, 6)] == \
+                [b"sig%d" % index for index in range(2, 6)]
+
+    def test_sign_many_into_store_and_verify(self):
+        key_manager = RSAKeyManager()
+        key_manager.generate_keypair()
+        private_key_path = str(self.temp_dir / "private.pem")
+        public_key_path = str(self.temp_dir / "public.pem")
+        key_manager.save_private_key(private_key_path)
+        key_manager.save_public_key(public_key_path)
+        files = []
+        for index in range(5):
+            path = self.temp_dir / f"file{index}.txt"
+            path.write_bytes(f"nội dung {index}".encode())
+            files.append(path)
+
+        with SignatureStore(self.pack_path) as store:
+            results = list(RSASigner().sign_many(files, private_key_path, jobs=2,
+                                                 store=store, hash_mode='sha512'))
+            assert all(result.ok for result in results)
+            assert len(store) == 5
+            assert not list(self.temp_dir.glob("*.rsig"))
+
+            verifier = RSAVerifier(signature_store=store)
+            assert verifier.verify_file_from_store(files[0], public_key_path)
+            files[1].write_bytes(b"tampered")
+            statuses = {result.path: result.status for result in verifier.verify_many(
+                [(path, None, public_key_path) for path in files])}
+            assert statuses.pop(str(files[1])) == 'invalid'
+            assert set(statuses.values()) == {'valid'}
+
+            missing = self.temp_dir / "missing.txt"
+            missing.write_bytes(b"x")
+            results = list(verifier.verify_many([(missing, None, public_key_path)]))
+            assert results[0].status == 'error'
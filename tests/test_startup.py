@@ -0,0 +1,42 @@
+import os
+import subprocess
+import sys
+import tempfile
+from pathlib import Path
+
+PACKAGE_ROOT = str(Path(__file__).resolve().parent.parent)
+
+def run_python(code, cwd):
+    result = subprocess.run([sys.executable, "-c", code], cwd=cwd, capture_output=True,
+                            text=True, env=dict(os.environ, PYTHONPATH=PACKAGE_ROOT))
+    assert result.returncode == 0, result.stderr
+    return result.stdout
+
+class TestStartup:
+    def setup_method(self):
+        self.temp_dir = Path(tempfile.mkdtemp())
+
+    def test_cli_help_does_not_load_cryptography(self):
+        output = run_python(
+            "import sys\n"
+            "from rsa_signature.cli import cli\n"
+            "for args in (['--help'], ['sign', '--help'], ['--version']):\n"
+            "    try:\n"
+            "        cli.main(args, standalone_mode=False)\n"
+            "    except SystemExit:\n"
+            "        pass\n"
+            "print(sorted(m for m in sys.modules if m.startswith('cryptography')))\n",
+            self.temp_dir
+        )
+        assert output.strip().splitlines()[-1] == "[]"
+        # Không còn tạo file log khi chỉ import / in trợ giúp
+        assert list(self.temp_dir.iterdir()) == []
+
+    def test_lazy_package_exports(self):
+        output = run_python(
+            "import sys, rsa_signature\n"
+            "print('cryptography' in sys.modules)\n"
+            "print(rsa_signature.RSASigner.__module__)\n",
+            self.temp_dir
+        )
+        assert output.split() == ["False", "rsa_signature.signer"]
@@ -0,0 +1,109 @@
+import hashlib
+import os
+import stat
+import pytest
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import replace
+from pathlib import Path
+from rsa_signature.key_manager import RSAKeyManager
+from rsa_signature.timestamp import (TimestampBatcher, TimestampService, TimestampToken,
+                                     issue_tokens, signature_digest)
+from rsa_signature.tsa import TimestampAuthority, TimestampAuthorityError, TimestampClient
+
+class TestBatchTimestamp:
+    def setup_method(self):
+        self.temp_dir = Path(tempfile.mkdtemp())
+        key_manager = RSAKeyManager()
+        self.private_key, self.public_key = key_manager.generate_keypair()
+        self.digests = [hashlib.sha256(b"sig%d" % i).digest() for i in range(7)]
+
+    def test_tokens_verify_and_roundtrip(self):
+        tokens = issue_tokens(self.private_key, self.digests)
+        assert len({token.root_signature for token in tokens}) == 1
+        for digest, token in zip(self.digests, tokens):
+            decoded = TimestampToken.from_bytes(token.to_bytes())
+            assert decoded == token
+            assert decoded.verify(self.public_key, digest)
+
+        assert not tokens[0].verify(self.public_key, self.digests[1])
+        assert not replace(tokens[0], timestamp_us=tokens[0].timestamp_us + 1).verify(self.public_key)
+        assert not replace(tokens[0], proof=tokens[1].proof).verify(self.public_key)
+        other_key = RSAKeyManager().generate_keypair()[1]
+        assert not tokens[0].verify(other_key)
+
+        signature = b"chu ky"
+        token_path = self.temp_dir / "file.sig.tst"
+        TimestampService.save_token(issue_tokens(self.private_key, [signature_digest(signature)])[0],
+                                    token_path)
+        assert TimestampService.verify_token(TimestampService.load_token(token_path),
+                                             signature, self.public_key)
+
+    def test_batcher_groups_concurrent_requests(self):
+        with TimestampBatcher(self.private_key, window=0.05) as batcher:
+            with ThreadPoolExecutor(max_workers=7) as pool:
+                tokens = list(pool.map(batcher.timestamp, self.digests))
+        assert len({token.root for token in tokens}) == 1
+        assert all(token.verify(self.public_key, digest)
+                   for digest, token in zip(self.digests, tokens))
+
+    def test_bad_digest_does_not_poison_batch(self):
+        with TimestampBatcher(self.private_key, window=0.1) as batcher:
+            good = batcher.submit(self.digests[0])
+            with pytest.raises(ValueError):
+                batcher.submit_many([self.digests[1], b"x" * 100])
+            assert good.result(5).verify(self.public_key, self.digests[0])
+
+        socket_path = self.temp_dir / "tsa.sock"
+        authority = TimestampAuthority(self.private_key, window=0.2)
+        thread = threading.Thread(target=authority.serve_forever, args=(socket_path,), daemon=True)
+        thread.start()
+        while not socket_path.exists():
+            time.sleep(0.01)
+
+        def request(digest):
+            with TimestampClient(socket_path) as client:
+                try:
+                    return client.timestamp(digest)
+                except TimestampAuthorityError as e:
+                    return e
+
+        try:
+            # Hai client trong cùng cửa sổ gom lô: chỉ yêu cầu sai nhận lỗi
+            with ThreadPoolExecutor(max_workers=2) as pool:
+                bad, good = pool.map(request, [b"x" * 100, self.digests[2]])
+            assert isinstance(bad, TimestampAuthorityError)
+            assert good.verify(self.public_key, self.digests[2])
+        finally:
+            authority.shutdown()
+            thread.join(timeout=5)
+
+    def test_authority_over_socket(self):
+        socket_path = self.temp_dir / "tsa.sock"
+        authority = TimestampAuthority(self.private_key, window=0.005)
+        thread = threading.Thread(target=authority.serve_forever, args=(socket_path,), daemon=True)
+        thread.start()
+        while not socket_path.exists():
+            time.sleep(0.01)
+        try:
+            assert stat.S_IMODE(os.stat(socket_path).st_mode) == 0o600
+            digests = [hashlib.sha256(b"%d" % i).digest() for i in range(1200)]
+            with TimestampClient(socket_path) as client:
+                public_key = client.public_key()
+                tokens = client.timestamp_many(digests)
+                single = client.timestamp(hashlib.sha512(b"x").digest())
+            assert len(tokens) == len(digests)
+            assert all(token.verify(public_key, digest) for digest, token in zip(digests, tokens))
+            assert single.verify(self.public_key)
+        finally:
+            authority.shutdown()
+            thread.join(timeout=5)
+        assert not socket_path.exists()
+
+        # File thường trùng đường dẫn socket không bị xóa
+        socket_path.write_text("data")
+        with pytest.raises(FileExistsError):
+            TimestampAuthority(self.private_key).serve_forever(socket_path)
+        assert socket_path.read_text() == "data"
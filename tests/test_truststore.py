@@ -0,0 +1,92 @@
+import tempfile
+from pathlib import Path
+from rsa_signature.context import VerificationContext
+from rsa_signature.envelope import SignatureEnvelope
+from rsa_signature.keystore import KeyStore
+from rsa_signature.key_manager import RSAKeyManager, public_key_fingerprint
+from rsa_signature.signer import RSASigner
+from rsa_signature import truststore as truststore_module
+from rsa_signature.truststore import TrustStore
+
+class TestTrustStore:
+    def setup_method(self):
+        """Tạo thư mục chứa nhiều khóa công khai (và một khóa riêng để bị bỏ qua)"""
+        self.temp_dir = Path(tempfile.mkdtemp())
+        self.keys_dir = self.temp_dir / "trusted"
+        self.keys_dir.mkdir()
+        self.private_paths = []
+        for index, key_size in enumerate([2048, 2048, 3072]):
+            key_manager = RSAKeyManager(key_size)
+            key_manager.generate_keypair()
+            key_manager.save_public_key(str(self.keys_dir / f"key{index}.pub.pem"))
+            private_path = self.temp_dir / f"key{index}.pem"
+            key_manager.save_private_key(str(private_path))
+            self.private_paths.append(private_path)
+        # Khóa riêng trong thư mục không được coi là khóa tin cậy
+        key_manager.save_private_key(str(self.keys_dir / "stray-private.pem"))
+
+        self.test_file = self.temp_dir / "release.bin"
+        self.test_file.write_bytes(b"release payload")
+
+    def test_verify_any_hashes_once_and_reorders(self, monkeypatch):
+        store = TrustStore.from_directory(self.keys_dir)
+        assert len(store) == 3
+
+        signature = RSASigner().sign_file(str(self.test_file), str(self.private_paths[1]))
+        expected = public_key_fingerprint(
+            RSAKeyManager().load_private_key(str(self.private_paths[1])).public_key()
+        )
+
+        hashed = []
+        original = truststore_module.hash_file_mode
+        monkeypatch.setattr(truststore_module, "hash_file_mode",
+                            lambda path, mode: hashed.append(path) or original(path, mode))
+
+        assert store.verify_any(self.test_file, signature) == expected
+        assert len(hashed) == 1
+        # Khóa vừa thành công được thử đầu tiên ở lần sau
+        assert store.fingerprints()[0] == expected
+        assert store.verify_any(self.test_file, signature, key_id=expected[:8]) == expected
+
+        other = next(fp for fp in store.fingerprints() if fp != expected)
+        assert store.verify_any(self.test_file, signature, key_id=other) is None
+
+        # Chữ ký không khớp độ dài khóa nào: không đọc file
+        hashed.clear()
+        assert store.verify_any(self.test_file, signature[:100]) is None
+        assert hashed == []
+
+        self.test_file.write_bytes(b"tampered")
+        assert store.verify_any(self.test_file, signature) is None
+
+    def test_verify_any_uses_envelope_key_id(self, monkeypatch):
+        store = TrustStore.from_directory(self.keys_dir)
+        rebuilt = []
+        original = VerificationContext.with_mode
+        monkeypatch.setattr(VerificationContext, "with_mode",
+                            lambda self, *args: rebuilt.append(1) or original(self, *args))
+        signed = RSASigner().sign_file(str(self.test_file), str(self.private_paths[0]),
+                                       hash_mode='sha512')
+        public_key = RSAKeyManager().load_private_key(str(self.private_paths[0])).public_key()
+        envelope = SignatureEnvelope.create(signed, public_key, hash_mode='sha512')
+
+        # Trust store mặc định sha256: envelope quyết định thuật toán hash và khóa cần thử
+        assert store.verify_any(self.test_file, envelope) == envelope.key_fingerprint
+        # Chỉ khóa khớp key ID được dựng lại theo chế độ hash của envelope
+        assert len(rebuilt) == 1
+        other = next(fp for fp in store.fingerprints() if fp != envelope.key_fingerprint)
+        moved = SignatureEnvelope(signed, other, hash_mode='sha512')
+        assert store.verify_any(self.test_file, moved) is None
+
+    def test_from_keystore_skips_revoked(self):
+        with KeyStore(self.temp_dir / "store") as keystore:
+            key_ids = []
+            for _ in range(2):
+                key_manager = RSAKeyManager()
+                key_manager.generate_keypair()
+                key_ids.append(keystore.add_keypair(key_manager))
+            keystore.revoke(key_ids[0])
+
+            store = TrustStore.from_keystore(keystore)
+            assert key_ids[0] not in store
+            assert key_ids[1] in store
@@ -0,0 +1,82 @@
+import tempfile
+import time
+from pathlib import Path
+from rsa_signature.context import VerificationContext
+from rsa_signature.digest_cache import DigestCache
+from rsa_signature.key_manager import RSAKeyManager, public_key_fingerprint
+from rsa_signature.keystore import KeyStore
+from rsa_signature.signer import RSASigner
+from rsa_signature.verifier import RSAVerifier
+from rsa_signature.verify_cache import VerifyCache
+
+class TestVerifyCache:
+    def setup_method(self):
+        """Tạo cặp khóa, file đã ký và hai cache SQLite"""
+        self.temp_dir = Path(tempfile.mkdtemp())
+        key_manager = RSAKeyManager()
+        key_manager.generate_keypair()
+        self.private_key_path = self.temp_dir / "private.pem"
+        self.public_key_path = self.temp_dir / "public.pem"
+        key_manager.save_private_key(str(self.private_key_path))
+        key_manager.save_public_key(str(self.public_key_path))
+        self.fingerprint = public_key_fingerprint(key_manager.public_key)
+
+        self.test_file = self.temp_dir / "artifact.tar"
+        self.test_file.write_bytes(b"popular artifact" * 1000)
+        self.signature_path = RSASigner().sign_and_save(str(self.test_file),
+                                                        str(self.private_key_path))
+
+    def test_repeat_verification_skips_rsa(self, monkeypatch):
+        checks = []
+        original = VerificationContext.verify_digest_detailed
+        monkeypatch.setattr(VerificationContext, "verify_digest_detailed",
+                            lambda self, *args: checks.append(1) or original(self, *args))
+
+        with VerifyCache(self.temp_dir / "verify.sqlite3") as cache, \
+                DigestCache(self.temp_dir / "digests.sqlite3") as digests:
+            verifier = RSAVerifier(digest_cache=digests, verify_cache=cache)
+            for _ in range(3):
+                assert verifier.verify_file(str(self.test_file), self.signature_path,
+                                            str(self.public_key_path))
+            assert len(checks) == 1
+            assert cache.stats()['hits'] == 2 and len(cache) == 1
+
+            # Chữ ký sai không được cache
+            self.test_file.write_bytes(b"tampered")
+            assert not verifier.verify_file(str(self.test_file), self.signature_path,
+                                            str(self.public_key_path))
+            assert len(cache) == 1
+
+            assert cache.revoke_key(self.fingerprint) == 1
+            assert len(cache) == 0
+
+    def test_keystore_revoke_invalidates_cache(self):
+        with VerifyCache(self.temp_dir / "verify.sqlite3") as cache, \
+                KeyStore(self.temp_dir / "keys", verify_cache=cache) as keystore:
+            key_id = keystore.import_public_key(self.public_key_path)
+            verifier = RSAVerifier(verify_cache=cache)
+            assert verifier.verify_file(str(self.test_file), self.signature_path,
+                                        str(self.public_key_path))
+            assert len(cache) == 1
+
+            keystore.set_status(key_id[:8], 'retired')
+            assert len(cache) == 1
+            keystore.revoke(key_id[:8])
+            assert len(cache) == 0
+
+    def test_ttl_and_size_bound(self):
+        digest, signature = b"\x01" * 32, b"signature"
+        with VerifyCache(self.temp_dir / "verify.sqlite3", ttl=0.05, max_entries=3) as cache:
+            cache.record(digest, signature, self.fingerprint, 'v1')
+            assert cache.lookup(digest, signature, self.fingerprint, 'v1')
+            assert not cache.lookup(digest, signature, self.fingerprint, 'v2')
+            time.sleep(0.1)
+            assert not cache.lookup(digest, signature, self.fingerprint, 'v1')
+
+            cache.ttl = None
+            for index in range(5):
+                cache.record(bytes([index]) * 32, signature, self.fingerprint, 'v1')
+            assert cache.evict() == 2
+            assert len(cache) == 3
+            assert not cache.lookup(b"\x00" * 32, signature, self.fingerprint, 'v1')
+            assert cache.lookup(b"\x04" * 32, signature, self.fingerprint, 'v1')
@@ -0,0 +1,126 @@
+import base64
+import logging
+import os
+import tempfile
+from pathlib import Path
+from rsa_signature import webapp
+from rsa_signature.key_manager import RSAKeyManager
+from rsa_signature.keystore import KeyStore
+from rsa_signature.utils import get_logger, shutdown_logging
+from rsa_signature.verifier import RSAVerifier
+
+class TestJsonApi:
+    def setup_method(self):
+        """Kho khóa tạm với một cặp khóa, client của Flask app"""
+        self.temp_dir = Path(tempfile.mkdtemp())
+        key_manager = RSAKeyManager()
+        key_manager.generate_keypair()
+        with KeyStore(self.temp_dir / "keys") as keystore:
+            self.key_id = keystore.add_keypair(key_manager)
+            self.public_key_path = keystore.resolve(self.key_id)['public_path']
+
+        webapp._keystore = None
+        webapp.app.config['KEYSTORE_PATH'] = str(self.temp_dir / "keys")
+        self.client = webapp.app.test_client()
+        self.cwd = os.getcwd()
+        os.chdir(self.temp_dir)
+
+    def teardown_method(self):
+        shutdown_logging()
+        os.chdir(self.cwd)
+        if webapp._keystore is not None:
+            webapp._keystore.close()
+        webapp._keystore = None
+        webapp.app.config['KEYSTORE_PATH'] = None
+
+    def verify(self, data, signature, **query):
+        response = self.client.post('/api/v1/verify', data=data, query_string=query,
+                                    headers={'X-Signature': signature},
+                                    content_type='application/octet-stream')
+        assert response.status_code == 200
+        return response.get_json()
+
+    def test_sign_and_verify_body(self):
+        data = b"du lieu can ky " * 10000
+        response = self.client.post('/api/v1/sign', data=data,
+                                    query_string={'key_id': self.key_id[:8]},
+                                    content_type='application/octet-stream')
+        assert response.status_code == 200
+        signed = response.get_json()
+        assert signed['key_id'] == self.key_id and signed['format'] == 'binary'
+
+        # Chữ ký từ API xác minh được ngoại tuyến như chữ ký ký bằng CLI
+        data_path = self.temp_dir / "data.bin"
+        data_path.write_bytes(data)
+        assert RSAVerifier().verify_signature(data_path, base64.b64decode(signed['signature']),
+                                              self.public_key_path)
+
+        assert self.verify(data, signed['signature'], key_id=self.key_id)['valid']
+        tampered = self.verify(data + b"x", signed['signature'], key_id=self.key_id)
+        assert tampered == {'valid': False, 'reason': 'signature_mismatch', 'key_id': self.key_id}
+        assert self.verify(data, "not base64 !!", key_id=self.key_id)['reason'] == 'signature_encoding'
+
+        # Envelope tự mang key ID và thuật toán hash
+        envelope = self.client.post('/api/v1/sign?hash=sha512&key_id=' + self.key_id, data=data,
+                                    content_type='application/octet-stream').get_json()
+        assert envelope['format'] == 'envelope'
+        assert self.verify(data, envelope['signature'])['valid']
+
+        # Không có file nào được ghi vào thư mục upload
+        assert not (self.temp_dir / "uploads").exists()
+
+    def test_errors_are_json(self):
+        response = self.client.post('/api/v1/sign?key_id=ffffffff', data=b"x")
+        assert response.status_code == 404 and 'error' in response.get_json()
+        response = self.client.post('/api/v1/sign?hash=sha256-tree-v1&key_id=' + self.key_id,
+                                    data=b"x")
+        assert response.status_code == 400
+        response = self.client.post('/api/v1/verify?key_id=' + self.key_id, data=b"x")
+        assert response.status_code == 400
+        response = self.client.post('/api/v1/sign?key_id=' + self.key_id,
+                                    data=b"x" * (webapp.app.config['MAX_CONTENT_LENGTH'] + 1))
+        assert response.status_code == 413 and 'error' in response.get_json()
+
+        webapp._keystore = None
+        webapp.app.config['KEYSTORE_PATH'] = None
+        assert self.client.post('/api/v1/sign?key_id=' + self.key_id, data=b"x").status_code == 503
+
+    def test_broken_key_files_are_json_errors(self, caplog):
+        caplog.set_level(logging.INFO, logger='rsa_signature')
+        data = b"x" * 1000
+        response = self.client.post('/api/v1/sign?key_id=' + self.key_id, data=data,
+                                    content_type='application/octet-stream')
+        signature = response.get_json()['signature']
+        assert f"API đã ký {len(data)} byte" in caplog.text
+
+        record = webapp.get_keystore().resolve(self.key_id)
+        Path(record['private_path']).write_bytes(b"not a key")
+        response = self.client.post('/api/v1/sign?key_id=' + self.key_id, data=data)
+        assert response.status_code == 409 and 'error' in response.get_json()
+        Path(record['private_path']).unlink()
+        response = self.client.post('/api/v1/sign?key_id=' + self.key_id, data=data)
+        assert response.status_code == 500 and 'error' in response.get_json()
+
+        Path(record['public_path']).write_bytes(b"not a key either")
+        response = self.client.post('/api/v1/verify?key_id=' + self.key_id, data=data,
+                                    headers={'X-Signature': signature})
+        assert response.status_code == 500 and 'error' in response.get_json()
+
+    def test_first_request_configures_logging(self):
+        shutdown_logging()
+        assert not get_logger().handlers
+        self.client.get('/')
+        handlers = list(get_logger().handlers)
+        assert handlers
+        # Các request sau không cấu hình lại
+        self.client.get('/')
+        assert get_logger().handlers == handlers
+
+class TestKeyPoolConfig:
+    def test_invalid_pool_size_is_ignored(self, monkeypatch):
+        for value in ("abc", "-3", "0", ""):
+            monkeypatch.setenv("RSA_SIGNATURE_KEY_POOL", value)
+            assert webapp.create_key_pool() is None
+        monkeypatch.setenv("RSA_SIGNATURE_KEY_POOL", "4")
+        pool = webapp.create_key_pool()
+        assert (pool.low_watermark, pool.high_watermark) == (1, 4)